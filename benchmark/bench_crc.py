@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+""" Measures the CRC-8 throughput of the sensor checksums.
+
+    The table driven checksums of the crc module are compared with the bit
+    by bit calculation the HTU21D driver used before, for HTU21D frames of
+    3 bytes and DS18x20 scratchpads of 9 bytes.
+
+    python benchmark/bench_crc.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from gpio_device_tools import crc
+
+HTU21D_FRAME = bytearray('\x68\x3A\x7C')
+SCRATCHPAD = bytearray('37004b46ffff07101e'.decode('hex'))
+
+
+def bitwise_htu21d(value):
+    # the former HTU21Sensor.__crc8check
+    remainder = ((value[0] << 8) + value[1]) << 8
+    remainder |= value[2]
+    divisor = 0x988000
+
+    for i in range(0, 16):
+        if remainder & 1 << (23 - i):
+            remainder ^= divisor
+        divisor >>= 1
+
+    return remainder == 0
+
+
+def bitwise_maxim(data):
+    crc8 = 0
+    for b in data:
+        crc8 ^= b
+        for i in range(8):
+            crc8 = (crc8 >> 1) ^ 0x8C if crc8 & 0x01 else crc8 >> 1
+    return crc8 == 0
+
+
+def main(argv):
+    iterations = int(argv[0]) if argv else 100000
+
+    print '{:<12} {:>16} {:>16}'.format('checksum', 'table checks/s', 'bitwise checks/s')
+
+    for name, table, bitwise, data in [
+            ('htu21d', crc.check_sensirion, bitwise_htu21d, HTU21D_FRAME),
+            ('scratchpad', crc.check_maxim, bitwise_maxim, SCRATCHPAD)]:
+        assert table(data) and bitwise(data)
+        t_table = timeit.timeit(lambda: table(data), number=iterations)
+        t_bitwise = timeit.timeit(lambda: bitwise(data), number=iterations)
+        print '{:<12} {:>16.0f} {:>16.0f}'.format(name, iterations / t_table, iterations / t_bitwise)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+""" Measures the driver overhead of the I2C sensors on a simulated bus.
+
+    The sensors are read from FakeI2CBus devices and the conversion delays
+    of the drivers are skipped, so the result shows the Python and bus
+    access costs per reading and the number of bus transactions.
+
+    python benchmark/bench_i2c.py [iterations]
+"""
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from gpio_device_tools import bmp085, htu21d, i2c
+from test.fakes import FakeI2CBus
+from test.test_i2c import fake_bmp085, fake_htu21d
+
+BUS_NB = 99
+
+
+def main(argv):
+    iterations = int(argv[0]) if argv else 2000
+    bus = FakeI2CBus({0x40: fake_htu21d(), 0x77: fake_bmp085()})
+    i2c.set_bus(BUS_NB, bus)
+
+    # skip the conversion delays of the drivers
+    time.sleep = lambda seconds: None
+
+    print '{:<8} {:>12} {:>16}'.format('sensor', 'readings/s', 'transactions')
+
+    for name, sens in [('htu21d', htu21d.HTU21Sensor(param=str(BUS_NB))),
+                       ('bmp085', bmp085.BMP085Sensor(param=str(BUS_NB)))]:
+        start = bus.transactions
+        t = timeit.timeit(sens.read, number=iterations)
+        print '{:<8} {:>12.0f} {:>16.1f}'.format(
+            name, iterations / t, float(bus.transactions - start) / iterations)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+""" Measures the render throughput per output format.
+
+    The text format is rendered through the compiled template, JSON and XML
+    through the serializers. For the text format reading and substituting the
+    template file on every call is measured as well for comparison.
+
+    python benchmark/bench_templates.py [iterations]
+"""
+import os
+import sys
+import timeit
+from string import Template
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from gpio_device_tools import config, sensor, template
+
+
+def file_template(sens, suffix):
+    fn = os.path.join(
+        os.path.dirname(template.__file__),
+        config.tpl_file_path_name.format(sens.template_type(), suffix))
+    with open(fn) as f:
+        return Template(f.read()).safe_substitute(sens.dictionary())
+
+
+def main(argv):
+    iterations = int(argv[0]) if argv else 20000
+    sens = sensor.DummySensor(label='Benchmark')
+
+    print '{:<6} {:>16} {:>16}'.format('format', 'renders/s', 'file renders/s')
+
+    assert file_template(sens, config.TEXT_FORMAT) == sens.text_format()
+    t_file = timeit.timeit(lambda: file_template(sens, config.TEXT_FORMAT), number=iterations)
+
+    for suffix, render in [(config.TEXT_FORMAT, sens.text_format),
+                           (config.XML_FORMAT, sens.xml_format),
+                           (config.JSON_FORMAT, sens.json_format)]:
+        t = timeit.timeit(render, number=iterations)
+        if suffix == config.TEXT_FORMAT:
+            print '{:<6} {:>16.0f} {:>16.0f}'.format(suffix, iterations / t, iterations / t_file)
+        else:
+            print '{:<6} {:>16.0f} {:>16}'.format(suffix, iterations / t, '-')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+import threading
+import traceback
+from collections import OrderedDict
+
+import config
+from sensor import parse_number
+
+# resource kinds sensors are grouped by
+W1_RESOURCE = 'w1'
+I2C_RESOURCE = 'i2c'
+GPIO_RESOURCE = 'gpio'
+NO_RESOURCE = 'none'
+
+_i2c_sensor_types = {'bmp085', 'htu21'}
+_gpio_sensor_types = {'dht11', 'dht22', 'dht2302'}
+
+
+def resource_key(sensor_cfg, index=0):
+    """ Returns the bus or pin a sensor needs exclusive access to.
+
+        Sensors with the same key have to be read one after the other,
+        sensors with different keys may be read at the same time.
+    """
+    sensor_type = sensor_cfg.sensor_type.lower()
+
+    if sensor_type == 'ds1820':
+        if config.chip_platform:
+            return W1_RESOURCE, config.chip_w1_dir
+        return W1_RESOURCE, config.default_w1_dir
+    elif sensor_type in _i2c_sensor_types:
+        return I2C_RESOURCE, parse_number(sensor_cfg.sensor_param, 0)
+    elif sensor_type in _gpio_sensor_types:
+        return GPIO_RESOURCE, sensor_cfg.sensor_param
+    else:
+        # sensors without a bus don't block anybody
+        return NO_RESOURCE, index
+
+
+def group_by_resource(sensor_cfgs):
+    groups = OrderedDict()
+    for index, sensor_cfg in enumerate(sensor_cfgs):
+        groups.setdefault(resource_key(sensor_cfg, index), []).append(sensor_cfg)
+    return groups
+
+
+def read_groups(groups, read_fn, prepare_fn=None):
+    """ Calls read_fn for every sensor config, one worker thread per group.
+
+        The sensors of a group are read in their configured order. If given,
+        prepare_fn is called first in the worker with all sensor configs of
+        the group, e.g. to read a bus in one pass.
+    """
+    def read_group(sensor_cfgs):
+        if prepare_fn is not None:
+            try:
+                prepare_fn(sensor_cfgs)
+            except Exception:
+                print 'ERR: Preparing the reading of {} sensors failed'.format(len(sensor_cfgs))
+                traceback.print_exc()
+
+        for sensor_cfg in sensor_cfgs:
+            try:
+                read_fn(sensor_cfg)
+            except Exception:
+                print 'ERR: Reading sensor {} failed'.format(sensor_cfg.sensor_type)
+                traceback.print_exc()
+
+    run_parallel([(read_group, (sensor_cfgs,)) for sensor_cfgs in groups.values()])
+
+
+def run_parallel(jobs):
+    """ Runs every (function, args) job in its own thread and waits for all of them.
+
+        A single job is run in the calling thread.
+    """
+    if len(jobs) == 1:
+        fn, args = jobs[0]
+        fn(*args)
+        return
+
+    threads = []
+    for fn, args in jobs:
+        thread = threading.Thread(target=fn, args=args)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        # join with a timeout to keep the main thread responsive to signals
+        while thread.is_alive():
+            thread.join(1.0)
@@ -1,29 +1,83 @@
 # -*- coding: utf-8 -*-
+import threading
 from datetime import datetime
 
-from lib.Adafruit_BMP085 import BMP085
+from lib.Adafruit_BMP085 import BMP085, BMP085_I2CADDR, \
+    BMP085_ULTRALOWPOWER, BMP085_STANDARD, BMP085_HIGHRES, BMP085_ULTRAHIGHRES
 
 import config
+import i2c
 from sensor import Sensor, parse_number, TPL_TEMP_PRES_ALT
 
 BMP085_STR = 'bmp085'
 
+# calibration coefficients by bus number and address, read once per process
+_calibrations = {}
+_calibrations_lock = threading.Lock()
+
+# oversampling modes by name
+_modes = {
+    'ultralowpower': BMP085_ULTRALOWPOWER,
+    'standard': BMP085_STANDARD,
+    'highres': BMP085_HIGHRES,
+    'ultrahighres': BMP085_ULTRAHIGHRES
+}
+
+
+def parse_mode(mode):
+    """ Returns the oversampling mode of a name or number, standard for None """
+    if mode is None or mode == '':
+        return BMP085_STANDARD
+    if str(mode).lower() in _modes:
+        return _modes[str(mode).lower()]
+    if parse_number(mode, None) in _modes.values():
+        return parse_number(mode)
+    raise ValueError('Unsupported BMP085 mode: {}'.format(mode))
+
+
+def load_calibration(bmp, bus_nb, address=BMP085_I2CADDR, verbose=False):
+    """ Sets the calibration of a BMP085, which is read from the chip with
+        one block read by the first sensor of this process on bus_nb.
+    """
+    key = (bus_nb, address)
+
+    with _calibrations_lock:
+        values = _calibrations.get(key)
+        if values is None:
+            if verbose:
+                print 'DBG: Reading BMP085 calibration from the chip'
+            values = bmp.read_calibration()
+            _calibrations[key] = values
+
+    bmp.set_calibration(values)
+
+
+def clear_calibrations():
+    with _calibrations_lock:
+        _calibrations.clear()
+
 
 class BMP085Sensor(Sensor):
-    def __init__(self, param='0', id=None, label=BMP085_STR, verbose=False):
+    def __init__(self, param='0', id=None, label=BMP085_STR, verbose=False,
+                 mode=None, samples=1):
         Sensor.__init__(self, param, id, label, verbose)
 
         bus_nb = parse_number(param, 0)
+        mode = parse_mode(mode)
 
         if self.verbose:
-            print 'DBG: BMP085 sensor \'{}\' bus number {:d}'.format(
-                label, bus_nb)
+            print 'DBG: BMP085 sensor \'{}\' bus number {:d} mode {:d}'.format(
+                label, bus_nb, mode)
+
+        self.bmp = BMP085(mode=mode, busnum=bus_nb, i2c=i2c, load_calibration=False)
+        load_calibration(self.bmp, bus_nb, verbose=verbose)
 
-        bmp = BMP085(busnum=bus_nb)
+        self.set_samples(samples)
+        self.read()
 
-        self.temperature = bmp.read_temperature()
-        self.pressure = bmp.read_pressure()
-        self.altitude = bmp.read_altitude()
+    def read(self):
+        # one temperature and one pressure conversion for all values
+        self.temperature, self.pressure, self.altitude = self.averaged(self.bmp.read_all)
 
     def generate_id(self, param):
         return '{}_{}'.format(parse_number(param, default=0), BMP085_STR)
@@ -35,6 +35,9 @@ FILE_CHANNEL = 2
 CSV_FILE_CHANNEL = 3
 MQTT_CHANNEL = 4
 
+# CSV file rotation modes
+_csv_rotate_modes = {'none', 'size', 'daily'}
+
 tpl_file_path_name = "templates/{0}/template.{1}"
 
 # 1-wire DS1820 defaults
@@ -65,6 +68,13 @@ def detect_chip():
 
 chip_platform = detect_chip()
 
+# readings with checksum errors are repeated up to default_retries times
+default_retries = 2
+
+# daemon mode sampling defaults in seconds
+default_interval = 60.0
+default_jitter = 0.0
+
 sensor_defaults = {
     'label': 'Label',
     'id': 'ID'
@@ -77,7 +87,16 @@ mqtt_defaults = {
     'client_id': 'gpio-device-tools',
     'qos': '0',
     'retain': 'True',
-    'keepalive': '60'
+    'keepalive': '60',
+    'queue_size': '1000',
+    'reconnect_min_delay': '1',
+    'reconnect_max_delay': '120',
+    'spool_dir': '',
+    'spool_max_size': '50',
+    'spool_rate': '50',
+    'spool_sync_count': '100',
+    'spool_sync_interval': '5',
+    'subscribe_batch_size': '100'
 }
 
 mqtt_bindings_defaults = {
@@ -145,6 +164,43 @@ class SensorConfigReader():
             if conf.has_option('default', 'verbose'):
                 verbose = conf.getboolean('default', 'verbose')
 
+            csv_options = {}
+            if conf.has_option('default', 'csv_flush_size'):
+                csv_options['flush_size'] = int(conf.getfloat('default', 'csv_flush_size') * 1024)
+            if conf.has_option('default', 'csv_flush_interval'):
+                csv_options['flush_interval'] = conf.getfloat('default', 'csv_flush_interval')
+            if conf.has_option('default', 'csv_rotate'):
+                csv_options['rotate'] = conf.get('default', 'csv_rotate').lower()
+                if csv_options['rotate'] not in _csv_rotate_modes:
+                    raise ConfigurationError('Unsupported value \'{}\' for option \'csv_rotate\' in section [default]'
+                                             .format(csv_options['rotate']))
+            if conf.has_option('default', 'csv_max_size'):
+                csv_options['max_size'] = int(conf.getfloat('default', 'csv_max_size') * 1024 * 1024)
+            if conf.has_option('default', 'csv_compress'):
+                csv_options['compress'] = conf.getboolean('default', 'csv_compress')
+
+            if conf.has_option('default', 'skip_unchanged'):
+                skip_unchanged = conf.getboolean('default', 'skip_unchanged')
+            else:
+                skip_unchanged = False
+
+            default_deadbands = read_deadbands(conf, 'default', {})
+
+            if conf.has_option('default', 'heartbeat'):
+                default_heartbeat = conf.getfloat('default', 'heartbeat')
+            else:
+                default_heartbeat = None
+
+            if conf.has_option('default', 'interval'):
+                sampling_interval = conf.getfloat('default', 'interval')
+            else:
+                sampling_interval = default_interval
+
+            if conf.has_option('default', 'jitter'):
+                sampling_jitter = conf.getfloat('default', 'jitter')
+            else:
+                sampling_jitter = default_jitter
+
             if output == CSV_FORMAT and out_file is None:
                 raise ConfigurationError('Value \'file\' needs to be defined for CSV output')
             elif output == MQTT_FORMAT and hostname is None:
@@ -192,9 +248,59 @@ class SensorConfigReader():
                 else:
                     topic = None
 
+                if conf.has_option(section, 'interval'):
+                    interval = conf.getfloat(section, 'interval')
+                else:
+                    interval = sampling_interval
+
+                if conf.has_option(section, 'jitter'):
+                    jitter = conf.getfloat(section, 'jitter')
+                else:
+                    jitter = sampling_jitter
+
+                if interval <= 0:
+                    raise ConfigurationError('Value \'interval\' has to be positive in section [{}]'.format(
+                        section))
+
+                if conf.has_option(section, 'heartbeat'):
+                    heartbeat = conf.getfloat(section, 'heartbeat')
+                else:
+                    heartbeat = default_heartbeat
+
+                if conf.has_option(section, 'mode'):
+                    mode = conf.get(section, 'mode').lower()
+                else:
+                    mode = None
+
+                if conf.has_option(section, 'resolution'):
+                    resolution = conf.getint(section, 'resolution')
+                else:
+                    resolution = None
+
+                if conf.has_option(section, 'samples'):
+                    samples = conf.getint(section, 'samples')
+                else:
+                    samples = 1
+
+                if samples < 1:
+                    raise ConfigurationError('Value \'samples\' has to be positive in section [{}]'.format(
+                        section))
+
+                if conf.has_option(section, 'retries'):
+                    retries = conf.getint(section, 'retries')
+                else:
+                    retries = default_retries
+
+                if retries < 0:
+                    raise ConfigurationError('Value \'retries\' must not be negative in section [{}]'.format(
+                        section))
+
                 sensor = ConfigItem()
                 sensor.out_channel = out_channel
                 sensor.out_file = out_file
+                sensor.out_format = output.lower()
+                sensor.csv_options = csv_options
+                sensor.skip_unchanged = skip_unchanged
                 sensor.mqtt_cfg_file = mqtt_cfg_file
                 sensor.hostname = hostname
                 sensor.sensor_type = type
@@ -202,6 +308,14 @@ class SensorConfigReader():
                 sensor.id = id
                 sensor.label = label
                 sensor.topic = topic
+                sensor.interval = interval
+                sensor.jitter = jitter
+                sensor.deadbands = read_deadbands(conf, section, default_deadbands)
+                sensor.heartbeat = heartbeat
+                sensor.mode = mode
+                sensor.resolution = resolution
+                sensor.samples = samples
+                sensor.retries = retries
                 sensor.verbose = verbose
 
                 self.sensors.append(sensor)
@@ -211,6 +325,32 @@ class SensorConfigReader():
             pass
 
 
+def parse_deadband(value):
+    """ Parses an absolute deadband like '0.5' or a relative one like '2%' """
+    from deadband import Deadband
+
+    value = value.strip()
+    try:
+        if value.endswith('%'):
+            return Deadband(float(value[:-1]), percent=True)
+        return Deadband(float(value))
+    except ValueError:
+        raise ConfigurationError('Invalid deadband: \'{}\''.format(value))
+
+
+def read_deadbands(conf, section, defaults):
+    """ Reads the options 'deadband' for all data types and 'deadband_<data type>'
+        of a section. The key None holds the deadband of all data types.
+    """
+    deadbands = dict(defaults)
+    for option in conf.options(section):
+        if option == 'deadband':
+            deadbands[None] = parse_deadband(conf.get(section, option, raw=True))
+        elif option.startswith('deadband_'):
+            deadbands[option[len('deadband_'):]] = parse_deadband(conf.get(section, option, raw=True))
+    return deadbands
+
+
 class MqttServerConfigReader():
 
     def __init__(self, cfg_file=None):
@@ -250,6 +390,21 @@ class MqttServerConfigReader():
         self.qos = conf.getint(section, 'qos')
         self.retain = conf.getboolean(section, 'retain')
         self.keepalive = conf.getint(section, 'keepalive')
+        self.queue_size = conf.getint(section, 'queue_size')
+        self.reconnect_min_delay = conf.getint(section, 'reconnect_min_delay')
+        self.reconnect_max_delay = conf.getint(section, 'reconnect_max_delay')
+
+        # store-and-forward spool, disabled without a directory
+        self.spool_dir = conf.get(section, 'spool_dir') or None
+        self.spool_max_size = int(conf.getfloat(section, 'spool_max_size') * 1024 * 1024)
+        self.spool_rate = conf.getfloat(section, 'spool_rate')
+        self.spool_sync_count = conf.getint(section, 'spool_sync_count')
+        self.spool_sync_interval = conf.getfloat(section, 'spool_sync_interval')
+
+        # maximum number of topics per SUBSCRIBE packet
+        self.subscribe_batch_size = conf.getint(section, 'subscribe_batch_size')
+        if self.subscribe_batch_size < 1:
+            raise ConfigurationError('Value \'subscribe_batch_size\' has to be positive')
 
 
 class MqttBindingConfigReader():
@@ -275,6 +430,8 @@ class MqttBindingConfigReader():
                 abs_file))
 
         self.bindings = []
+        # bindings with direction 'in', pins published to topics
+        self.input_bindings = []
 
         try:
             i = 1
@@ -300,8 +457,59 @@ class MqttBindingConfigReader():
                 else:
                     inverted = False
 
-                self.bindings.append(
-                    create_binding_cfg(topic, pin, inverted)
+                if conf.has_option(section, 'min_interval'):
+                    min_interval = conf.getfloat(section, 'min_interval')
+                    if min_interval < 0:
+                        raise ConfigurationError('Value \'min_interval\' may not be negative in section [{}]'.format(
+                            section))
+                else:
+                    min_interval = None
+
+                if conf.has_option(section, 'qos'):
+                    qos = conf.getint(section, 'qos')
+                    if qos not in (0, 1, 2):
+                        raise ConfigurationError('Value \'qos\' has to be 0, 1 or 2 in section [{}]'.format(
+                            section))
+                else:
+                    qos = None
+
+                if conf.has_option(section, 'direction'):
+                    direction = conf.get(section, 'direction').lower()
+                    if direction not in ('in', 'out'):
+                        raise ConfigurationError('Value \'direction\' has to be \'in\' or \'out\' in section [{}]'.format(
+                            section))
+                else:
+                    direction = 'out'
+
+                if direction == 'out':
+                    self.bindings.append(
+                        create_binding_cfg(topic, pin, inverted, min_interval, qos)
+                    )
+                    i += 1
+                    continue
+
+                if not pin.isdigit():
+                    raise ConfigurationError('Value \'pin\' has to be a GPIO number in section [{}]'.format(
+                        section))
+
+                if conf.has_option(section, 'edge'):
+                    edge = conf.get(section, 'edge').lower()
+                    if edge not in ('both', 'rising', 'falling'):
+                        raise ConfigurationError('Value \'edge\' has to be both, rising or falling in section [{}]'.format(
+                            section))
+                else:
+                    edge = 'both'
+
+                if conf.has_option(section, 'debounce'):
+                    debounce = conf.getfloat(section, 'debounce') / 1000.0
+                    if debounce < 0:
+                        raise ConfigurationError('Value \'debounce\' may not be negative in section [{}]'.format(
+                            section))
+                else:
+                    debounce = None
+
+                self.input_bindings.append(
+                    create_input_binding_cfg(topic, pin, inverted, qos, edge, debounce)
                 )
 
                 i += 1
@@ -309,10 +517,24 @@ class MqttBindingConfigReader():
             pass
 
 
-def create_binding_cfg(topic, pin, invert):
+def create_binding_cfg(topic, pin, invert, min_interval=None, qos=None):
+    binding = ConfigItem()
+    binding.topic = topic
+    binding.pin = pin
+    binding.invert = invert
+    binding.min_interval = min_interval
+    binding.qos = qos
+
+    return binding
+
+
+def create_input_binding_cfg(topic, pin, invert, qos=None, edge='both', debounce=None):
     binding = ConfigItem()
     binding.topic = topic
     binding.pin = pin
     binding.invert = invert
+    binding.qos = qos
+    binding.edge = edge
+    binding.debounce = debounce
 
     return binding
@@ -0,0 +1,62 @@
+""" Table driven CRC-8 checksums of sensor data.
+
+    crc8_sensirion: polynomial x^8 + x^5 + x^4 + 1 (0x131), used by the
+    HTU21D and other Sensirion like humidity sensors.
+    crc8_maxim: the Dallas/Maxim 1-wire CRC with the same polynomial in
+    reflected form (0x8C), used for DS18x20 scratchpads and ROM codes.
+"""
+
+
+class ChecksumError(Exception):
+    """ Sensor data with an invalid checksum """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return repr(self.value)
+
+
+def _table(poly, reflected):
+    table = []
+    for i in range(256):
+        crc = i
+        for bit in range(8):
+            if reflected:
+                crc = (crc >> 1) ^ poly if crc & 0x01 else crc >> 1
+            else:
+                crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+
+_sensirion_table = _table(0x31, reflected=False)
+_maxim_table = _table(0x8C, reflected=True)
+
+
+def crc8_sensirion(data, crc=0x00):
+    """ Returns the checksum of data, a byte string or a sequence of ints """
+    table = _sensirion_table
+    for b in bytearray(data):
+        crc = table[crc ^ b]
+    return crc
+
+
+def crc8_maxim(data, crc=0x00):
+    """ Returns the checksum of data, a byte string or a sequence of ints """
+    table = _maxim_table
+    for b in bytearray(data):
+        crc = table[crc ^ b]
+    return crc
+
+
+def check_sensirion(data):
+    """ True if the last byte of data is the checksum of the other bytes """
+    data = bytearray(data)
+    return len(data) > 1 and crc8_sensirion(data[:-1]) == data[-1]
+
+
+def check_maxim(data):
+    """ True if the last byte of data is the checksum of the other bytes """
+    data = bytearray(data)
+    return len(data) > 1 and crc8_maxim(data) == 0
@@ -0,0 +1,192 @@
+import atexit
+import gzip
+import os
+import shutil
+import threading
+from datetime import date, datetime
+
+# rotation modes
+ROTATE_NONE = 'none'
+ROTATE_SIZE = 'size'
+ROTATE_DAILY = 'daily'
+
+_rotate_modes = {ROTATE_NONE, ROTATE_SIZE, ROTATE_DAILY}
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(fn, **kwargs):
+    """ Returns the writer shared by all channels of this process writing
+        to the CSV file fn. The options of the first call are used.
+    """
+    key = os.path.abspath(fn)
+
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            if not _writers:
+                atexit.register(close_writers)
+
+            writer = CsvWriter(fn, **kwargs)
+            _writers[key] = writer
+
+    return writer
+
+
+def close_writers():
+    with _writers_lock:
+        writers = _writers.values()
+        _writers.clear()
+
+    for writer in writers:
+        writer.close()
+
+
+class CsvWriter():
+    """ Appends lines to a CSV file which is kept open between writes.
+
+        Lines are buffered and written when flush_size bytes are pending,
+        flush_interval seconds have passed since the first pending line or
+        the writer is closed. The file is rotated when it exceeds max_size
+        bytes (rotate = 'size') or at the first write of a new day
+        (rotate = 'daily'). Rotated files are optionally gzipped. Every new
+        file starts with the CSV header.
+    """
+
+    def __init__(self, fn, flush_size=64 * 1024, flush_interval=60.0,
+                 rotate=ROTATE_NONE, max_size=10 * 1024 * 1024, compress=False,
+                 verbose=False):
+        if rotate not in _rotate_modes:
+            raise ValueError('Unsupported rotation: {}'.format(rotate))
+
+        self.fn = fn
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.rotate = rotate
+        self.max_size = max_size
+        self.compress = compress
+        self.verbose = verbose
+
+        self.__lock = threading.RLock()
+        self.__fd = None
+        self.__size = 0
+        self.__day = None
+        self.__buffer = []
+        self.__buffered = 0
+        self.__timer = None
+        self.__compressors = []
+
+    def write(self, header, line):
+        with self.__lock:
+            if self.__fd is None:
+                # an existing file may already be due, e.g. if every reading
+                # is written by a new process
+                self.__open()
+            if self.__needs_rotation(len(line)):
+                self.__flush()
+                self.__rotate()
+                self.__open()
+
+            if self.__size + self.__buffered == 0:
+                self.__append(header)
+            self.__append(line)
+
+            if self.__buffered >= self.flush_size:
+                self.__flush()
+            elif self.__timer is None and self.flush_interval > 0:
+                self.__timer = threading.Timer(self.flush_interval, self.flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def __append(self, data):
+        self.__buffer.append(data)
+        self.__buffered += len(data)
+
+    def __open(self):
+        dir_name = os.path.dirname(self.fn)
+        if dir_name and not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+        if self.verbose:
+            if os.path.isfile(self.fn):
+                print "DBG: Append to existing CSV file: {}".format(self.fn)
+            else:
+                print "DBG: Creating new CSV file: {}".format(self.fn)
+
+        self.__fd = open(self.fn, 'a')
+        self.__fd.seek(0, os.SEEK_END)
+        self.__size = self.__fd.tell()
+        if self.__size > 0:
+            self.__day = date.fromtimestamp(os.path.getmtime(self.fn))
+        else:
+            self.__day = date.today()
+
+    def __needs_rotation(self, length):
+        if self.rotate == ROTATE_SIZE:
+            return self.__size + self.__buffered > 0 \
+                and self.__size + self.__buffered + length > self.max_size
+        elif self.rotate == ROTATE_DAILY:
+            return self.__day != date.today()
+        return False
+
+    def __rotate(self):
+        self.__fd.close()
+        self.__fd = None
+
+        base, ext = os.path.splitext(self.fn)
+        if self.rotate == ROTATE_DAILY:
+            suffix = self.__day.strftime('%Y-%m-%d')
+        else:
+            suffix = datetime.now().strftime('%Y%m%d-%H%M%S')
+
+        rotated = '{}-{}{}'.format(base, suffix, ext)
+        i = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + '.gz'):
+            rotated = '{}-{}.{}{}'.format(base, suffix, i, ext)
+            i += 1
+        os.rename(self.fn, rotated)
+
+        if self.verbose:
+            print "DBG: Rotated CSV file to: {}".format(rotated)
+
+        if self.compress:
+            thread = threading.Thread(target=self.gzip_file, args=(rotated,))
+            thread.start()
+            self.__compressors = [t for t in self.__compressors if t.is_alive()]
+            self.__compressors.append(thread)
+
+    @staticmethod
+    def gzip_file(fn):
+        with open(fn, 'rb') as f_in:
+            with gzip.open(fn + '.gz', 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        os.remove(fn)
+
+    def __flush(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        if self.__buffer and self.__fd is not None:
+            self.__fd.write(''.join(self.__buffer))
+            self.__fd.flush()
+            self.__size += self.__buffered
+
+        self.__buffer = []
+        self.__buffered = 0
+
+    def flush(self):
+        with self.__lock:
+            self.__flush()
+
+    def close(self):
+        with self.__lock:
+            self.__flush()
+            if self.__fd is not None:
+                self.__fd.close()
+                self.__fd = None
+
+            for thread in self.__compressors:
+                thread.join()
+            self.__compressors = []
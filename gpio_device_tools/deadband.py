@@ -0,0 +1,100 @@
+import threading
+import time
+
+from outchannel import OutputChannel
+
+
+class Deadband():
+
+    def __init__(self, value, percent=False):
+        self.value = value
+        self.percent = percent
+
+    def exceeded(self, last, current):
+        if self.percent:
+            return abs(current - last) > abs(last) * self.value / 100.0
+        return abs(current - last) > self.value
+
+
+class DeadbandFilter():
+    """ Decides which data types of a reading are worth publishing.
+
+        A value is suppressed unless it moved by more than its deadband since
+        it was last published. Deadbands are defined per data type, the key
+        None defines the deadband of all other data types. Every value is
+        published at least every heartbeat seconds.
+    """
+
+    def __init__(self, deadbands=None, heartbeat=None):
+        self.deadbands = deadbands or {}
+        self.heartbeat = heartbeat
+        self.suppressed = 0
+        self.__last = {}
+        self.__lock = threading.Lock()
+
+    def deadband(self, data_type):
+        return self.deadbands.get(data_type, self.deadbands.get(None))
+
+    def changed_data_types(self, sensor):
+        dictionary = sensor.dictionary()
+        now = time.time()
+        changed = []
+
+        with self.__lock:
+            for data_type in sensor.sensor_data_types():
+                key = (sensor.type(), sensor.id, data_type)
+                value = dictionary[data_type]
+
+                if self.__is_changed(self.__last.get(key), value, now, self.deadband(data_type)):
+                    self.__last[key] = (value, now)
+                    changed.append(data_type)
+                else:
+                    self.suppressed += 1
+
+        return changed
+
+    def __is_changed(self, last, value, now, deadband):
+        if last is None:
+            return True
+
+        last_value, last_time = last
+        if self.heartbeat is not None and now - last_time >= self.heartbeat:
+            return True
+        if deadband is None:
+            return value != last_value
+
+        try:
+            return deadband.exceeded(float(last_value), float(value))
+        except (TypeError, ValueError):
+            return value != last_value
+
+
+class DeadbandChannel(OutputChannel):
+    """ Forwards only readings with changed values to another channel """
+
+    def __init__(self, channel, deadband_filter, verbose=False):
+        super(DeadbandChannel, self).__init__()
+        self.__channel = channel
+        self.__filter = deadband_filter
+        self.__verbose = verbose
+
+    def output(self, sensor):
+        data_types = self.__filter.changed_data_types(sensor)
+
+        if not data_types:
+            if self.__verbose:
+                print 'DBG: No value of sensor {} has changed'.format(sensor.id)
+            return
+
+        self.__channel.output_data_types(sensor, data_types)
+
+    def output_batch(self, sensors):
+        # passed on as one batch, a batch file isn't overwritten sensor by sensor
+        changed = [sensor for sensor in sensors if self.__filter.changed_data_types(sensor)]
+
+        if not changed:
+            if self.__verbose:
+                print 'DBG: No value of {} sensors has changed'.format(len(sensors))
+            return
+
+        self.__channel.output_batch(changed)
@@ -1,36 +1,177 @@
 # -*- coding: utf-8 -*-
+import math
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
 import config
 from sensor import Sensor, parse_number, TPL_TEMP_HUM
-import Adafruit_DHT
 
 DHT_STR = 'dht'
 
+# a DHT sensor delivers a new value at most every MIN_INTERVAL seconds
+MIN_INTERVAL = 2.0
+# seconds to wait for a new value, before one was read and afterwards
+FIRST_DEADLINE = 30.0
+DEADLINE = 3.0
+# attempts per reading are chosen from the success rate of the recent ones
+MAX_ATTEMPTS = 15
+HISTORY_SIZE = 20
+TARGET_SUCCESS = 0.95
+
+
+class DHTWorker():
+    """ Reads a DHT sensor in a background thread.
+
+        read() requests a new value and waits for it until a deadline,
+        then the last good value is returned instead. Attempts are at least
+        min_interval seconds apart. The number of attempts per request
+        follows the success rate of the recent attempts, so that a request
+        succeeds with a probability of about TARGET_SUCCESS.
+    """
+
+    def __init__(self, read_once, min_interval=MIN_INTERVAL, name='DHT', verbose=False):
+        self.read_once = read_once
+        self.min_interval = min_interval
+        self.name = name
+        self.verbose = verbose
+
+        # (humidity, temperature) of the last good reading and its time
+        self.value = None
+        self.timestamp = None
+
+        self.__history = deque(maxlen=HISTORY_SIZE)
+        self.__last_attempt = 0
+        self.__requested = False
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def attempts(self):
+        if not self.__history:
+            return MAX_ATTEMPTS
+
+        rate = sum(self.__history) / float(len(self.__history))
+        if rate >= 1.0:
+            return 1
+        if rate <= 0.0:
+            return MAX_ATTEMPTS
+        attempts = math.ceil(math.log(1.0 - TARGET_SUCCESS) / math.log(1.0 - rate))
+        return int(max(1, min(MAX_ATTEMPTS, attempts)))
+
+    def read(self, deadline):
+        """ Returns (humidity, temperature, timestamp) of the newest good
+            reading or None if there never was one.
+        """
+        start = time.time()
+
+        with self.__condition:
+            if self.timestamp is not None and start - self.timestamp < self.min_interval:
+                # the sensor has no newer value yet
+                return self.value + (self.timestamp,)
+
+            self.__requested = True
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name=self.name)
+                self.__thread.daemon = True
+                self.__thread.start()
+            self.__condition.notify_all()
+
+            end = start + deadline
+            while self.timestamp is None or self.timestamp < start:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    if self.verbose:
+                        print 'DBG: No new value of {} within {:.1f} s'.format(self.name, deadline)
+                    break
+                self.__condition.wait(remaining)
+
+            if self.value is None:
+                return None
+            return self.value + (self.timestamp,)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__requested:
+                    self.__condition.wait()
+                self.__requested = False
+
+            attempts = self.attempts()
+            for attempt in range(attempts):
+                wait = self.__last_attempt + self.min_interval - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                self.__last_attempt = time.time()
+
+                try:
+                    humidity, temperature = self.read_once()
+                except Exception as e:
+                    print 'ERR: Reading {} failed: {}'.format(self.name, e)
+                    humidity, temperature = None, None
+
+                success = humidity is not None and temperature is not None
+                self.__history.append(1 if success else 0)
+
+                if self.verbose:
+                    print 'DBG: {} attempt {:d} of {:d} {}'.format(
+                        self.name, attempt + 1, attempts, 'succeeded' if success else 'failed')
+
+                if success:
+                    with self.__condition:
+                        self.value = (humidity, temperature)
+                        self.timestamp = time.time()
+                        self.__condition.notify_all()
+                    break
+
 
 class DHT(Sensor):
 
-    def __init__(self, sensor_type='22', pin='4', id=None, label=DHT_STR, verbose=False):
+    def __init__(self, sensor_type='22', pin='4', id=None, label=DHT_STR, verbose=False,
+                 deadline=DEADLINE):
+        import Adafruit_DHT
+
         Sensor.__init__(self, pin, id, label, verbose)
         self.sensor_type_nb = parse_number(sensor_type, 22)
         self.pin = pin
+        self.deadline = deadline
 
         if self.sensor_type_nb == 11:
-            sensor = Adafruit_DHT.DHT11
+            self.sensor = Adafruit_DHT.DHT11
         elif self.sensor_type_nb == 2302:
-            sensor = Adafruit_DHT.AM2302
+            self.sensor = Adafruit_DHT.AM2302
         else :
-            sensor = Adafruit_DHT.DHT22
+            self.sensor = Adafruit_DHT.DHT22
 
         if self.verbose:
             print 'DBG: DHT{} sensor \'{}\' pin {}'.format(
                 self.sensor_type_nb, label, pin)
 
-        self.humidity, self.temperature = Adafruit_DHT.read_retry(sensor, pin)
+        self.worker = DHTWorker(
+            lambda: Adafruit_DHT.read(self.sensor, self.pin),
+            name='DHT{} pin {}'.format(self.sensor_type_nb, pin),
+            verbose=verbose)
+
+        self.read()
+
+    def read(self):
+        # the first value may take several attempts
+        if self.worker.timestamp is None:
+            result = self.worker.read(FIRST_DEADLINE)
+        else:
+            result = self.worker.read(self.deadline)
+
+        if result is None:
+            raise IOError('No valid reading of DHT{} sensor on pin {}'.format(
+                self.sensor_type_nb, self.pin))
+
+        self.humidity, self.temperature, self.timestamp = result
+        self.age = time.time() - self.timestamp
 
         if self.verbose:
             print 'DBG: Temperature = {:.2f} °C'.format(self.temperature)
             print 'DBG: Humidity    = {:.2f} %'.format(self.humidity)
+            print 'DBG: Age         = {:.1f} s'.format(self.age)
 
     def generate_id(self, param):
         return '{}_{}'.format(parse_number(param, default=0), DHT_STR)
@@ -44,22 +185,36 @@ class DHT(Sensor):
     def sensor_data_types(self):
         return ['temperature', 'humidity']
 
+    def measurement_time(self):
+        # the time of the returned value, which is older than the reading
+        # if the sensor didn't deliver a new value in time
+        return datetime.fromtimestamp(self.timestamp).strftime(config.dt_format)
+
+    @staticmethod
+    def format_value(value):
+        return '{:.2f}'.format(value) if value is not None else ''
+
     def dictionary(self):
         return dict(
             type=self.type(),
             id=self.id,
             label=self.label,
-            time=datetime.now().strftime(config.dt_format),
-            temperature='{:.2f}'.format(self.temperature),
+            time=self.measurement_time(),
+            temperature=self.format_value(self.temperature),
             temperatureUnit='C',
-            humidity='{:.2f}'.format(self.humidity),
-            humidityUnit='%')
+            humidity=self.format_value(self.humidity),
+            humidityUnit='%',
+            age='{:.1f}'.format(self.age))
+
+    def text_format(self):
+        # the template is shared with sensors which always read a new value
+        return '{}\nAge:         {:.1f} s'.format(Sensor.text_format(self), self.age)
 
     def csv_header(self):
         return 'Time;Temperature °C;Humidity %\n'
 
     def csv_line(self):
-        return '{};{:.2f};{:.2}\n'.format(
-            datetime.now().strftime(config.dt_format),
-            self.temperature,
-            self.humidity)
\ No newline at end of file
+        return '{};{};{}\n'.format(
+            self.measurement_time(),
+            self.format_value(self.temperature),
+            self.format_value(self.humidity))
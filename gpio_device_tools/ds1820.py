@@ -1,20 +1,402 @@
 # -*- coding: utf-8 -*-
+import glob
 import io
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from copy import copy
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 from Adafruit_GPIO import Platform
 
 import config
+import crc
 from sensor import Sensor, parse_number, TPL_TEMP
 
 DS1820_STR = 'ds1820'
 
+# family codes of the 1-wire temperature sensors
+_temperature_families = {'10', '22', '28', '3b', '42'}
+
+# sensor parameter which selects all attached temperature sensors
+WILDCARD = '*'
+
+# seconds the attached devices of a bus are cached
+REFRESH_INTERVAL = 60.0
+
+# seconds of a 12 bit conversion, sensors due within it are read in one pass
+CONVERSION_TIME = 0.75
+
+_device_indexes = {}
+_device_indexes_lock = threading.Lock()
+_bus_readers = {}
+_bus_readers_lock = threading.Lock()
+
+
+def w1_defaults():
+    """ Returns the 1-wire devices directory and sensor file of this platform """
+    if config.chip_platform:
+        return config.chip_w1_dir, config.chip_w1_file
+    return config.default_w1_dir, config.default_w1_file
+
+
+def get_device_index(w1_dir, verbose=False):
+    """ Returns the device index shared by all users of a 1-wire devices directory """
+    key = os.path.abspath(w1_dir)
+
+    with _device_indexes_lock:
+        index = _device_indexes.get(key)
+        if index is None:
+            index = W1DeviceIndex(w1_dir, verbose=verbose)
+            _device_indexes[key] = index
+
+    return index
+
+
+def expand_wildcard(sensor_cfg, w1_dir=None):
+    """ Returns one sensor config per attached temperature sensor for the
+        sensor parameter '*', otherwise the sensor config itself.
+    """
+    if sensor_cfg.sensor_param != WILDCARD:
+        return [sensor_cfg]
+
+    if w1_dir is None:
+        w1_dir = w1_defaults()[0]
+
+    sensor_cfgs = []
+    for sens_id in get_device_index(w1_dir, sensor_cfg.verbose).devices(_temperature_families):
+        item = copy(sensor_cfg)
+        item.sensor_param = sens_id
+        # every sensor is identified by its 1-wire id
+        item.id = None
+        sensor_cfgs.append(item)
+
+    if sensor_cfg.verbose:
+        print 'DBG: Found {} DS1820 sensor(s) in {}'.format(len(sensor_cfgs), w1_dir)
+
+    return sensor_cfgs
+
+
+def get_bus_reader(sens_dir, sens_file, verbose=False):
+    """ Returns the reader shared by all sensors of a 1-wire devices directory """
+    key = (os.path.abspath(sens_dir), sens_file)
+
+    with _bus_readers_lock:
+        reader = _bus_readers.get(key)
+        if reader is None:
+            reader = W1BusReader(sens_dir, sens_file, verbose=verbose)
+            _bus_readers[key] = reader
+
+    return reader
+
+
+def read_w1_slave(path, verbose=False):
+    """ Reads the temperature from a w1_slave file, starting a conversion """
+    if verbose:
+        print 'DBG: Path = {}'.format(path)
+
+    temp = ''
+    try:
+        with io.open(path, "r") as f:
+            line = f.readline()
+            if verbose:
+                print 'DBG: Line 1 = {}'.format(line)
+
+            m = re.match(r"((?:[0-9a-f]{2} ){9}):", line)
+            if m:
+                # checked here, the kernel accepts an all zero scratchpad
+                scratchpad = bytearray(m.group(1).replace(' ', '').decode('hex'))
+                if not crc.check_maxim(scratchpad) or not any(scratchpad):
+                    raise crc.ChecksumError('DS1820 scratchpad: {}'.format(m.group(1).strip()))
+
+                line = f.readline()
+                if verbose:
+                    print 'DBG: Line 2 = {}'.format(line)
+
+                m = re.match(r"([0-9a-f]{2} ){9}t=([+-]?[0-9]+)", line)
+                if m:
+                    temp = float(m.group(2)) / 1000.0
+                    if verbose:
+                        print 'DBG: Temperature = {:.2f} °C'.format(temp)
+    except IOError as e:
+        if verbose:
+            print 'DBG: I/O error({0}): {1}'.format(e.errno, e.strerror)
+
+    return temp
+
+
+class W1DeviceIndex():
+    """ Index of the devices attached to the bus masters of a 1-wire devices
+        directory.
+
+        The w1_master_slaves files of all bus masters are scanned at once and
+        the result is kept for refresh_interval seconds. A device which is
+        missing from the index triggers a new scan, at most every min_rescan
+        seconds.
+    """
+
+    def __init__(self, w1_dir, refresh_interval=REFRESH_INTERVAL, min_rescan=1.0, verbose=False):
+        self.w1_dir = w1_dir
+        self.refresh_interval = refresh_interval
+        self.min_rescan = min_rescan
+        self.verbose = verbose
+
+        self.__lock = threading.Lock()
+        self.__masters = OrderedDict()
+        self.__paths = {}
+        self.__time = None
+
+    def refresh(self):
+        masters = OrderedDict()
+        paths = {}
+
+        for master in sorted(glob.glob(os.path.join(self.w1_dir, 'w1_bus_master*'))):
+            try:
+                with open(os.path.join(master, 'w1_master_slaves')) as f:
+                    slaves = [line.strip() for line in f if line.strip()]
+            except IOError:
+                continue
+
+            # the kernel reports an empty bus as 'not found.'
+            slaves = [sens_id for sens_id in slaves if '-' in sens_id]
+            masters[master] = slaves
+            for sens_id in slaves:
+                paths[sens_id] = os.path.join(self.w1_dir, sens_id)
+
+        with self.__lock:
+            self.__masters = masters
+            self.__paths = paths
+            self.__time = time.time()
+
+        if self.verbose:
+            print 'DBG: Found {} 1-wire device(s) on {} bus master(s)'.format(
+                len(paths), len(masters))
+
+    def __age(self):
+        if self.__time is None:
+            return None
+        return time.time() - self.__time
+
+    def __refresh_if_older(self, max_age):
+        age = self.__age()
+        if age is None or age > max_age:
+            self.refresh()
+
+    def masters(self):
+        """ Returns the ids of the attached devices by bus master directory """
+        self.__refresh_if_older(self.refresh_interval)
+        return self.__masters
+
+    def devices(self, families=None):
+        """ Returns the ids of the attached devices, optionally only those
+            of the given family codes.
+        """
+        sens_ids = [sens_id for slaves in self.masters().values() for sens_id in slaves]
+        if families is not None:
+            sens_ids = [sens_id for sens_id in sens_ids if sens_id[:2].lower() in families]
+        return sens_ids
+
+    def path(self, sens_id):
+        """ Returns the directory of an attached device or None """
+        self.__refresh_if_older(self.refresh_interval)
+        path = self.__paths.get(sens_id)
+        if path is None:
+            self.__refresh_if_older(self.min_rescan)
+            path = self.__paths.get(sens_id)
+        return path
+
+
+def read_cycle(sensor_cfgs, w1_dir=None, w1_file=None):
+    """ Reads the configured DS1820 sensors in one pass, the sensors then use
+        the values of the pass.
+    """
+    sens_ids = [sensor_cfg.sensor_param for sensor_cfg in sensor_cfgs
+                if sensor_cfg.sensor_type.lower() == DS1820_STR and sensor_cfg.sensor_param != WILDCARD]
+    if len(sens_ids) < 2:
+        return
+
+    if w1_dir is None or w1_file is None:
+        default_dir, default_file = w1_defaults()
+        w1_dir = w1_dir or default_dir
+        w1_file = w1_file or default_file
+    verbose = any(sensor_cfg.verbose for sensor_cfg in sensor_cfgs)
+    get_bus_reader(w1_dir, w1_file, verbose).read_cycle(sens_ids)
+
+
+class W1BusReader():
+    """ Reads DS1820 sensors of a 1-wire devices directory.
+
+        read_all() reads a set of sensors in one pass: bus masters with a
+        therm_bulk_read interface start the conversion on all their sensors
+        at once, the converted values are then read from the temperature file
+        of the wanted sensors. Sensors on other masters are read by a pool of
+        threads, so that their conversions overlap. Only the requested
+        sensors are read, read_cycle() passes all sensors of a sampling
+        cycle. The value of every sensor is reused for max_age seconds.
+    """
+
+    def __init__(self, sens_dir, sens_file, max_age=1.0, workers=8,
+                 bulk_timeout=2.0, index=None, verbose=False):
+        if not sens_dir.endswith('/'):
+            sens_dir += '/'
+
+        self.sens_dir = sens_dir
+        self.index = index if index is not None else get_device_index(sens_dir, verbose)
+        self.sens_file = sens_file
+        self.max_age = max_age
+        self.workers = workers
+        self.bulk_timeout = bulk_timeout
+        self.verbose = verbose
+
+        self.__lock = threading.Lock()
+        # sensor id -> (value, time)
+        self.__values = {}
+        self.__pool = None
+
+    def temperature(self, sens_id):
+        """ Returns the temperature of a sensor, raises its ChecksumError or
+            the IOError of a missing sensor
+        """
+        with self.__lock:
+            value, read_time = self.__values.pop(sens_id, (None, 0))
+            if time.time() - read_time > self.max_age:
+                value = self.read_all([sens_id])[sens_id]
+                read_time = time.time()
+
+            if isinstance(value, Exception):
+                # failed values are not reused
+                raise value
+
+            self.__values[sens_id] = (value, read_time)
+            return value
+
+    def read_cycle(self, sens_ids):
+        """ Reads sens_ids in one pass and keeps the values for max_age seconds """
+        with self.__lock:
+            values = self.read_all(sens_ids)
+            now = time.time()
+            for sens_id, value in values.items():
+                self.__values[sens_id] = (value, now)
+
+    def read_all(self, sens_ids):
+        """ Returns the temperatures of sens_ids by sensor id, a ChecksumError
+            or IOError instead of the temperature if a sensor failed
+        """
+        bulk_masters = []
+        bulk_ids = []
+        single_ids = []
+        values = {}
+        wanted = set(sens_ids)
+
+        masters = self.index.masters()
+        for master, slaves in masters.items():
+            slaves = [sens_id for sens_id in slaves if sens_id in wanted]
+            if not slaves:
+                continue
+            if self.bulk_trigger(master):
+                bulk_masters.append(master)
+                bulk_ids.extend(slaves)
+            else:
+                single_ids.extend(slaves)
+
+        for sens_id in sens_ids:
+            if sens_id in bulk_ids or sens_id in single_ids:
+                continue
+            if masters and self.index.path(sens_id) is None:
+                # not attached, no need to try opening it
+                values[sens_id] = IOError('DS1820 sensor {} not found on the 1-wire bus'.format(sens_id))
+            else:
+                single_ids.append(sens_id)
+
+        if bulk_ids:
+            self.bulk_wait(bulk_masters)
+            for sens_id in bulk_ids:
+                values[sens_id] = self.read_converted(sens_id)
+
+        if len(single_ids) == 1:
+            values[single_ids[0]] = self.read_slave(single_ids[0])
+        elif single_ids:
+            if self.__pool is None:
+                self.__pool = ThreadPool(self.workers)
+            values.update(zip(single_ids, self.__pool.map(self.read_slave, single_ids)))
+
+        if self.verbose:
+            print 'DBG: Read {} DS1820 sensor(s) with bulk conversion, {} one by one'.format(
+                len(bulk_ids), len(single_ids))
+
+        return values
+
+    def bulk_trigger(self, master):
+        path = os.path.join(master, 'therm_bulk_read')
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with open(path, 'w') as f:
+                f.write('trigger\n')
+            return True
+        except IOError:
+            return False
+
+    def bulk_wait(self, masters):
+        """ Waits until the triggered masters report the conversion as done """
+        deadline = time.time() + self.bulk_timeout
+
+        for master in masters:
+            while self.bulk_state(master) == -1 and time.time() < deadline:
+                time.sleep(0.05)
+
+    @staticmethod
+    def bulk_state(master):
+        try:
+            with open(os.path.join(master, 'therm_bulk_read')) as f:
+                return int(f.read().strip())
+        except (IOError, ValueError):
+            return None
+
+    def read_converted(self, sens_id):
+        """ Reads the value of a bulk conversion without starting a new one.
+
+            The temperature file doesn't show the scratchpad, so its CRC
+            can't be checked. Reading w1_slave instead would start another
+            conversion. Values a failed conversion or transfer typically
+            results in, the power-on value 85 °C, 0 °C of an all zero
+            scratchpad and values out of range, are read again from
+            w1_slave, which is checked.
+        """
+        try:
+            with open(os.path.join(self.sens_dir, sens_id, 'temperature')) as f:
+                value = float(f.read().strip()) / 1000.0
+        except (IOError, ValueError):
+            return self.read_slave(sens_id)
+
+        if value in (0.0, 85.0) or not -55.0 <= value <= 125.0:
+            if self.verbose:
+                print 'DBG: Checking bulk value {:.2f} of DS1820 sensor {}'.format(value, sens_id)
+            return self.read_slave(sens_id)
+        return value
+
+    def read_slave(self, sens_id):
+        """ Returns the temperature of a sensor, its ChecksumError or an
+            IOError if it can't be read
+        """
+        try:
+            value = read_w1_slave(os.path.join(self.sens_dir, sens_id, self.sens_file), self.verbose)
+        except crc.ChecksumError as e:
+            return e
+
+        if value == '':
+            return IOError('No valid reading of DS1820 sensor {}'.format(sens_id))
+        return value
+
 
 class DS1820Sensor(Sensor):
 
     def __init__(self, sens_dir=None, sens_id=None, sens_file=None, id=None,
-                 label=DS1820_STR, verbose=False):
+                 label=DS1820_STR, verbose=False, retries=config.default_retries):
         Sensor.__init__(self, sens_id, id, label, verbose)
 
         if sens_dir is None or sens_file is None:
@@ -22,16 +404,11 @@ class DS1820Sensor(Sensor):
             if self.verbose:
                 print 'DBG: CHIP platform detected: {}'.format(config.chip_platform)
 
+            w1_dir, w1_file = w1_defaults()
             if sens_dir is None:
-                if config.chip_platform:
-                    sens_dir = config.chip_w1_dir
-                else:
-                    sens_dir = config.default_w1_dir
+                sens_dir = w1_dir
             if sens_file is None:
-                if config.chip_platform:
-                    sens_file = config.chip_w1_file
-                else:
-                    sens_file = config.default_w1_file
+                sens_file = w1_file
 
         if not sens_dir.endswith('/'):
             sens_dir += '/'
@@ -40,36 +417,19 @@ class DS1820Sensor(Sensor):
             print 'DBG: DS1820 sensor \'{}\': {}{}'.format(
                 label, sens_dir, sens_id)
 
-        self.temperature = self.read_temp(sens_dir, sens_id, sens_file)
+        self.sens_dir = sens_dir
+        self.sens_id = sens_id
+        self.sens_file = sens_file
+        self.retries = retries
 
-    def read_temp(self, sens_dir, sens_id, sens_file):
-        path = sens_dir + sens_id + '/' + sens_file
+        self.read()
 
-        if self.verbose:
-            print 'DBG: Path = {}'.format(path)
+    def read(self):
+        reader = get_bus_reader(self.sens_dir, self.sens_file, self.verbose)
+        self.temperature = self.checked(lambda: reader.temperature(self.sens_id))
 
-        temp = ''
-        try:
-            with io.open(path, "r") as f:
-                line = f.readline()
-                if self.verbose:
-                    print 'DBG: Line 1 = {}'.format(line)
-
-                if re.match(r"([0-9a-f]{2} ){9}: crc=[0-9a-f]{2} YES", line):
-                    line = f.readline()
-                    if self.verbose:
-                        print 'DBG: Line 2 = {}'.format(line)
-
-                    m = re.match(r"([0-9a-f]{2} ){9}t=([+-]?[0-9]+)", line)
-                    if m:
-                        temp = float(m.group(2)) / 1000.0
-                        if self.verbose:
-                            print 'DBG: Temperature = {:.2f} °C'.format(temp)
-        except IOError as e:
-            if self.verbose:
-                print 'DBG: I/O error({0}): {1}'.format(e.errno, e.strerror)
-
-        return temp
+    def read_temp(self, sens_dir, sens_id, sens_file):
+        return read_w1_slave(sens_dir + sens_id + '/' + sens_file, self.verbose)
 
     def generate_id(self, sensor_ID):
         return '{}'.format(sensor_ID)
@@ -0,0 +1,168 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+
+# inotify(7) constants
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+
+_EVENT_FORMAT = 'iIII'
+_EVENT_SIZE = struct.calcsize(_EVENT_FORMAT)
+
+# seconds without further events before a change is reported, editors
+# write a file in several steps
+SETTLE_TIME = 0.2
+POLL_INTERVAL = 2.0
+
+
+def _load_inotify():
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher():
+    """ Calls on_change() in a background thread after a file was changed.
+
+        On Linux the directory of the file is watched with inotify, which
+        also detects files replaced by a rename as most editors do. Where
+        inotify isn't available the modification time and size of the file
+        are polled every poll_interval seconds.
+    """
+
+    def __init__(self, fn, on_change, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.fn = os.path.abspath(fn)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+
+        self.__libc = _load_inotify() if use_inotify else None
+        self.__stopped = threading.Event()
+        self.__thread = None
+        self.__stat = self.__file_stat()
+
+    def start(self):
+        if self.__libc is not None:
+            try:
+                fd = self.__inotify_fd()
+            except OSError as e:
+                logging.warning('inotify not available, polling %s: %s', self.fn, e)
+                fd = None
+        else:
+            fd = None
+
+        if fd is not None:
+            target, args = self.__watch, (fd,)
+            logging.debug('Watching %s with inotify', self.fn)
+        else:
+            target, args = self.__poll, ()
+            logging.debug('Polling %s every %s s', self.fn, self.poll_interval)
+
+        self.__thread = threading.Thread(target=target, args=args, name='FileWatcher')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self, timeout=5.0):
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+    def __file_stat(self):
+        try:
+            st = os.stat(self.fn)
+            return st.st_mtime, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def __changed(self):
+        stat = self.__file_stat()
+        if stat is None or stat == self.__stat:
+            return False
+        self.__stat = stat
+        return True
+
+    def __notify(self):
+        if not self.__changed():
+            return
+        try:
+            self.on_change()
+        except Exception as e:
+            logging.error('Handling the change of %s failed: %s', self.fn, e)
+
+    def __poll(self):
+        while not self.__stopped.wait(self.poll_interval):
+            self.__notify()
+
+    def __inotify_fd(self):
+        fd = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+        if self.__libc.inotify_add_watch(fd, os.path.dirname(self.fn), mask) < 0:
+            e = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(e, os.strerror(e))
+
+        return fd
+
+    def __read_events(self, fd):
+        """ Returns True if an event concerns the watched file """
+        name = os.path.basename(self.fn)
+        relevant = False
+
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return relevant
+                raise
+            if not data:
+                return relevant
+
+            offset = 0
+            while offset + _EVENT_SIZE <= len(data):
+                wd, mask, cookie, length = struct.unpack_from(_EVENT_FORMAT, data, offset)
+                offset += _EVENT_SIZE
+                event_name = data[offset:offset + length].rstrip('\0')
+                offset += length
+
+                if event_name == name or mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    relevant = True
+
+    def __watch(self, fd):
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+
+        try:
+            while not self.__stopped.is_set():
+                # the timeout only serves to notice stop()
+                if not poller.poll(1000) or not self.__read_events(fd):
+                    continue
+
+                # wait until the file was written completely
+                while poller.poll(SETTLE_TIME * 1000):
+                    self.__read_events(fd)
+                self.__notify()
+        finally:
+            os.close(fd)
@@ -0,0 +1,188 @@
+import logging
+import os
+import select
+import threading
+import time
+
+SYSFS_GPIO = '/sys/class/gpio'
+
+EDGE_BOTH = 'both'
+EDGE_RISING = 'rising'
+EDGE_FALLING = 'falling'
+EDGES = (EDGE_BOTH, EDGE_RISING, EDGE_FALLING)
+
+# seconds a level has to be stable before it is reported
+DEBOUNCE = 0.02
+# seconds to wait for udev to make an exported pin writable
+EXPORT_TIMEOUT = 1.0
+
+
+class SysfsGPIO():
+    """ Input pins of the sysfs GPIO interface, identified by their GPIO
+        number. The kernel signals an edge on a value file as POLLPRI, the
+        file has to be read again to re-arm the notification.
+    """
+
+    poll_events = select.POLLPRI | select.POLLERR
+
+    def __init__(self, root=SYSFS_GPIO):
+        self.root = root
+        self.__exported = []
+
+    def pin_dir(self, pin):
+        return os.path.join(self.root, 'gpio{}'.format(int(pin)))
+
+    def export(self, pin):
+        if os.path.isdir(self.pin_dir(pin)):
+            return
+
+        with open(os.path.join(self.root, 'export'), 'w') as f:
+            f.write(str(int(pin)))
+        self.__exported.append(pin)
+
+        direction = os.path.join(self.pin_dir(pin), 'direction')
+        deadline = time.time() + EXPORT_TIMEOUT
+        while not os.access(direction, os.W_OK) and time.time() < deadline:
+            time.sleep(0.01)
+
+    def setup_input(self, pin):
+        """ Configures pin as input signalling both edges. Wanted edges
+            are selected by the caller, with a single edge the kernel
+            wouldn't signal the return to the previous level.
+        """
+        self.export(pin)
+        self.__write(pin, 'direction', 'in')
+        self.__write(pin, 'edge', EDGE_BOTH)
+
+    def __write(self, pin, name, value):
+        with open(os.path.join(self.pin_dir(pin), name), 'w') as f:
+            f.write(value)
+
+    def open(self, pin):
+        return os.open(os.path.join(self.pin_dir(pin), 'value'), os.O_RDONLY | os.O_NONBLOCK)
+
+    def read(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        return int(os.read(fd, 8).strip() or 0)
+
+    def close(self, fd):
+        os.close(fd)
+
+    def cleanup(self):
+        """ Unexports the pins exported by this instance """
+        for pin in self.__exported:
+            try:
+                with open(os.path.join(self.root, 'unexport'), 'w') as f:
+                    f.write(str(int(pin)))
+            except IOError:
+                pass
+        self.__exported = []
+
+
+class _Input():
+
+    def __init__(self, pin, debounce, edge):
+        self.pin = pin
+        self.debounce = debounce
+        self.edge = edge
+        self.fd = None
+        self.level = None
+        # end of the debounce time and time of the first edge within it
+        self.deadline = None
+        self.edge_time = None
+
+    def reports(self, level):
+        return self.edge == EDGE_BOTH or (self.edge == EDGE_RISING) == bool(level)
+
+
+class EdgeMonitor():
+    """ Watches input pins for edges in a single thread.
+
+        The value files of all pins are polled at once. After an edge the
+        level of a pin is read again once it was stable for debounce
+        seconds, then on_change(pin, level, edge_time) is called if the
+        level differs from the last one. The initial level of every pin is
+        reported on start.
+    """
+
+    def __init__(self, gpio, on_change, name='EdgeMonitor'):
+        self.gpio = gpio
+        self.on_change = on_change
+        self.name = name
+        self.edges = 0
+        self.changes = 0
+
+        self.__inputs = []
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def add(self, pin, debounce=DEBOUNCE, edge=EDGE_BOTH):
+        if edge not in EDGES:
+            raise ValueError('Unsupported edge: {}'.format(edge))
+        self.__inputs.append(_Input(pin, debounce, edge))
+
+    def start(self):
+        for i in self.__inputs:
+            self.gpio.setup_input(i.pin)
+            i.fd = self.gpio.open(i.pin)
+
+        self.__thread = threading.Thread(target=self.__run, name=self.name)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self, timeout=5.0):
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+        for i in self.__inputs:
+            if i.fd is not None:
+                self.gpio.close(i.fd)
+                i.fd = None
+
+    def __report(self, i, level, edge_time):
+        i.level = level
+        if edge_time is not None and not i.reports(level):
+            return
+
+        self.changes += 1
+        try:
+            self.on_change(i.pin, level, edge_time)
+        except Exception as e:
+            logging.error('Handling the change of pin %s failed: %s', i.pin, e)
+
+    def __run(self):
+        poller = select.poll()
+        inputs = {}
+        for i in self.__inputs:
+            poller.register(i.fd, self.gpio.poll_events)
+            inputs[i.fd] = i
+            self.__report(i, self.gpio.read(i.fd), None)
+
+        while not self.__stopped.is_set():
+            deadlines = [i.deadline for i in self.__inputs if i.deadline is not None]
+            if deadlines:
+                timeout = max(0, min(deadlines) - time.time()) * 1000
+            else:
+                # the timeout only serves to notice stop()
+                timeout = 1000
+
+            events = poller.poll(timeout)
+            now = time.time()
+
+            for fd, event in events:
+                i = inputs[fd]
+                # reading re-arms the notification
+                self.gpio.read(fd)
+                self.edges += 1
+                if i.deadline is None:
+                    i.edge_time = now
+                i.deadline = now + i.debounce
+
+            for i in self.__inputs:
+                if i.deadline is not None and i.deadline <= now:
+                    i.deadline = None
+                    level = self.gpio.read(i.fd)
+                    if level != i.level:
+                        self.__report(i, level, i.edge_time)
@@ -1,36 +1,57 @@
 # -*- coding: utf-8 -*-
 import array
-import fcntl
-import io
 import time
 from datetime import datetime
 
 import config
+import crc
+import i2c
 from sensor import Sensor, parse_number, TPL_TEMP_HUM
 
 HTU21D_STR = 'htu21d'
 
+# temperature resolution in bits: user register bits and maximum conversion
+# times in seconds of temperature and humidity, which has 12, 10, 8 or 11 bits
+DEFAULT_RESOLUTION = 14
+_resolutions = {
+    14: (0x00, 0.050, 0.016),
+    13: (0x80, 0.025, 0.005),
+    12: (0x01, 0.013, 0.003),
+    11: (0x81, 0.007, 0.008)
+}
+_RESOLUTION_BITS = 0x81
+
+# measurement modes: wait the conversion time, poll until the sensor
+# acknowledges the read or let the sensor hold the bus until it is done
+MODE_TIMED = 'timed'
+MODE_POLL = 'poll'
+MODE_HOLD = 'hold'
+_modes = {MODE_TIMED, MODE_POLL, MODE_HOLD}
+
+# maximum soft reset time and polling interval in seconds
+RESET_TIME = 0.015
+POLL_INTERVAL = 0.002
 
-class I2CSystem:
 
-    _I2C_SLAVE = 0x0703
+class I2CSystem:
+    """ Device on the shared handle of an I2C bus, see i2c.get_bus() """
 
     def __init__(self, device, bus):
-        self.fr = io.open('/dev/i2c-'+str(bus), 'rb', buffering=0)
-        self.fw = io.open('/dev/i2c-'+str(bus), 'wb', buffering=0)
-
-        fcntl.ioctl(self.fr, self._I2C_SLAVE, device)
-        fcntl.ioctl(self.fw, self._I2C_SLAVE, device)
+        self.device = device
+        self.bus = i2c.get_bus(bus)
 
     def write(self, bytes):
-        self.fw.write(bytes)
+        self.bus.write(self.device, bytes)
 
     def read(self, bytes):
-        return self.fr.read(bytes)
+        return self.bus.read(self.device, bytes)
+
+    def write_read(self, bytes, length):
+        return self.bus.write_read(self.device, bytes, length)
 
     def close(self):
-        self.fw.close()
-        self.fr.close()
+        # the bus handle is kept open for the next reading
+        pass
 
 
 class HTU21Sensor(Sensor):
@@ -47,59 +68,92 @@ class HTU21Sensor(Sensor):
     __CMD_READ_USR_REG     = '\xE7'
     __CMD_SOFT_RESET       = '\xFE'
 
-    def __init__(self, param='0', id=None, label=HTU21D_STR, verbose=False):
+    def __init__(self, param='0', id=None, label=HTU21D_STR, verbose=False,
+                 resolution=None, samples=1, mode=None, retries=config.default_retries):
         Sensor.__init__(self, param, id, label, verbose)
 
-        bus_nb = parse_number(param, 0)
+        self.bus_nb = parse_number(param, 0)
+        self.resolution = parse_number(resolution, DEFAULT_RESOLUTION)
+        if self.resolution not in _resolutions:
+            raise ValueError('Unsupported HTU21D resolution: {}'.format(resolution))
+        self.temp_time, self.humi_time = _resolutions[self.resolution][1:]
+
+        self.mode = mode.lower() if mode else MODE_TIMED
+        if self.mode not in _modes:
+            raise ValueError('Unsupported HTU21D mode: {}'.format(mode))
 
         if self.verbose:
-            print 'DBG: HTU21D sensor \'{}\' bus number {:d}'.format(
-                label, bus_nb)
+            print 'DBG: HTU21D sensor \'{}\' bus number {:d} resolution {:d} bit mode {}'.format(
+                label, self.bus_nb, self.resolution, self.mode)
 
-        self.dev = None
-        try:
-            self.dev = I2CSystem(self.__HTU21DF_I2CADDR, bus_nb)
+        self.dev = I2CSystem(self.__HTU21DF_I2CADDR, self.bus_nb)
+        self.__initialized = False
 
-            self.__htu_reset()
-            self.temperature = self.__read_temperature()
+        self.retries = retries
+        self.set_samples(samples)
+        self.read()
+
+    def read(self):
+        self.temperature, self.humidity = self.averaged(self.__measure)
 
+    def __measure(self):
+        # the sensor is only reset before the first measurement and after errors
+        if not self.__initialized:
             self.__htu_reset()
-            self.humidity = self.__read_humidity(self.temperature)
-        finally:
-            if self.dev is not None:
-                self.dev.close()
+            self.__initialized = True
 
-    def __htu_reset(self):
-        self.dev.write(self.__CMD_SOFT_RESET)
-        time.sleep(.1)
+        try:
+            temperature = self.__read_temperature()
+            humidity = self.__read_humidity(temperature)
+        except IOError:
+            self.__initialized = False
+            raise
 
-    def __crc8check(self, value):
-        # Ported from Sparkfun Arduino HTU21D Library: https://github.com/sparkfun/HTU21D_Breakout
-        remainder = ((value[0] << 8) + value[1]) << 8
-        remainder |= value[2]
+        return temperature, humidity
 
-        # POLYNOMIAL = 0x0131 = x^8 + x^5 + x^4 + 1
-        # divsor = 0x988000 is the 0x0131 polynomial shifted to farthest left of three bytes
-        divisor = 0x988000
+    def __htu_reset(self):
+        self.dev.write(self.__CMD_SOFT_RESET)
+        time.sleep(RESET_TIME)
+
+        # the reset restores the default resolution
+        if self.resolution != DEFAULT_RESOLUTION:
+            self.__write_resolution()
+
+    def __convert(self, hold_cmd, nohold_cmd, conversion_time):
+        """ Starts a conversion and returns the result with its checksum """
+        if self.mode == MODE_HOLD:
+            # one combined transaction, the sensor stretches the clock
+            return self.dev.write_read(hold_cmd, 3)
+
+        self.dev.write(nohold_cmd)
+        if self.mode == MODE_TIMED:
+            time.sleep(conversion_time)
+            return self.dev.read(3)
+
+        # the sensor doesn't acknowledge reads until the conversion is done
+        deadline = time.time() + 2 * conversion_time + RESET_TIME
+        while True:
+            time.sleep(POLL_INTERVAL)
+            try:
+                return self.dev.read(3)
+            except IOError:
+                if time.time() > deadline:
+                    raise
+
+    def __write_resolution(self):
+        user_reg = ord(self.dev.write_read(self.__CMD_READ_USR_REG, 1))
+        user_reg = (user_reg & ~_RESOLUTION_BITS) | _resolutions[self.resolution][0]
 
-        for i in range(0, 16):
-            if remainder & 1 << (23 - i):
-                remainder ^= divisor
-            divisor >>= 1
+        if self.verbose:
+            print 'DBG: User register = 0x{:02x}'.format(user_reg)
 
-        if remainder == 0:
-            return True
-        else:
-            return False
+        self.dev.write(self.__CMD_WRIT_USR_REG + chr(user_reg))
 
     def __read_temperature(self):
         if self.verbose:
             print 'DBG: Reading temperature'
 
-        self.dev.write(self.__CMD_READ_TEMP_NOHOLD)
-        time.sleep(.1)
-
-        data = self.dev.read(3)
+        data = self.__convert(self.__CMD_READ_TEMP_HOLD, self.__CMD_READ_TEMP_NOHOLD, self.temp_time)
         buf = array.array('B', data)
 
         if self.verbose:
@@ -107,10 +161,8 @@ class HTU21Sensor(Sensor):
             print 'DBG: lsb = {:d}'.format(buf[1])
             print 'DBG: crc = {:d}'.format(buf[2])
 
-        if not self.__crc8check(buf):
-            if self.verbose:
-                print 'DBG: CRC check failed'
-            return None
+        if not crc.check_sensirion(buf):
+            raise crc.ChecksumError('HTU21D temperature: {}'.format(buf.tostring().encode('hex')))
 
         temp_reading = (buf[0] << 8 | buf [1]) & 0xFFFC
 
@@ -125,10 +177,7 @@ class HTU21Sensor(Sensor):
         if self.verbose:
             print 'DBG: Reading humidity'
 
-        self.dev.write(self.__CMD_READ_HUMI_NOHOLD)
-        time.sleep(.1)
-
-        data = self.dev.read(3)
+        data = self.__convert(self.__CMD_READ_HUMI_HOLD, self.__CMD_READ_HUMI_NOHOLD, self.humi_time)
         buf = array.array('B', data)
 
         if self.verbose:
@@ -136,11 +185,8 @@ class HTU21Sensor(Sensor):
             print 'DBG: lsb = {:d}'.format(buf[1])
             print 'DBG: crc = {:d}'.format(buf[2])
 
-        if self.__crc8check(buf):
-            if self.verbose:
-                print 'DBG: CRC check failed'
-            # ignore CRC check failure here
-            #return 0
+        if not crc.check_sensirion(buf):
+            raise crc.ChecksumError('HTU21D humidity: {}'.format(buf.tostring().encode('hex')))
 
         humid_reading = (buf[0] << 8 | buf [1]) & 0xFFFC
 
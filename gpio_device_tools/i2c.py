@@ -0,0 +1,194 @@
+import atexit
+import ctypes
+import fcntl
+import os
+import struct
+import threading
+
+# ioctl requests of linux/i2c-dev.h
+I2C_SLAVE = 0x0703
+I2C_FUNCS = 0x0705
+I2C_RDWR = 0x0707
+
+I2C_FUNC_I2C = 0x00000001
+I2C_M_RD = 0x0001
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+class _I2CMsg(ctypes.Structure):
+    _fields_ = [('addr', ctypes.c_uint16),
+                ('flags', ctypes.c_uint16),
+                ('len', ctypes.c_uint16),
+                ('buf', ctypes.POINTER(ctypes.c_uint8))]
+
+
+class _I2CRdwrIoctlData(ctypes.Structure):
+    _fields_ = [('msgs', ctypes.POINTER(_I2CMsg)),
+                ('nmsgs', ctypes.c_uint32)]
+
+
+def get_bus(bus_nb):
+    """ Returns the bus handle shared by all I2C devices of this process """
+    with _buses_lock:
+        bus = _buses.get(bus_nb)
+        if bus is None:
+            if not _buses:
+                atexit.register(close_buses)
+
+            bus = I2CBus(bus_nb)
+            _buses[bus_nb] = bus
+
+    return bus
+
+
+def set_bus(bus_nb, bus):
+    """ Replaces the handle of a bus, e.g. for tests """
+    with _buses_lock:
+        if not _buses:
+            atexit.register(close_buses)
+        old = _buses.get(bus_nb)
+        _buses[bus_nb] = bus
+
+    if old is not None and old is not bus:
+        old.close()
+
+
+def close_buses():
+    with _buses_lock:
+        buses = _buses.values()
+        _buses.clear()
+
+    for bus in buses:
+        bus.close()
+
+
+def get_i2c_device(address, busnum=None, **kwargs):
+    """ Drop-in replacement of Adafruit_GPIO.I2C.get_i2c_device() which uses
+        the shared bus handles.
+    """
+    if busnum is None:
+        import Adafruit_GPIO.I2C as I2C
+        busnum = I2C.get_default_bus()
+    return I2CDevice(address, get_bus(busnum))
+
+
+class I2CBus():
+    """ /dev/i2c-N opened once for reading and writing.
+
+        The slave address is only set if it differs from the one of the last
+        transaction. A write followed by a read is sent as one combined
+        I2C_RDWR transaction if the adapter supports plain I2C messages.
+    """
+
+    def __init__(self, bus_nb):
+        self.bus_nb = bus_nb
+        self.lock = threading.RLock()
+        self.transactions = 0
+
+        self.__address = None
+        self.__fd = os.open('/dev/i2c-{}'.format(bus_nb), os.O_RDWR)
+
+        try:
+            funcs = struct.unpack('=L', fcntl.ioctl(self.__fd, I2C_FUNCS, struct.pack('=L', 0)))[0]
+            self.combined = bool(funcs & I2C_FUNC_I2C)
+        except IOError:
+            self.combined = False
+
+    def __select(self, address):
+        if address != self.__address:
+            fcntl.ioctl(self.__fd, I2C_SLAVE, address)
+            self.__address = address
+
+    def write(self, address, data):
+        with self.lock:
+            self.__select(address)
+            os.write(self.__fd, data)
+            self.transactions += 1
+
+    def read(self, address, length):
+        with self.lock:
+            self.__select(address)
+            data = os.read(self.__fd, length)
+            self.transactions += 1
+        return data
+
+    def write_read(self, address, data, length):
+        if not self.combined:
+            with self.lock:
+                self.write(address, data)
+                return self.read(address, length)
+
+        write_buf = ctypes.create_string_buffer(data, len(data))
+        read_buf = ctypes.create_string_buffer(length)
+        msgs = (_I2CMsg * 2)(
+            _I2CMsg(address, 0, len(data), ctypes.cast(write_buf, ctypes.POINTER(ctypes.c_uint8))),
+            _I2CMsg(address, I2C_M_RD, length, ctypes.cast(read_buf, ctypes.POINTER(ctypes.c_uint8))))
+        rdwr = _I2CRdwrIoctlData(msgs, 2)
+
+        with self.lock:
+            fcntl.ioctl(self.__fd, I2C_RDWR, rdwr)
+            self.transactions += 1
+        return read_buf.raw
+
+    def close(self):
+        with self.lock:
+            if self.__fd is not None:
+                os.close(self.__fd)
+                self.__fd = None
+
+
+class I2CDevice():
+    """ Device on a shared bus with the register access methods of
+        Adafruit_GPIO.I2C.Device.
+    """
+
+    def __init__(self, address, bus):
+        self.address = address
+        self.bus = bus
+
+    def writeRaw8(self, value):
+        self.bus.write(self.address, chr(value & 0xFF))
+
+    def write8(self, register, value):
+        self.bus.write(self.address, chr(register) + chr(value & 0xFF))
+
+    def write16(self, register, value):
+        self.bus.write(self.address, chr(register) + struct.pack('<H', value & 0xFFFF))
+
+    def writeList(self, register, data):
+        self.bus.write(self.address, chr(register) + str(bytearray(data)))
+
+    def readList(self, register, length):
+        return bytearray(self.bus.write_read(self.address, chr(register), length))
+
+    def readRaw8(self):
+        return ord(self.bus.read(self.address, 1))
+
+    def readU8(self, register):
+        return self.readList(register, 1)[0]
+
+    def readS8(self, register):
+        result = self.readU8(register)
+        return result - 256 if result > 127 else result
+
+    def readU16(self, register, little_endian=True):
+        return struct.unpack('<H' if little_endian else '>H',
+                             self.bus.write_read(self.address, chr(register), 2))[0]
+
+    def readS16(self, register, little_endian=True):
+        return struct.unpack('<h' if little_endian else '>h',
+                             self.bus.write_read(self.address, chr(register), 2))[0]
+
+    def readU16LE(self, register):
+        return self.readU16(register, little_endian=True)
+
+    def readU16BE(self, register):
+        return self.readU16(register, little_endian=False)
+
+    def readS16LE(self, register):
+        return self.readS16(register, little_endian=True)
+
+    def readS16BE(self, register):
+        return self.readS16(register, little_endian=False)
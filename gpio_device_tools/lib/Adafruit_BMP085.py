@@ -20,6 +20,7 @@
 # THE SOFTWARE.
 from __future__ import division
 import logging
+import struct
 import time
 
 
@@ -48,13 +49,19 @@ BMP085_CONTROL           = 0xF4
 BMP085_TEMPDATA          = 0xF6
 BMP085_PRESSUREDATA      = 0xF6
 
+# Calibration coefficients in register order and their layout
+BMP085_CAL_NAMES         = ('AC1', 'AC2', 'AC3', 'AC4', 'AC5', 'AC6', 'B1', 'B2', 'MB', 'MC', 'MD')
+BMP085_CAL_FORMAT        = '>hhhHHHhhhhh'
+BMP085_CAL_SIZE          = 22
+
 # Commands
 BMP085_READTEMPCMD       = 0x2E
 BMP085_READPRESSURECMD   = 0x34
 
 
 class BMP085(object):
-    def __init__(self, mode=BMP085_STANDARD, address=BMP085_I2CADDR, busnum=None, i2c=None, **kwargs):
+    def __init__(self, mode=BMP085_STANDARD, address=BMP085_I2CADDR, busnum=None, i2c=None,
+                 load_calibration=True, **kwargs):
         self._logger = logging.getLogger('Adafruit_BMP.BMP085')
         # Check that mode is valid.
         if mode not in [BMP085_ULTRALOWPOWER, BMP085_STANDARD, BMP085_HIGHRES, BMP085_ULTRAHIGHRES]:
@@ -66,20 +73,28 @@ class BMP085(object):
             i2c = I2C
         self._device = i2c.get_i2c_device(address, busnum, **kwargs)
         # Load calibration values.
-        self._load_calibration()
+        if load_calibration:
+            self._load_calibration()
+
+    def read_calibration(self):
+        """Reads all calibration coefficients in one block read."""
+        data = self._device.readList(BMP085_CAL_AC1, BMP085_CAL_SIZE)
+        return struct.unpack(BMP085_CAL_FORMAT, bytes(bytearray(data)))
+
+    def get_calibration(self):
+        """Returns the calibration coefficients in register order."""
+        return tuple(getattr(self, 'cal_' + name) for name in BMP085_CAL_NAMES)
+
+    def set_calibration(self, values):
+        """Sets the calibration coefficients in register order."""
+        for name, value in zip(BMP085_CAL_NAMES, values):
+            setattr(self, 'cal_' + name, value)
 
     def _load_calibration(self):
-        self.cal_AC1 = self._device.readS16BE(BMP085_CAL_AC1)   # INT16
-        self.cal_AC2 = self._device.readS16BE(BMP085_CAL_AC2)   # INT16
-        self.cal_AC3 = self._device.readS16BE(BMP085_CAL_AC3)   # INT16
-        self.cal_AC4 = self._device.readU16BE(BMP085_CAL_AC4)   # UINT16
-        self.cal_AC5 = self._device.readU16BE(BMP085_CAL_AC5)   # UINT16
-        self.cal_AC6 = self._device.readU16BE(BMP085_CAL_AC6)   # UINT16
-        self.cal_B1 = self._device.readS16BE(BMP085_CAL_B1)     # INT16
-        self.cal_B2 = self._device.readS16BE(BMP085_CAL_B2)     # INT16
-        self.cal_MB = self._device.readS16BE(BMP085_CAL_MB)     # INT16
-        self.cal_MC = self._device.readS16BE(BMP085_CAL_MC)     # INT16
-        self.cal_MD = self._device.readS16BE(BMP085_CAL_MD)     # INT16
+        self.set_calibration(self.read_calibration())
+        self._log_calibration()
+
+    def _log_calibration(self):
         self._logger.debug('AC1 = {0:6d}'.format(self.cal_AC1))
         self._logger.debug('AC2 = {0:6d}'.format(self.cal_AC2))
         self._logger.debug('AC3 = {0:6d}'.format(self.cal_AC3))
@@ -126,40 +141,22 @@ class BMP085(object):
             time.sleep(0.026)
         else:
             time.sleep(0.008)
-        msb = self._device.readU8(BMP085_PRESSUREDATA)
-        lsb = self._device.readU8(BMP085_PRESSUREDATA+1)
-        xlsb = self._device.readU8(BMP085_PRESSUREDATA+2)
+        # MSB, LSB and XLSB in one block read
+        msb, lsb, xlsb = self._device.readList(BMP085_PRESSUREDATA, 3)
         raw = ((msb << 16) + (lsb << 8) + xlsb) >> (8 - self._mode)
         self._logger.debug('Raw pressure 0x{0:04X} ({1})'.format(raw & 0xFFFF, raw))
         return raw
 
-    def read_temperature(self):
-        """Gets the compensated temperature in degrees celsius."""
-        UT = self.read_raw_temp()
-        # Datasheet value for debugging:
-        #UT = 27898
+    def _compensate_temp(self, UT):
+        """Returns the true temperature coefficient B5 of a raw temperature."""
         # Calculations below are taken straight from section 3.5 of the datasheet.
         X1 = ((UT - self.cal_AC6) * self.cal_AC5) >> 15
         X2 = (self.cal_MC << 11) // (X1 + self.cal_MD)
-        B5 = X1 + X2
-        temp = ((B5 + 8) >> 4) / 10.0
-        self._logger.debug('Calibrated temperature {0} C'.format(temp))
-        return temp
+        return X1 + X2
 
-    def read_pressure(self):
-        """Gets the compensated pressure in Pascals."""
-        UT = self.read_raw_temp()
-        UP = self.read_raw_pressure()
-        # Datasheet values for debugging:
-        #UT = 27898
-        #UP = 23843
+    def _compensate_pressure(self, B5, UP):
+        """Returns the pressure in Pascals of a raw pressure."""
         # Calculations below are taken straight from section 3.5 of the datasheet.
-        # Calculate true temperature coefficient B5.
-        X1 = ((UT - self.cal_AC6) * self.cal_AC5) >> 15
-        X2 = (self.cal_MC << 11) // (X1 + self.cal_MD)
-        B5 = X1 + X2
-        self._logger.debug('B5 = {0}'.format(B5))
-        # Pressure Calculations
         B6 = B5 - 4000
         self._logger.debug('B6 = {0}'.format(B6))
         X1 = (self.cal_B2 * (B6 * B6) >> 12) >> 11
@@ -185,14 +182,52 @@ class BMP085(object):
         self._logger.debug('Pressure {0} Pa'.format(p))
         return p
 
+    @staticmethod
+    def altitude(pressure, sealevel_pa=101325.0):
+        """Calculates the altitude in meters of a pressure in Pascals."""
+        # Calculation taken straight from section 3.6 of the datasheet.
+        return 44330.0 * (1.0 - pow(float(pressure) / sealevel_pa, (1.0/5.255)))
+
+    def read_temperature(self):
+        """Gets the compensated temperature in degrees celsius."""
+        UT = self.read_raw_temp()
+        # Datasheet value for debugging:
+        #UT = 27898
+        B5 = self._compensate_temp(UT)
+        temp = ((B5 + 8) >> 4) / 10.0
+        self._logger.debug('Calibrated temperature {0} C'.format(temp))
+        return temp
+
+    def read_pressure(self):
+        """Gets the compensated pressure in Pascals."""
+        UT = self.read_raw_temp()
+        UP = self.read_raw_pressure()
+        # Datasheet values for debugging:
+        #UT = 27898
+        #UP = 23843
+        B5 = self._compensate_temp(UT)
+        self._logger.debug('B5 = {0}'.format(B5))
+        return self._compensate_pressure(B5, UP)
+
     def read_altitude(self, sealevel_pa=101325.0):
         """Calculates the altitude in meters."""
-        # Calculation taken straight from section 3.6 of the datasheet.
-        pressure = float(self.read_pressure())
-        altitude = 44330.0 * (1.0 - pow(pressure / sealevel_pa, (1.0/5.255)))
+        altitude = self.altitude(self.read_pressure(), sealevel_pa)
         self._logger.debug('Altitude {0} m'.format(altitude))
         return altitude
 
+    def read_all(self, sealevel_pa=101325.0):
+        """Gets temperature in degrees celsius, pressure in Pascals and
+        altitude in meters from a single temperature and pressure conversion."""
+        UT = self.read_raw_temp()
+        UP = self.read_raw_pressure()
+        B5 = self._compensate_temp(UT)
+        temp = ((B5 + 8) >> 4) / 10.0
+        pressure = self._compensate_pressure(B5, UP)
+        altitude = self.altitude(pressure, sealevel_pa)
+        self._logger.debug('Temperature {0} C, pressure {1} Pa, altitude {2} m'.format(
+            temp, pressure, altitude))
+        return temp, pressure, altitude
+
     def read_sealevel_pressure(self, altitude_m=0.0):
         """Calculates the pressure at sealevel when given a known altitude in
         meters. Returns a value in Pascals."""
@@ -1,18 +1,27 @@
 #!/usr/bin/env python
+import ConfigParser
 import atexit
 import logging
 import os
+import re
 import sys
+import threading
 from optparse import OptionParser
 
 import paho.mqtt.client as mqtt
 import time
 
 import config
-from write import gpio_write
+from filewatch import FileWatcher
+from pinwriter import PinWriter
+from topicindex import TopicIndex
+from write import get_pin_manager
 
 MQTT_GPIO_BINDING_CFG = 'MQTT_GPIO_BINDING_CFG'
 
+# topic levels which may become part of a pin name
+PIN_SEGMENT = re.compile(r'[A-Za-z0-9_-]+\Z')
+
 USAGE = '\n' \
         '  mqttgpiobind --topic <topic name> [--invert] --pin <ID> --mqtt-config <MQTT config file>\n' \
         '  mqttgpiobind --config <binding and MQTT config file>\n' \
@@ -49,6 +58,8 @@ def main(argv):
         cfg_file=options.cfg_file,
         mqtt_cfg_file=options.mqtt_cfg_file)
 
+    # registered first, so the pins are released after the last write
+    get_pin_manager()
     atexit.register(cleanup, mqtt_bind)
     mqtt_bind.run()
 
@@ -56,6 +67,7 @@ def main(argv):
 def cleanup(mqtt_daemon):
     logging.debug('Starting cleanup...')
     mqtt_daemon.disconnect()
+    mqtt_daemon.stop_writer()
     logging.info('Cleanup finished')
 
 
@@ -134,22 +146,95 @@ class MqttGpioBindingService():
 
         self.__client = None
         self.__connected = False
+        self.__writer = PinWriter()
+        self.__watcher = None
+        self.__lock = threading.RLock()
+        self.__index = TopicIndex()
+        # message ids of unacknowledged SUBSCRIBE packets
+        self.__pending_subscriptions = set()
+        # time of the connection attempt, until all topics are subscribed
+        self.__connect_time = None
 
         self.reload_bindings()
 
     def reload_bindings(self):
         if self.__cfg_file is None:
+            self.__index = TopicIndex(self.__bindings)
             self.log_bindings()
             return
 
         cfg = config.MqttBindingConfigReader(self.__cfg_file)
-        self.__cfg_file_time = time.ctime(
-            os.path.getmtime(self.__cfg_file))
+        index = TopicIndex(cfg.bindings)
 
-        self.__bindings = []
-        self.__bindings.extend(cfg.bindings)
+        with self.__lock:
+            self.__cfg_file_time = time.ctime(
+                os.path.getmtime(self.__cfg_file))
+
+            old_subscriptions = self.subscriptions()
+
+            self.__bindings = []
+            self.__bindings.extend(cfg.bindings)
+            self.__index = index
+
+            self.log_bindings()
+
+            if self.__client is not None and self.__connected:
+                self.update_subscriptions(old_subscriptions, self.subscriptions())
+
+    def subscriptions(self):
+        """ Returns the topics of all bindings and the highest QoS of
+            their bindings.
+        """
+        result = {}
+
+        for binding in self.__bindings:
+            qos = binding.qos if binding.qos is not None else self.__mqtt_cfg.qos
+            result[binding.topic] = max(qos, result.get(binding.topic, 0))
+
+        return result
+
+    def update_subscriptions(self, old, new):
+        removed = sorted(topic for topic in old if topic not in new)
+        changed = dict((topic, qos) for topic, qos in new.items() if old.get(topic) != qos)
+
+        if removed:
+            self.__client.unsubscribe(removed)
+            logging.info('Unsubscribed from topics: %s', ', '.join(removed))
+
+        self.subscribe(changed)
+
+    def subscribe(self, subscriptions):
+        """ Subscribes to the topics in as few SUBSCRIBE packets as the
+            batch size allows. Returns the number of packets sent.
+        """
+        items = sorted(subscriptions.items())
+        size = self.__mqtt_cfg.subscribe_batch_size
+        packets = 0
+
+        for i in range(0, len(items), size):
+            batch = items[i:i + size]
+            rc, mid = self.__client.subscribe(batch)
+            if rc != mqtt.MQTT_ERR_SUCCESS:
+                logging.error('Subscribing to %d topics failed with result code: %d', len(batch), rc)
+                continue
+
+            self.__pending_subscriptions.add(mid)
+            packets += 1
+            for topic, qos in batch:
+                logging.debug('Subscribing to topic: %s (QoS %d)', topic, qos)
 
-        self.log_bindings()
+        if items:
+            logging.info('Subscribing to %d topics in %d packets', len(items), packets)
+
+        return packets
+
+    def on_config_changed(self):
+        logging.info('Configuration file %s changed, reloading bindings', self.__cfg_file)
+
+        try:
+            self.reload_bindings()
+        except (config.ConfigurationError, ConfigParser.Error, ValueError) as e:
+            logging.error('Keeping the current bindings, the changed configuration is invalid: %s', e)
 
     def log_bindings(self):
         logging.info('Initialize Bindings:')
@@ -161,33 +246,74 @@ class MqttGpioBindingService():
             else:
                 logging.info('Topic \'%s\' -> GPIO Pin \'%s\'',
                              binding.topic, binding.pin)
+            if binding.min_interval:
+                logging.info('  GPIO Pin \'%s\' is written at most every %s s',
+                             binding.pin, binding.min_interval)
 
     def get_actions(self, topic):
-        for binding in self.__bindings:
-            if topic == binding.topic:
-                return binding.pin, binding.invert
-
-        return None, None
+        """ Returns a list of (pin, invert, min_interval) of all bindings of topic. The
+            pin of a wildcard binding may refer to the topic levels matched
+            by its wildcards, e.g. 'XIO-P{0}' for 'relay/+'. Only levels of
+            letters, digits, '_' and '-' are used for a pin.
+        """
+        actions = []
+
+        for binding, segments in self.__index.match(topic):
+            pin = binding.pin
+            if segments:
+                if not all(PIN_SEGMENT.match(segment) for segment in segments):
+                    logging.warning('Topic \'%s\' is not allowed to select a pin of \'%s\'',
+                                    topic, binding.pin)
+                    continue
+                try:
+                    pin = pin.format(*segments)
+                except (IndexError, KeyError, ValueError):
+                    logging.warning('Unable to derive pin \'%s\' from topic \'%s\'',
+                                    binding.pin, topic)
+                    continue
+            actions.append((pin, binding.invert, binding.min_interval))
+
+        return actions
 
     def on_connect(self, client, userdata, flags, rc):
-        self.__connected = True
         logging.info('Connected with result code: %d', rc)
 
-        for binding in self.__bindings:
-            self.__client.subscribe(binding.topic)
-            logging.info('Subscribed to topic: %s',
-                         binding.topic)
+        with self.__lock:
+            self.__connected = True
+            self.__pending_subscriptions.clear()
+            self.subscribe(self.subscriptions())
+            self.__check_ready()
+
+    def on_subscribe(self, client, userdata, mid, granted_qos):
+        if 0x80 in granted_qos:
+            logging.warning('The broker rejected %d topics of SUBSCRIBE packet %d',
+                            list(granted_qos).count(0x80), mid)
+
+        with self.__lock:
+            self.__pending_subscriptions.discard(mid)
+            self.__check_ready()
+
+    def __check_ready(self):
+        if self.__pending_subscriptions or self.__connect_time is None:
+            return
+
+        logging.info('Ready %.3f s after connecting, subscribed to %d topics',
+                     time.time() - self.__connect_time, len(self.subscriptions()))
+        self.__connect_time = None
 
     def on_disconnect(self, mqttc, userdata, rc):
-        self.__connected = False
+        with self.__lock:
+            self.__connected = False
+            # the client reconnects on its own
+            self.__connect_time = time.time()
         logging.info('Disconnected from MQTT server')
 
     def on_message(self, client, userdata, msg):
         if msg.topic is None or msg.payload is None:
             return
 
-        pin, invert = self.get_actions(msg.topic)
-        if pin is None:
+        actions = self.get_actions(msg.topic)
+        if not actions:
             return
 
         message = msg.payload.strip()
@@ -196,18 +322,22 @@ class MqttGpioBindingService():
                       msg.topic, message)
 
         if config.is_boolean_value(message):
-            value = self.str_2_one_zero(message, invert)
+            for pin, invert, min_interval in actions:
+                value = self.str_2_one_zero(message, invert)
 
-            logging.info('Writing value %s to pin \'%s\'',
-                         value, pin)
+                logging.info('Writing value %s to pin \'%s\'',
+                             value, pin)
 
-            gpio_write(pin, value)
+                self.__writer.put(pin, value, min_interval)
+
+            logging.debug('Pending GPIO writes: %d', self.__writer.depth())
 
     def run(self):
         self.__client = mqtt.Client()
 
         logging.info('Connecting to MQTT server %s',
                      self.__mqtt_cfg.mqtt_host)
+        self.__connect_time = time.time()
         self.__client.connect(
             self.__mqtt_cfg.mqtt_host,
             self.__mqtt_cfg.port,
@@ -216,14 +346,27 @@ class MqttGpioBindingService():
         self.__client.on_connect = self.on_connect
         self.__client.on_disconnect = self.on_disconnect
         self.__client.on_message = self.on_message
+        self.__client.on_subscribe = self.on_subscribe
+
+        if self.__cfg_file is not None:
+            self.__watcher = FileWatcher(self.__cfg_file, self.on_config_changed)
+            self.__watcher.start()
 
         self.__client.loop_forever()
 
     def disconnect(self):
+        if self.__watcher is not None:
+            self.__watcher.stop()
+
         if self.__client is not None and self.__connected:
             logging.info('Disconnecting from MQTT server...')
             self.__client.disconnect()
 
+    def stop_writer(self):
+        self.__writer.stop()
+        logging.info('GPIO writes: %(written)d written, %(superseded)d superseded, '
+                     '%(failed)d failed, max. %(max_depth)d pending', self.__writer.stats())
+
     @staticmethod
     def str_2_one_zero(value, invert=False):
         result = config.get_boolean_value(value)
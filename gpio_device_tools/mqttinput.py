@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+import atexit
+import logging
+import os
+import sys
+import time
+from optparse import OptionParser
+
+import config
+import mqttpublisher
+from gpioinput import EdgeMonitor, SysfsGPIO, DEBOUNCE, EDGES
+
+USAGE = '\n' \
+        '  gpiomqttpublish --topic <topic name> [--invert] --pin <GPIO number> [--debounce <ms>] [--edge <edge>] --mqtt-config <MQTT config file>\n' \
+        '  gpiomqttpublish --config <binding and MQTT config file>\n' \
+        '  gpiomqttpublish -h | --help'
+
+
+def main(argv):
+    options = parse_options(argv)
+
+    logging.info('Starting GpioMqttPublishService with PID \'%s\'', os.getpid())
+
+    option_binding = None
+    if options.mqtt_topic is not None:
+        option_binding = config.create_input_binding_cfg(
+            options.mqtt_topic,
+            options.gpio_pin,
+            options.invert,
+            edge=options.edge,
+            debounce=options.debounce / 1000.0 if options.debounce is not None else None)
+
+    service = GpioMqttPublishService(
+        option_binding=option_binding,
+        cfg_file=options.cfg_file,
+        mqtt_cfg_file=options.mqtt_cfg_file)
+
+    atexit.register(cleanup, service)
+    service.run()
+
+
+def cleanup(service):
+    logging.debug('Starting cleanup...')
+    service.stop()
+    logging.info('Cleanup finished')
+
+
+def parse_options(argv):
+    parser = OptionParser(usage=USAGE)
+    parser.set_defaults(mqtt_topic=None)
+    parser.set_defaults(mqtt_cfg_file=None)
+    parser.set_defaults(cfg_file=None)
+    parser.set_defaults(log_file=None)
+    parser.set_defaults(debounce=None)
+    parser.set_defaults(edge='both')
+    parser.add_option('-p', '--pin',
+                      dest='gpio_pin', metavar='<GPIO number>',
+                      help='sysfs number of the GPIO input pin to publish')
+    parser.add_option('-i', '--invert',
+                      action='store_const', dest='invert', const=True, default=False,
+                      help='inverts the value of the GPIO pin before it is published')
+    parser.add_option('-t', '--topic',
+                      dest='mqtt_topic', metavar='<MQTT topic>',
+                      help='the MQTT topic to publish the value of the GPIO pin to')
+    parser.add_option('-d', '--debounce',
+                      dest='debounce', type='float', metavar='<ms>',
+                      help='milliseconds a value has to be stable before it is published, defaults to {:g}'.format(
+                          DEBOUNCE * 1000))
+    parser.add_option('-e', '--edge',
+                      dest='edge', type='choice', choices=list(EDGES), metavar='<edge>',
+                      help='publishes on both, rising or falling edges, defaults to both')
+    parser.add_option('-m', '--mqtt-config',
+                      dest='mqtt_cfg_file', metavar='<MQTT config file>',
+                      help='the MQTT server configuration in file')
+    parser.add_option('-g', '--config',
+                      dest='cfg_file', metavar='<config file>',
+                      help='the binding and MQTT server configuration in file')
+    parser.add_option('-l', '--log-file',
+                      dest='log_file', metavar='<logfile>',
+                      help='logs to the given file')
+    parser.add_option('-v', '--verbose',
+                      action='store_true', dest='verbose', default=False,
+                      help='enables detailed logging')
+    (options, args) = parser.parse_args()
+
+    if len(args) > 0:
+        parser.error('Unsupported arguments: ' + ', '.join(args))
+
+    if options.mqtt_topic is None and options.cfg_file is None:
+        parser.error('The option --topic is not defined')
+    if options.gpio_pin is None and options.cfg_file is None:
+        parser.error('The option --pin is not defined')
+    if options.gpio_pin is not None and not options.gpio_pin.isdigit():
+        parser.error('The option --pin has to be a GPIO number')
+    if options.mqtt_cfg_file is None and options.cfg_file is None:
+        parser.error('The MQTT server configuration file is missing')
+    if options.mqtt_topic is not None and options.cfg_file is not None:
+        parser.error('The binding may either be defined by command line arguments or in a config file')
+
+    init_logging(options)
+
+    logging.debug('Command line options: %s', options)
+
+    return options
+
+
+def init_logging(options):
+    if options.log_file is not None:
+        logging.getLogger().addHandler(logging.FileHandler(options.log_file))
+        logging.getLogger().setLevel(logging.INFO)
+    if options.verbose:
+        logging.getLogger().addHandler(logging.StreamHandler())
+        logging.getLogger().setLevel(logging.DEBUG)
+
+
+class GpioMqttPublishService():
+    """ Publishes the values of GPIO input pins to MQTT topics.
+
+        The pins are watched for edges by an EdgeMonitor, a single thread
+        for all pins. Every debounced change is published as '1' or '0'
+        through the shared MqttPublisher.
+    """
+
+    def __init__(self, option_binding=None, mqtt_cfg_file=None, cfg_file=None, gpio=None, publisher=None):
+        self.__bindings = {}
+
+        if option_binding is not None:
+            bindings = [option_binding]
+            self.__mqtt_cfg = config.MqttServerConfigReader(cfg_file=mqtt_cfg_file)
+        else:
+            bindings = config.MqttBindingConfigReader(cfg_file=cfg_file).input_bindings
+            self.__mqtt_cfg = config.MqttServerConfigReader(cfg_file=cfg_file)
+
+        if not bindings:
+            raise config.ConfigurationError('No input bindings defined')
+
+        self.__gpio = gpio if gpio is not None else SysfsGPIO()
+        self.__publisher = publisher
+        self.__monitor = EdgeMonitor(self.__gpio, self.on_change)
+
+        logging.info('Initialize Bindings:')
+        for binding in bindings:
+            debounce = binding.debounce if binding.debounce is not None else DEBOUNCE
+            self.__bindings[binding.pin] = binding
+            self.__monitor.add(binding.pin, debounce, binding.edge)
+
+            logging.info('GPIO Pin \'%s\' (%s edges, %g ms debounce) -> %sTopic \'%s\'',
+                         binding.pin, binding.edge, debounce * 1000,
+                         'invert value -> ' if binding.invert else '', binding.topic)
+
+    def run(self):
+        self.start()
+
+        while True:
+            time.sleep(60)
+
+    def start(self):
+        """ Starts watching the pins without blocking """
+        if self.__publisher is None:
+            self.__publisher = mqttpublisher.get_publisher(self.__mqtt_cfg)
+        self.__monitor.start()
+
+    def stop(self):
+        self.__monitor.stop()
+        self.__gpio.cleanup()
+        logging.info('GPIO inputs: %d edges, %d changes published',
+                     self.__monitor.edges, self.__monitor.changes)
+
+    def on_change(self, pin, level, edge_time):
+        binding = self.__bindings[pin]
+        value = '0' if bool(level) == bool(binding.invert) else '1'
+        qos = binding.qos if binding.qos is not None else self.__mqtt_cfg.qos
+
+        self.__publisher.publish([{'topic': binding.topic,
+                                   'payload': value,
+                                   'qos': qos,
+                                   'retain': self.__mqtt_cfg.retain}])
+
+        if edge_time is None:
+            logging.info('Initial value %s of pin \'%s\' published to topic \'%s\'',
+                         value, pin, binding.topic)
+        else:
+            logging.debug('Value %s of pin \'%s\' published to topic \'%s\' %.1f ms after the edge',
+                          value, pin, binding.topic, (time.time() - edge_time) * 1000)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,243 @@
+import Queue
+import atexit
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from spool import MessageSpool
+
+# number of spooled messages replayed per batch
+SPOOL_BATCH_SIZE = 50
+
+_publishers = {}
+_publishers_lock = threading.Lock()
+
+
+def get_publisher(mqtt_cfg, verbose=False):
+    """ Returns the publisher shared by all channels of this process which
+        publish to the broker defined in mqtt_cfg.
+    """
+    key = (mqtt_cfg.mqtt_host, int(mqtt_cfg.port), mqtt_cfg.client_id)
+
+    with _publishers_lock:
+        publisher = _publishers.get(key)
+        if publisher is None:
+            if not _publishers:
+                atexit.register(close_publishers)
+
+            publisher = MqttPublisher(mqtt_cfg, verbose)
+            _publishers[key] = publisher
+
+    return publisher
+
+
+def close_publishers(timeout=10.0):
+    with _publishers_lock:
+        publishers = _publishers.values()
+        _publishers.clear()
+
+    deadline = time.time() + timeout
+    for publisher in publishers:
+        publisher.close(max(0.0, deadline - time.time()))
+
+
+class MqttPublisher():
+    """ Keeps a single connection to a MQTT broker.
+
+        Messages are put into a bounded queue and published by a sender thread
+        as soon as the connection is up. The paho network loop runs in the
+        background and reconnects with an exponential backoff.
+
+        If a spool directory is configured, messages that can't be published
+        because the broker is unreachable are stored on disk and replayed in
+        order at the configured rate once the connection is back. While the
+        spool has a backlog, new messages are appended to it as well to keep
+        their order.
+    """
+
+    def __init__(self, mqtt_cfg, verbose=False):
+        self.__mqtt_cfg = mqtt_cfg
+        self.__verbose = verbose
+
+        self.__queue = Queue.Queue(maxsize=mqtt_cfg.queue_size)
+        self.__connected = threading.Event()
+        self.__closed = threading.Event()
+        self.__in_flight = []
+        self.__in_flight_lock = threading.Lock()
+        self.dropped = 0
+
+        self.__spool = None
+        if mqtt_cfg.spool_dir:
+            self.__spool = MessageSpool(
+                mqtt_cfg.spool_dir,
+                max_size=mqtt_cfg.spool_max_size,
+                sync_count=mqtt_cfg.spool_sync_count,
+                sync_interval=mqtt_cfg.spool_sync_interval,
+                verbose=verbose)
+
+        self.__client = mqtt.Client(client_id=mqtt_cfg.client_id)
+        self.__client.on_connect = self.on_connect
+        self.__client.on_disconnect = self.on_disconnect
+        self.__client.reconnect_delay_set(
+            mqtt_cfg.reconnect_min_delay,
+            mqtt_cfg.reconnect_max_delay)
+        self.__client.connect_async(
+            mqtt_cfg.mqtt_host,
+            int(mqtt_cfg.port),
+            mqtt_cfg.keepalive)
+        self.__client.loop_start()
+
+        self.__sender = threading.Thread(target=self.__send_loop)
+        self.__sender.daemon = True
+        self.__sender.start()
+
+        if self.__spool is not None:
+            self.__drainer = threading.Thread(target=self.__drain_loop)
+            self.__drainer.daemon = True
+            self.__drainer.start()
+
+    def publish(self, msgs):
+        """ Enqueues a list of messages, each a dict with the keys topic,
+            payload, qos and retain. The oldest queued messages are dropped
+            if the queue is full.
+        """
+        while True:
+            try:
+                self.__queue.put_nowait(msgs)
+                return
+            except Queue.Full:
+                try:
+                    self.__queue.get_nowait()
+                    self.__queue.task_done()
+                    self.dropped += 1
+                    if self.__verbose:
+                        print 'DBG: MQTT queue full, dropped oldest messages'
+                except Queue.Empty:
+                    pass
+
+    def queue_depth(self):
+        return self.__queue.qsize()
+
+    def in_flight(self):
+        """ Returns the number of published messages with qos > 0 which are
+            not acknowledged yet
+        """
+        with self.__in_flight_lock:
+            return len(self.__in_flight)
+
+    def is_connected(self):
+        return self.__connected.is_set()
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == mqtt.CONNACK_ACCEPTED:
+            if self.__verbose:
+                print 'DBG: Connected to MQTT server {}'.format(self.__mqtt_cfg.mqtt_host)
+            self.__connected.set()
+        elif self.__verbose:
+            print 'DBG: Connection to MQTT server refused: {}'.format(
+                mqtt.connack_string(rc))
+
+    def on_disconnect(self, client, userdata, rc):
+        self.__connected.clear()
+        if self.__verbose:
+            print 'DBG: Disconnected from MQTT server {}'.format(self.__mqtt_cfg.mqtt_host)
+
+    def __send_loop(self):
+        while not self.__closed.is_set():
+            try:
+                msgs = self.__queue.get(timeout=1.0)
+            except Queue.Empty:
+                continue
+
+            try:
+                remaining = list(msgs)
+                while remaining and not self.__closed.is_set():
+                    if self.__spool is not None and \
+                            (self.__spool.has_backlog() or not self.__connected.wait(1.0)):
+                        self.__spool.append(remaining)
+                        break
+
+                    if not self.__connected.wait(1.0):
+                        continue
+
+                    if self.__publish(remaining[0]) != mqtt.MQTT_ERR_NO_CONN:
+                        remaining.pop(0)
+            finally:
+                self.__queue.task_done()
+
+    def __drain_loop(self):
+        rate = self.__mqtt_cfg.spool_rate
+        while not self.__closed.is_set():
+            if not self.__connected.wait(1.0) or not self.__spool.has_backlog():
+                self.__closed.wait(0.1)
+                continue
+
+            records = self.__spool.read(SPOOL_BATCH_SIZE)
+            if not records:
+                self.__closed.wait(0.1)
+                continue
+
+            sent = None
+            for msg, position in records:
+                if self.__closed.is_set():
+                    break
+                start = time.time()
+                if self.__publish(msg) == mqtt.MQTT_ERR_NO_CONN:
+                    break
+                sent = position
+                if rate > 0:
+                    self.__closed.wait(max(0.0, 1.0 / rate - (time.time() - start)))
+
+            if sent is not None:
+                self.__spool.commit(sent)
+
+    def __publish(self, msg):
+        info = self.__client.publish(
+            msg['topic'], msg['payload'], msg['qos'], msg['retain'])
+        if info.rc == mqtt.MQTT_ERR_SUCCESS:
+            if msg['qos'] > 0:
+                with self.__in_flight_lock:
+                    self.__prune_in_flight()
+                    self.__in_flight.append(info)
+        elif info.rc == mqtt.MQTT_ERR_NO_CONN:
+            # connection lost, wait for the network loop to reconnect
+            self.__connected.clear()
+        elif self.__verbose:
+            print 'DBG: Publishing to topic \'{}\' failed: {}'.format(
+                msg['topic'], mqtt.error_string(info.rc))
+        return info.rc
+
+    def __prune_in_flight(self):
+        self.__in_flight = [info for info in self.__in_flight
+                            if not info.is_published()]
+
+    def __is_flushed(self):
+        with self.__in_flight_lock:
+            self.__prune_in_flight()
+            if self.__queue.unfinished_tasks > 0 or self.__in_flight:
+                return False
+
+        # a spooled backlog is only waited for while it can be replayed
+        return self.__spool is None or not self.__connected.is_set() \
+            or not self.__spool.has_backlog()
+
+    def close(self, timeout=10.0):
+        """ Waits up to timeout seconds until all queued messages are
+            delivered and disconnects from the broker.
+        """
+        deadline = time.time() + timeout
+        while not self.__is_flushed() and time.time() < deadline:
+            time.sleep(0.05)
+
+        if self.__verbose and not self.__is_flushed():
+            print 'DBG: Closing MQTT connection with {} undelivered message(s)'.format(
+                self.__queue.unfinished_tasks)
+
+        self.__closed.set()
+        self.__client.disconnect()
+        self.__client.loop_stop()
+
+        if self.__spool is not None:
+            self.__sender.join(2.0)
+            self.__spool.close()
@@ -1,9 +1,22 @@
 import ConfigParser
+import hashlib
 import os
+import tempfile
+import threading
 
 import config
+import serializer
 from abc import ABCMeta, abstractmethod
 
+# serializes console and file output of sensors read in parallel
+_output_lock = threading.Lock()
+
+# hashes of the last data written by FileChannels, by absolute file name
+_file_digests = {}
+
+_umask = os.umask(0)
+os.umask(_umask)
+
 
 class OutputChannel:
     __metaclass__ = ABCMeta
@@ -15,6 +28,17 @@ class OutputChannel:
     def output(self, sensor):
         pass
 
+    def output_batch(self, sensors):
+        for sensor in sensors:
+            self.output(sensor)
+
+    def output_data_types(self, sensor, data_types):
+        """ Outputs a reading of which only the given data types are of
+            interest. Channels which can't output single values output the
+            whole reading.
+        """
+        self.output(sensor)
+
     def data(self, sensor, format):
         if format == config.XML_FORMAT:
             return sensor.xml_format()
@@ -23,6 +47,19 @@ class OutputChannel:
         else:
             return sensor.text_format()
 
+    @staticmethod
+    def write_data(sensors, format, out):
+        """ Streams the data of a single sensor or a batch of sensors to out """
+        if format not in (config.XML_FORMAT, config.JSON_FORMAT):
+            format = config.TEXT_FORMAT
+
+        if isinstance(sensors, list):
+            serializer.get_serializer(format).write_batch(sensors, out)
+        elif format == config.TEXT_FORMAT:
+            out.write(sensors.text_format())
+        else:
+            serializer.get_serializer(format).write(sensors, out)
+
     @staticmethod
     def make_dir(fn):
         if not os.path.dirname(fn):
@@ -38,59 +75,109 @@ class ConsoleChannel(OutputChannel):
         self.__out_format = out_format
 
     def output(self, sensor):
-        print self.data(sensor, self.__out_format)
+        data = self.data(sensor, self.__out_format)
+        with _output_lock:
+            print data
 
 
 class FileChannel(OutputChannel):
+    """ Replaces the output file atomically with every reading.
 
-    def __init__(self, out_format=config.JSON_FORMAT, fn=None, verbose=False):
+        The data is written to a temporary file in the same directory which
+        is then renamed to the output file, so readers never see a partially
+        written file. With skip_unchanged the file is only written if the
+        sensor values differ from the last write, compared by a hash kept in
+        memory. The time of the reading is not part of the comparison.
+    """
+
+    def __init__(self, out_format=config.JSON_FORMAT, fn=None, skip_unchanged=False, verbose=False):
         super(FileChannel, self).__init__()
         self.__out_format = out_format
         self.__fn = fn
+        self.__skip_unchanged = skip_unchanged
         self.__verbose = verbose
 
     def output(self, sensor):
         if self.__fn is None:
-            self.__fn = sensor.id()
+            self.__fn = sensor.id
+
+        self.__write(sensor)
+
+    def output_batch(self, sensors):
+        if self.__fn is None:
+            self.__fn = sensors[0].id
+
+        # a single document with the readings of all sensors
+        self.__write(sensors)
+
+    @staticmethod
+    def digest(sensors, format):
+        if not isinstance(sensors, list):
+            sensors = [sensors]
+
+        h = hashlib.sha1(format)
+        for sensor in sensors:
+            h.update(repr(sorted((key, value) for key, value in sensor.dictionary().items()
+                                 if key != 'time')))
+        return h.digest()
+
+    def __write(self, sensors):
+        fn = os.path.abspath(self.__fn)
+
+        digest = None
+        if self.__skip_unchanged:
+            digest = self.digest(sensors, self.__out_format)
+            if _file_digests.get(fn) == digest:
+                if self.__verbose:
+                    print "DBG: Unchanged, skipping output to file: {}".format(
+                        self.__fn)
+                return
 
         if self.__verbose:
             print "DBG: Output to file: {}".format(
                     self.__fn)
 
-        self.make_dir(self.__fn)
+        with _output_lock:
+            self.make_dir(fn)
 
-        fd = open(self.__fn, 'w')
-        fd.write(self.data(sensor, self.__out_format))
-        fd.close()
+            fd, tmp_fn = tempfile.mkstemp(
+                prefix='.{}.'.format(os.path.basename(fn)),
+                dir=os.path.dirname(fn))
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    self.write_data(sensors, self.__out_format, f)
+
+                # mkstemp creates the file readable by the owner only
+                if os.path.exists(fn):
+                    os.chmod(tmp_fn, os.stat(fn).st_mode & 0777)
+                else:
+                    os.chmod(tmp_fn, 0666 & ~_umask)
+
+                os.rename(tmp_fn, fn)
+            except:
+                os.remove(tmp_fn)
+                raise
+
+            if digest is not None:
+                _file_digests[fn] = digest
 
 
 class CSVFileChannel(OutputChannel):
 
-    def __init__(self, fn=None, verbose=False):
+    def __init__(self, fn=None, verbose=False, **csv_options):
         super(CSVFileChannel, self).__init__()
         self.__fn = fn
         self.__verbose = verbose
 
-    def output(self, sensor):
-        if os.path.isfile(self.__fn):
-            if self.__verbose:
-                print "DBG: Append to existing CSV file: {}".format(
-                    self.__fn)
-
-            fd = open(self.__fn, 'a')
-            fd.write(sensor.csv_line())
-            fd.close()
-        else:
-            if self.__verbose:
-                print "DBG: Creating new CSV file: {}".format(
-                    self.__fn)
+        import csvwriter
+        self.__writer = csvwriter.get_writer(fn, verbose=verbose, **csv_options)
 
-            self.make_dir(self.__fn)
+    def output(self, sensor):
+        if self.__verbose:
+            print "DBG: Append to CSV file: {}".format(
+                self.__fn)
 
-            fd = open(self.__fn, 'w')
-            fd.write(sensor.csv_header())
-            fd.write(sensor.csv_line())
-            fd.close()
+        self.__writer.write(sensor.csv_header(), sensor.csv_line())
 
 
 class MqttChannel(OutputChannel):
@@ -101,12 +188,18 @@ class MqttChannel(OutputChannel):
         self.__verbose = verbose
         self.__mqtt_cfg = config.MqttServerConfigReader(cfg_file=mqtt_cfg_file)
 
+        import mqttpublisher
+        self.__publisher = mqttpublisher.get_publisher(self.__mqtt_cfg, verbose)
+
     def output(self, sensor):
+        self.output_data_types(sensor, sensor.sensor_data_types())
+
+    def output_data_types(self, sensor, data_types):
         dictionary = sensor.dictionary()
 
         msgs = []
 
-        for type in sensor.sensor_data_types():
+        for type in data_types:
             topic = config.mqtt_sensor_topic_format.format(
                 self.__hostname, type, sensor.id)
 
@@ -120,12 +213,7 @@ class MqttChannel(OutputChannel):
                 print "DBG: Publishing value '{}' to topic '{}'".format(
                     dictionary[type], topic)
 
-        import paho.mqtt.publish as publish
-        publish.multiple(msgs,
-                         hostname=self.__mqtt_cfg.mqtt_host,
-                         port=self.__mqtt_cfg.port,
-                         client_id=self.__mqtt_cfg.client_id,
-                         keepalive=self.__mqtt_cfg.keepalive)
+        self.__publisher.publish(msgs)
 
         if self.__verbose:
-            print "DBG: Messages published"
\ No newline at end of file
+            print "DBG: Messages queued for publishing"
\ No newline at end of file
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from write import gpio_write
+
+
+class PinWriter():
+    """ Writes GPIO pins in a background thread.
+
+        Every pin has a single slot for the value waiting to be written, a
+        newer value replaces a pending one (latest value wins). A pin with a
+        min_interval is written at most once per min_interval seconds, the
+        values received in between are coalesced.
+    """
+
+    def __init__(self, write=gpio_write, name='PinWriter'):
+        self.name = name
+        # number of values written, replaced before they were written and
+        # failed to be written
+        self.written = 0
+        self.superseded = 0
+        self.failed = 0
+        self.max_depth = 0
+
+        self.__write = write
+        # pin -> (value, min_interval)
+        self.__pending = OrderedDict()
+        self.__last_write = {}
+        self.__condition = threading.Condition()
+        self.__stopped = False
+        self.__thread = None
+
+    def put(self, pin, value, min_interval=None):
+        with self.__condition:
+            if self.__stopped:
+                return
+
+            if self.__pending.pop(pin, None) is not None:
+                self.superseded += 1
+                logging.debug('Pending value of pin \'%s\' superseded by %s', pin, value)
+
+            self.__pending[pin] = (value, min_interval)
+            self.max_depth = max(self.max_depth, len(self.__pending))
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name=self.name)
+                self.__thread.daemon = True
+                self.__thread.start()
+            self.__condition.notify()
+
+    def depth(self):
+        """ Returns the number of pins waiting to be written """
+        with self.__condition:
+            return len(self.__pending)
+
+    def stats(self):
+        with self.__condition:
+            return dict(depth=len(self.__pending), max_depth=self.max_depth,
+                        written=self.written, superseded=self.superseded,
+                        failed=self.failed)
+
+    def stop(self, timeout=5.0):
+        """ Writes the pending values and stops the writer thread """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+            thread = self.__thread
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def __next(self):
+        """ Returns the first pin which may be written and its value or the
+            seconds to wait for one.
+        """
+        now = time.time()
+        wait = None
+
+        for pin, (value, min_interval) in self.__pending.items():
+            due = self.__last_write.get(pin, 0) + (min_interval or 0)
+            if due <= now:
+                del self.__pending[pin]
+                return pin, value, None
+            if wait is None or due - now < wait:
+                wait = due - now
+
+        return None, None, wait
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                pin, value, wait = self.__next()
+                while pin is None:
+                    if self.__stopped and not self.__pending:
+                        return
+                    self.__condition.wait(wait)
+                    pin, value, wait = self.__next()
+
+                self.__last_write[pin] = time.time()
+
+            try:
+                self.__write(pin, value)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error('Writing value %s to pin \'%s\' failed: %s', value, pin, e)
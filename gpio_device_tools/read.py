@@ -1,24 +1,125 @@
 #!/usr/bin/python
 import os
+import signal
 import sys
 from optparse import OptionParser
 
+import acquisition
 import outchannel
 from gpio_device_tools import config
 
 
 def main(argv):
-    sensor_cfgs = parse_options(argv)
+    sensor_cfgs, daemon_mode = parse_options(argv)
+
+    if daemon_mode:
+        # wildcards are expanded by the scheduler, which picks up new sensors
+        run_daemon(acquisition.group_by_resource(sensor_cfgs))
+        return
+
+    sensor_cfgs = expand_sensor_cfgs(sensor_cfgs)
+
+    # sensors on different buses are read in parallel
+    groups = acquisition.group_by_resource(sensor_cfgs)
+
+    if is_batch_output(sensor_cfgs):
+        read_and_output_batch(sensor_cfgs, groups)
+    else:
+        acquisition.read_groups(groups, read_and_output_sensor_data, read_ds1820_cycle)
+
+
+def read_ds1820_cycle(sensor_cfgs):
+    # one pass over all DS1820 sensors instead of one per sensor
+    if any(sensor_cfg.sensor_type.lower() == 'ds1820' for sensor_cfg in sensor_cfgs):
+        import ds1820
+        ds1820.read_cycle(sensor_cfgs)
+
+
+def expand_sensor_cfgs(sensor_cfgs):
+    # 'ds1820:*' stands for all attached DS1820 sensors
+    expanded = []
     for sensor_cfg in sensor_cfgs:
-        read_and_output_sensor_data(sensor_cfg)
+        if sensor_cfg.sensor_type.lower() == 'ds1820':
+            import ds1820
+            expanded.extend(ds1820.expand_wildcard(sensor_cfg))
+        else:
+            expanded.append(sensor_cfg)
+    return expanded
+
+
+def is_batch_output(sensor_cfgs):
+    # sensors writing to the same file are written as one document
+    return len(sensor_cfgs) > 1 \
+        and all(sensor_cfg.out_channel == config.FILE_CHANNEL for sensor_cfg in sensor_cfgs) \
+        and len(set(sensor_cfg.out_file for sensor_cfg in sensor_cfgs)) == 1
+
+
+def read_and_output_batch(sensor_cfgs, groups):
+    sensors = {}
+    errors = {}
+
+    def read_sensor(sensor_cfg):
+        try:
+            sensors[id(sensor_cfg)] = create_sensor(sensor_cfg)
+        except Exception as e:
+            errors[id(sensor_cfg)] = e
+
+    acquisition.read_groups(groups, read_sensor, read_ds1820_cycle)
+
+    batch = []
+    for sensor_cfg in sensor_cfgs:
+        sens = sensors.get(id(sensor_cfg))
+        if sens is not None:
+            batch.append(sens)
+        elif id(sensor_cfg) in errors:
+            print 'ERR: Reading sensor {} {} failed: {}'.format(
+                sensor_cfg.sensor_type, sensor_cfg.sensor_param, errors[id(sensor_cfg)])
+        else:
+            print 'Unsupported sens ', sensor_cfg.sensor_type
+
+    if batch:
+        create_channel(sensor_cfgs[0]).output_batch(batch)
+
+
+def run_daemon(groups):
+    import scheduler
+    schedulers = []
+    for key, sensor_cfgs in groups.items():
+        options = {}
+        if key[0] == acquisition.W1_RESOURCE:
+            import ds1820
+            # DS1820 sensors due together share one conversion, the attached
+            # sensors are looked up again whenever the device index is renewed
+            options = dict(window=ds1820.CONVERSION_TIME,
+                           expand=ds1820.expand_wildcard,
+                           expand_interval=ds1820.REFRESH_INTERVAL)
+        schedulers.append(scheduler.SensorScheduler(
+            sensor_cfgs,
+            create_sensor=create_sensor,
+            create_channel=create_channel,
+            prepare_cycle=read_ds1820_cycle,
+            verbose=any(sensor_cfg.verbose for sensor_cfg in sensor_cfgs),
+            **options))
+
+    def stop(*args):
+        for sensor_scheduler in schedulers:
+            sensor_scheduler.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        acquisition.run_parallel(
+            [(sensor_scheduler.run, ()) for sensor_scheduler in schedulers])
+    except KeyboardInterrupt:
+        stop()
 
 
 def parse_options(argv):
     usage = '\n' \
             '  gpioread --sensor <sensor> [--id <ID>] [--label <label>] ' \
             '[(--text | --csv <CSV file> | --xml | --json | --mqtt <MQTT config file>  [--hostname <hostname>])] ' \
-            '[--outfile <output file>]\n' \
-            '  gpioread --config <sensor and MQTT config file>\n' \
+            '[--outfile <output file> [--skip-unchanged]]\n' \
+            '  gpioread --config <sensor and MQTT config file> [--daemon]\n' \
             '  gpioread -h | --help'
 
     parser = OptionParser(usage=usage)
@@ -29,6 +130,15 @@ def parse_options(argv):
     parser.set_defaults(label='Label')
     parser.set_defaults(mqtt_cfg_file=None)
     parser.set_defaults(cfg_file=None)
+    parser.set_defaults(csv_options={})
+    parser.set_defaults(deadbands={})
+    parser.set_defaults(heartbeat=None)
+    parser.set_defaults(mode=None)
+    parser.set_defaults(resolution=None)
+    parser.set_defaults(samples=1)
+    parser.set_defaults(retries=config.default_retries)
+    parser.set_defaults(interval=config.default_interval)
+    parser.set_defaults(jitter=config.default_jitter)
     parser.add_option('-s', '--sensor',
                       dest='sensor', metavar='<sensor>',
                       help='sensor type, optionally with address')
@@ -53,6 +163,9 @@ def parse_options(argv):
     parser.add_option('-o', '--outfile',
                       dest='out_file', metavar='<output file>',
                       help='writes the sensor data to given file')
+    parser.add_option('-u', '--skip-unchanged',
+                      action='store_true', dest='skip_unchanged', default=False,
+                      help='does not rewrite the output file if the sensor data has not changed')
     parser.add_option('-m', '--mqtt',
                       dest='mqtt_cfg_file', metavar='<MQTT config file>',
                       help='writes the sensor data to the MQTT server defined in the config file')
@@ -62,6 +175,25 @@ def parse_options(argv):
     parser.add_option('-g', '--config',
                       dest='cfg_file', metavar='<config file>',
                       help='the sensor and MQTT server configuration in config file')
+    parser.add_option('-d', '--daemon',
+                      action='store_true', dest='daemon', default=False,
+                      help='keeps running and samples every sensor on its configured interval')
+    parser.add_option('--interval',
+                      dest='interval', type='float', metavar='<seconds>',
+                      help='sampling interval of the sensor in daemon mode')
+    parser.add_option('--jitter',
+                      dest='jitter', type='float', metavar='<seconds>',
+                      help='maximum random offset of the first sample in daemon mode')
+    parser.add_option('--mode',
+                      dest='mode', metavar='<mode>',
+                      help='oversampling mode of a BMP085: ultralowpower, standard, highres or ultrahighres, '
+                           'measurement mode of a HTU21D: timed, poll or hold')
+    parser.add_option('--resolution',
+                      dest='resolution', type='int', metavar='<bits>',
+                      help='temperature resolution of a HTU21D: 14, 13, 12 or 11 bits')
+    parser.add_option('--samples',
+                      dest='samples', type='int', metavar='<count>',
+                      help='averages the sensor values over the given number of samples')
     parser.add_option('-v', '--verbose',
                       action='store_true', dest='verbose', default=False,
                       help='enables verbose mode')
@@ -73,6 +205,12 @@ def parse_options(argv):
     if options.sensor is None and options.cfg_file is None:
         parser.error('Either options --sensor or --config have to be defined')
 
+    if options.interval <= 0:
+        parser.error('The option --interval has to be positive')
+
+    if options.samples < 1:
+        parser.error('The option --samples has to be positive')
+
     if options.sensor is not None:
         splitted = options.sensor.split(':', 2)
         options.sensor_type = splitted[0]
@@ -99,10 +237,10 @@ def parse_options(argv):
             options.cfg_file,
             options.mqtt_cfg_file,
             options.verbose)
-        return cfg.sensors
+        return cfg.sensors, options.daemon
     else:
         # sensor config given by command line options
-        return [options]
+        return [options], options.daemon
 
 
 def read_and_output_sensor_data(sensor_cfg):
@@ -120,6 +258,16 @@ def read_and_output_sensor_data(sensor_cfg):
             print 'Output file  : ', sensor_cfg.out_file
             print 'Output format: ', sensor_cfg.out_format
 
+    sens = create_sensor(sensor_cfg)
+
+    if sens is not None:
+        channel = create_channel(sensor_cfg)
+        channel.output(sens)
+    else:
+        print 'Unsupported sens ', sensor_cfg.sensor_type
+
+
+def create_sensor(sensor_cfg):
     sens = None
 
     if sensor_cfg.sensor_type.lower() == 'dummy':
@@ -133,7 +281,9 @@ def read_and_output_sensor_data(sensor_cfg):
             param=sensor_cfg.sensor_param,
             id=sensor_cfg.id,
             label=sensor_cfg.label,
-            verbose=sensor_cfg.verbose)
+            verbose=sensor_cfg.verbose,
+            mode=sensor_cfg.mode,
+            samples=sensor_cfg.samples)
     elif sensor_cfg.sensor_type.lower() == 'dht11':
         import dht
         sens = dht.DHT(
@@ -164,38 +314,53 @@ def read_and_output_sensor_data(sensor_cfg):
             param=sensor_cfg.sensor_param,
             id=sensor_cfg.id,
             label=sensor_cfg.label,
-            verbose=sensor_cfg.verbose)
+            verbose=sensor_cfg.verbose,
+            resolution=sensor_cfg.resolution,
+            samples=sensor_cfg.samples,
+            mode=sensor_cfg.mode,
+            retries=sensor_cfg.retries)
     elif sensor_cfg.sensor_type.lower() == 'ds1820':
         import ds1820
         sens = ds1820.DS1820Sensor(
             sens_id=sensor_cfg.sensor_param,
             id=sensor_cfg.id,
             label=sensor_cfg.label,
-            verbose=sensor_cfg.verbose)
+            verbose=sensor_cfg.verbose,
+            retries=sensor_cfg.retries)
 
-    if sens is not None:
-        if sensor_cfg.out_channel == config.MQTT_CHANNEL:
-            channel = outchannel.MqttChannel(
-                mqtt_cfg_file=sensor_cfg.mqtt_cfg_file,
-                hostname=sensor_cfg.hostname,
-                verbose=sensor_cfg.verbose)
-        elif (sensor_cfg.out_channel == config.FILE_CHANNEL) \
-                and (sensor_cfg.out_file is not None):
-            channel = outchannel.FileChannel(
-                out_format=sensor_cfg.out_format,
-                fn=sensor_cfg.out_file,
-                verbose=sensor_cfg.verbose)
-        elif sensor_cfg.out_channel == config.CSV_FILE_CHANNEL:
-            channel = outchannel.CSVFileChannel(
-                fn=sensor_cfg.out_file,
-                verbose=sensor_cfg.verbose)
-        else:
-            channel = outchannel.ConsoleChannel(
-                out_format=sensor_cfg.out_format)
+    return sens
 
-        channel.output(sens)
+
+def create_channel(sensor_cfg):
+    if sensor_cfg.out_channel == config.MQTT_CHANNEL:
+        channel = outchannel.MqttChannel(
+            mqtt_cfg_file=sensor_cfg.mqtt_cfg_file,
+            hostname=sensor_cfg.hostname,
+            verbose=sensor_cfg.verbose)
+    elif (sensor_cfg.out_channel == config.FILE_CHANNEL) \
+            and (sensor_cfg.out_file is not None):
+        channel = outchannel.FileChannel(
+            out_format=sensor_cfg.out_format,
+            fn=sensor_cfg.out_file,
+            skip_unchanged=sensor_cfg.skip_unchanged,
+            verbose=sensor_cfg.verbose)
+    elif sensor_cfg.out_channel == config.CSV_FILE_CHANNEL:
+        channel = outchannel.CSVFileChannel(
+            fn=sensor_cfg.out_file,
+            verbose=sensor_cfg.verbose,
+            **sensor_cfg.csv_options)
     else:
-        print 'Unsupported sens ', sensor_cfg.sensor_type
+        channel = outchannel.ConsoleChannel(
+            out_format=sensor_cfg.out_format)
+
+    if sensor_cfg.deadbands or sensor_cfg.heartbeat is not None:
+        import deadband
+        channel = deadband.DeadbandChannel(
+            channel,
+            deadband.DeadbandFilter(sensor_cfg.deadbands, sensor_cfg.heartbeat),
+            verbose=sensor_cfg.verbose)
+
+    return channel
 
 
 if __name__ == '__main__':
@@ -0,0 +1,211 @@
+import heapq
+import random
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+# upper limit of the delay before a failed sensor is sampled again
+MAX_BACKOFF = 600.0
+
+
+class SensorTask():
+
+    def __init__(self, sensor_cfg, create_sensor, create_channel):
+        self.sensor_cfg = sensor_cfg
+        self.interval = sensor_cfg.interval
+        self.jitter = sensor_cfg.jitter
+        self.sensor = None
+        self.channel = None
+        self.samples = 0
+        self.missed = 0
+        self.failures = 0
+        self.__create_sensor = create_sensor
+        self.__create_channel = create_channel
+
+    def name(self):
+        if self.sensor_cfg.sensor_param:
+            return '{}:{}'.format(self.sensor_cfg.sensor_type, self.sensor_cfg.sensor_param)
+        return self.sensor_cfg.sensor_type
+
+    def sample(self):
+        if self.sensor is None:
+            # the sensor reads its first value while it is constructed
+            self.sensor = self.__create_sensor(self.sensor_cfg)
+            if self.sensor is None:
+                return False
+        else:
+            self.sensor.read()
+
+        if self.channel is None:
+            self.channel = self.__create_channel(self.sensor_cfg)
+
+        self.channel.output(self.sensor)
+        self.samples += 1
+        return True
+
+    def backoff(self):
+        """ Returns the delay before the next try after failures, doubling
+            from the interval with every failure in a row
+        """
+        return min(self.interval * 2 ** min(self.failures - 1, 16),
+                   max(self.interval, MAX_BACKOFF))
+
+
+class SensorScheduler():
+    """ Samples every configured sensor on its own interval until stopped.
+
+        Sensors and output channels are created once and reused between cycles.
+        Each task gets a random phase within its jitter so that sensors sharing
+        a bus are spread over the interval instead of firing together. A task
+        whose sensor can't be created or read is tried again with a growing
+        delay, see SensorTask.backoff().
+
+        Tasks due within window seconds of each other are sampled together,
+        prepare_cycle is then called with their sensor configs first, e.g. to
+        read all sensors of a bus in one pass.
+
+        If given, expand is called with every sensor config and returns the
+        sensor configs it stands for, e.g. one per attached sensor for a
+        wildcard. It is called again every expand_interval seconds, tasks of
+        new sensors are added and those of removed sensors dropped.
+    """
+
+    def __init__(self, sensor_cfgs, create_sensor, create_channel,
+                 prepare_cycle=None, window=0.0, expand=None, expand_interval=60.0,
+                 verbose=False):
+        self.verbose = verbose
+        self.prepare_cycle = prepare_cycle
+        self.window = window
+        self.expand = expand
+        self.expand_interval = expand_interval
+        self.sensor_cfgs = sensor_cfgs
+        self.tasks = []
+        self.__create_sensor = create_sensor
+        self.__create_channel = create_channel
+        self.__keys = {}
+        self.__seq = 0
+        self.__stopped = threading.Event()
+
+        self.__update_tasks(None)
+
+    def __update_tasks(self, queue):
+        """ Creates the tasks of the expanded sensor configs and queues new
+            tasks if queue is given. Returns the removed tasks.
+        """
+        keys = OrderedDict()
+        for index, sensor_cfg in enumerate(self.sensor_cfgs):
+            expanded = self.expand(sensor_cfg) if self.expand is not None else [sensor_cfg]
+            for item in expanded:
+                key = (index, item.sensor_param)
+                task = self.__keys.get(key)
+                if task is None:
+                    task = SensorTask(item, self.__create_sensor, self.__create_channel)
+                    if queue is not None:
+                        self.__queue_task(queue, self.now(), task)
+                        if self.verbose:
+                            print 'DBG: Sensor {} added'.format(task.name())
+                keys[key] = task
+
+        tasks = set(keys.values())
+        removed = [task for task in self.tasks if task not in tasks]
+        if self.verbose and queue is not None:
+            for task in removed:
+                print 'DBG: Sensor {} removed'.format(task.name())
+
+        self.tasks = keys.values()
+        self.__keys = keys
+        return removed
+
+    def __queue_task(self, queue, start, task):
+        phase = random.uniform(0, min(task.jitter, task.interval))
+        heapq.heappush(queue, (start + phase, self.__seq, task))
+        self.__seq += 1
+
+    def run(self):
+        start = self.now()
+        next_expand = start + self.expand_interval
+
+        queue = []
+        for task in self.tasks:
+            self.__queue_task(queue, start, task)
+
+        while not self.__stopped.is_set():
+            if self.expand is not None and (not queue or queue[0][0] >= next_expand):
+                delay = next_expand - self.now()
+                if delay > 0 and self.wait(delay):
+                    break
+
+                removed = self.__update_tasks(queue)
+                if removed:
+                    queue = [item for item in queue if item[2] not in removed]
+                    heapq.heapify(queue)
+                next_expand += self.expand_interval
+                continue
+
+            if not queue:
+                break
+
+            due, seq, task = heapq.heappop(queue)
+
+            delay = due - self.now()
+            if delay > 0 and self.wait(delay):
+                break
+
+            batch = [(due, seq, task)]
+            while queue and queue[0][0] <= self.now() + self.window:
+                batch.append(heapq.heappop(queue))
+
+            if self.prepare_cycle is not None and len(batch) > 1:
+                try:
+                    self.prepare_cycle([task.sensor_cfg for _, _, task in batch])
+                except Exception:
+                    print 'ERR: Preparing the sampling of {} sensors failed'.format(len(batch))
+                    traceback.print_exc()
+
+            for due, seq, task in batch:
+                heapq.heappush(queue, (self.__sample(due, task), seq, task))
+
+    def __sample(self, due, task):
+        """ Samples task and returns the time it is due next """
+        if self.verbose:
+            print 'DBG: Sampling sensor {}'.format(task.name())
+
+        try:
+            sampled = task.sample()
+            if not sampled:
+                print 'Unsupported sens ', task.sensor_cfg.sensor_type
+        except Exception:
+            sampled = False
+            print 'ERR: Sampling sensor {} failed'.format(task.name())
+            traceback.print_exc()
+
+        finished = self.now()
+        if not sampled:
+            task.failures += 1
+            next_due = finished + task.backoff()
+            if self.verbose:
+                print 'DBG: Trying sensor {} again in {:.1f} s'.format(task.name(), next_due - finished)
+            return next_due
+
+        task.failures = 0
+        next_due = due + task.interval
+        if finished > next_due:
+            missed = int((finished - due) // task.interval)
+            task.missed += missed
+            next_due = due + (missed + 1) * task.interval
+            print 'WARN: Sensor {} overran its interval of {:.1f} s by {:.3f} s, {:d} sample(s) missed'.format(
+                task.name(), task.interval, finished - due - task.interval, missed)
+
+        return next_due
+
+    def now(self):
+        return time.time()
+
+    def wait(self, delay):
+        """ Waits delay seconds, returns True if stopped meanwhile """
+        self.__stopped.wait(delay)
+        return self.__stopped.is_set()
+
+    def stop(self):
+        self.__stopped.set()
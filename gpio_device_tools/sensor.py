@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 import os
 from abc import ABCMeta, abstractmethod
-from string import Template
+from collections import deque
 from datetime import datetime
 import config
+import serializer
+import template
+from crc import ChecksumError
 
 DUMMY_STR = 'dummy'
 
@@ -21,6 +24,29 @@ def parse_number(param, default=0):
         return default
 
 
+class RunningMean():
+    """ Mean of the last size samples, each sample being a tuple of values.
+
+        None values, e.g. of a failed checksum, are left out of the mean.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.__samples = deque(maxlen=size)
+
+    def is_filled(self):
+        return len(self.__samples) == self.size
+
+    def add(self, values):
+        self.__samples.append(values)
+
+        means = []
+        for i in range(len(values)):
+            valid = [sample[i] for sample in self.__samples if sample[i] is not None]
+            means.append(sum(valid) / float(len(valid)) if valid else None)
+        return tuple(means)
+
+
 class Sensor:
     __metaclass__ = ABCMeta
 
@@ -32,6 +58,42 @@ class Sensor:
             self.id = id
         self.label = label
         self.verbose = verbose
+        self.running_mean = None
+        self.retries = config.default_retries
+
+    def read(self):
+        pass
+
+    def set_samples(self, samples):
+        """ Averages the values of a reading over the last samples measurements """
+        self.running_mean = RunningMean(samples) if samples > 1 else None
+
+    def checked(self, measure):
+        """ Calls measure() again if its data has an invalid checksum, at most
+            retries times. The ChecksumError of the last attempt is raised,
+            so the reading is dropped.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return measure()
+            except ChecksumError as e:
+                if self.verbose:
+                    print 'DBG: Checksum error in attempt {:d}: {}'.format(attempt + 1, e.value)
+                if attempt == self.retries:
+                    raise
+
+    def averaged(self, measure):
+        """ Calls measure() which returns a tuple of values and returns the
+            running mean of the values. The first reading fills the buffer.
+            Every measurement is checked, see checked().
+        """
+        if self.running_mean is None:
+            return self.checked(measure)
+
+        count = 1 if self.running_mean.is_filled() else self.running_mean.size
+        for i in range(count):
+            values = self.running_mean.add(self.checked(measure))
+        return values
 
     @abstractmethod
     def generate_id(self, param):
@@ -41,9 +103,9 @@ class Sensor:
     def type(self):
         pass
 
-    @abstractmethod
     def template_type(self):
-        pass
+        # sensors without a text template use the generic text format
+        return None
 
     @abstractmethod
     def sensor_data_types(self):
@@ -62,23 +124,20 @@ class Sensor:
         pass
 
     def text_format(self):
-        return self.fill_template('txt')
+        if self.template_type() is None:
+            return serializer.get_serializer(config.TEXT_FORMAT).dumps(self)
+        return self.fill_template(config.TEXT_FORMAT)
 
     def xml_format(self):
-        return self.fill_template('xml')
+        return serializer.get_serializer(config.XML_FORMAT).dumps(self)
 
     def json_format(self):
-        return self.fill_template('json')
+        return serializer.get_serializer(config.JSON_FORMAT).dumps(self)
 
     def fill_template(self, tpl_file_suffix):
-        file = open(os.path.join(
-            self.base_dir,
-            config.tpl_file_path_name.format(
-                self.template_type(),
-                tpl_file_suffix)))
-
-        src = Template(file.read())
-        return src.safe_substitute(self.dictionary())
+        return template.get_template(
+            self.template_type(),
+            tpl_file_suffix).render(self.dictionary())
 
 
 class DummySensor(Sensor):
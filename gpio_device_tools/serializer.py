@@ -0,0 +1,185 @@
+import json
+import re
+from xml.sax.saxutils import escape
+
+import config
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# characters which need escaping, most values can be written as they are
+_json_special = re.compile(r'[\x00-\x1f"\\\x7f-\xff]')
+_xml_special = re.compile(r'[<>&"]')
+
+# keys written before the data, 'age' only by sensors which may return the
+# last good value of an earlier reading
+HEADER_KEYS = ['type', 'id', 'label', 'time', 'age']
+
+
+class StringOutput():
+    """ Collects written chunks, joins them once on getvalue() """
+
+    def __init__(self):
+        self.__chunks = []
+        self.write = self.__chunks.append
+
+    def getvalue(self):
+        return ''.join(self.__chunks)
+
+
+class Serializer():
+    """ Writes sensor readings to a file-like object chunk by chunk.
+
+        The document structure is built from Sensor.dictionary() and
+        Sensor.sensor_data_types(), so new sensor types need no templates.
+        A sensor with a single data type has the value on the top level,
+        several data types are grouped in a 'data' element.
+    """
+
+    def write(self, sensor, out):
+        pass
+
+    def write_batch(self, sensors, out):
+        pass
+
+    def dumps(self, sensor):
+        out = StringOutput()
+        self.write(sensor, out)
+        return out.getvalue()
+
+    def dumps_batch(self, sensors):
+        out = StringOutput()
+        self.write_batch(sensors, out)
+        return out.getvalue()
+
+
+class JsonSerializer(Serializer):
+
+    @staticmethod
+    def quote(value):
+        if not isinstance(value, basestring):
+            value = '%s' % (value,)
+        if _json_special.search(value) is None:
+            return '"' + value + '"'
+        return json.dumps(value)
+
+    def write(self, sensor, out, indent=''):
+        quote = self.quote
+        dictionary = sensor.dictionary()
+        data_types = sensor.sensor_data_types()
+
+        out.write('{\n')
+        for key in HEADER_KEYS:
+            if key not in dictionary:
+                continue
+            out.write('{}  "{}": {},\n'.format(indent, key, quote(dictionary[key])))
+
+        if len(data_types) > 1:
+            out.write(indent + '  "data": {\n')
+            data_indent = indent + '    '
+        else:
+            data_indent = indent + '  '
+
+        for i, data_type in enumerate(data_types):
+            out.write('{0}"{1}": {{\n'
+                      '{0}  "value": {2},\n'
+                      '{0}  "unit": {3}\n'
+                      '{0}}}'.format(
+                          data_indent, data_type,
+                          quote(dictionary[data_type]),
+                          quote(dictionary[data_type + 'Unit'])))
+            out.write(',\n' if i < len(data_types) - 1 else '\n')
+
+        if len(data_types) > 1:
+            out.write(indent + '  }\n')
+        out.write(indent + '}')
+
+    def write_batch(self, sensors, out):
+        out.write('[')
+        for i, sensor in enumerate(sensors):
+            out.write('\n  ' if i == 0 else ',\n  ')
+            self.write(sensor, out, indent='  ')
+        out.write('\n]' if sensors else ']')
+
+
+class XmlSerializer(Serializer):
+
+    @staticmethod
+    def quote(value):
+        if not isinstance(value, basestring):
+            value = '%s' % (value,)
+        if _xml_special.search(value) is None:
+            return value
+        return escape(value, {'"': '&quot;'})
+
+    def write(self, sensor, out, indent='', declaration=True):
+        quote = self.quote
+        dictionary = sensor.dictionary()
+        data_types = sensor.sensor_data_types()
+
+        if declaration:
+            out.write(XML_DECLARATION)
+
+        out.write(indent + '<sensor>\n')
+        for key in HEADER_KEYS:
+            if key not in dictionary:
+                continue
+            out.write('{0}    <{1}>{2}</{1}>\n'.format(indent, key, quote(dictionary[key])))
+
+        if len(data_types) > 1:
+            out.write(indent + '    <data>\n')
+            data_indent = indent + '        '
+        else:
+            data_indent = indent + '    '
+
+        for data_type in data_types:
+            out.write('{0}<{1} unit="{2}">{3}</{1}>\n'.format(
+                data_indent, data_type,
+                quote(dictionary[data_type + 'Unit']),
+                quote(dictionary[data_type])))
+
+        if len(data_types) > 1:
+            out.write(indent + '    </data>\n')
+        out.write(indent + '</sensor>')
+
+    def write_batch(self, sensors, out):
+        out.write(XML_DECLARATION)
+        out.write('<sensors>\n')
+        for sensor in sensors:
+            self.write(sensor, out, indent='    ', declaration=False)
+            out.write('\n')
+        out.write('</sensors>')
+
+
+class TextSerializer(Serializer):
+    """ Generic text format for sensors without a text template """
+
+    def write(self, sensor, out):
+        dictionary = sensor.dictionary()
+
+        out.write('Label: {}\nType : {}\nTime : {}'.format(
+            dictionary['label'], dictionary['type'], dictionary['time']))
+        if 'age' in dictionary:
+            out.write('\nAge  : {} s'.format(dictionary['age']))
+        for data_type in sensor.sensor_data_types():
+            out.write('\n{}: {} {}'.format(
+                data_type.capitalize(),
+                dictionary[data_type],
+                dictionary[data_type + 'Unit']))
+
+    def write_batch(self, sensors, out):
+        # every sensor in the text format of its type, like a single reading
+        for i, sensor in enumerate(sensors):
+            if i > 0:
+                out.write('\n\n')
+            out.write(sensor.text_format())
+
+
+_serializers = {
+    config.JSON_FORMAT: JsonSerializer(),
+    config.XML_FORMAT: XmlSerializer(),
+    config.TEXT_FORMAT: TextSerializer()
+}
+
+
+def get_serializer(out_format):
+    return _serializers[out_format]
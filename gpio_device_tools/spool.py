@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import threading
+import time
+
+SEGMENT_FORMAT = 'segment-{:010d}.log'
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{10})\.log$')
+CURSOR_FILE = 'cursor'
+
+
+class MessageSpool():
+    """ Append-only on-disk queue of MQTT messages.
+
+        Messages are stored as JSON lines in numbered segment files. New
+        messages are only ever appended to the newest segment and consumed
+        segments are deleted as a whole, so no file is rewritten. Only the
+        small cursor file with the read position is replaced.
+
+        Appended data is flushed to the OS immediately but synced to the
+        storage only every sync_count messages or sync_interval seconds.
+        When the spool grows beyond max_size the oldest segments are dropped.
+    """
+
+    def __init__(self, spool_dir, max_size=50 * 1024 * 1024, segment_size=1024 * 1024,
+                 sync_count=100, sync_interval=5.0, verbose=False):
+        self.spool_dir = spool_dir
+        self.max_size = max_size
+        self.segment_size = max(1024, min(segment_size, max_size // 4))
+        self.sync_count = sync_count
+        self.sync_interval = sync_interval
+        self.verbose = verbose
+        self.evicted = 0
+
+        self.__lock = threading.RLock()
+        self.__writer = None
+        self.__unsynced = 0
+        self.__last_sync = time.time()
+        self.__cursor_dirty = False
+
+        if not os.path.isdir(spool_dir):
+            os.makedirs(spool_dir)
+
+        self.__segments = self.__list_segments()
+        self.__sizes = dict((seq, os.path.getsize(self.__path(seq)))
+                            for seq in self.__segments)
+        self.__read_seq, self.__read_offset = self.__load_cursor()
+        self.__open_writer()
+
+        if self.__read_seq not in self.__sizes:
+            self.__read_seq, self.__read_offset = self.__segments[0], 0
+
+    def __path(self, seq):
+        return os.path.join(self.spool_dir, SEGMENT_FORMAT.format(seq))
+
+    def __list_segments(self):
+        segments = []
+        for fn in os.listdir(self.spool_dir):
+            m = SEGMENT_PATTERN.match(fn)
+            if m:
+                segments.append(int(m.group(1)))
+        return sorted(segments)
+
+    def __load_cursor(self):
+        try:
+            with open(os.path.join(self.spool_dir, CURSOR_FILE)) as f:
+                seq, offset = f.read().split()
+                seq, offset = int(seq), int(offset)
+        except (IOError, ValueError):
+            seq, offset = 0, 0
+
+        if self.__segments and seq < self.__segments[0]:
+            seq, offset = self.__segments[0], 0
+        return seq, offset
+
+    def __save_cursor(self):
+        fn = os.path.join(self.spool_dir, CURSOR_FILE)
+        with open(fn + '.tmp', 'w') as f:
+            f.write('{} {}\n'.format(self.__read_seq, self.__read_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(fn + '.tmp', fn)
+        self.__cursor_dirty = False
+
+    def __open_writer(self):
+        if self.__segments:
+            seq = self.__segments[-1]
+            size = self.__sizes[seq]
+            if size < self.segment_size and self.__ends_with_newline(seq, size):
+                self.__writer = open(self.__path(seq), 'ab')
+                return
+            seq += 1
+        else:
+            seq = max(self.__read_seq, 1)
+
+        self.__segments.append(seq)
+        self.__sizes[seq] = 0
+        self.__writer = open(self.__path(seq), 'ab')
+
+    def __ends_with_newline(self, seq, size):
+        # a record cut off by a crash must not be continued by the next one
+        if size == 0:
+            return True
+        with open(self.__path(seq), 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) == '\n'
+
+    def __sync(self):
+        self.__writer.flush()
+        os.fsync(self.__writer.fileno())
+        if self.__cursor_dirty:
+            self.__save_cursor()
+        self.__unsynced = 0
+        self.__last_sync = time.time()
+
+    def __size(self):
+        return sum(self.__sizes.values())
+
+    def __evict(self):
+        while self.__size() > self.max_size and len(self.__segments) > 1:
+            seq = self.__segments.pop(0)
+            os.remove(self.__path(seq))
+            del self.__sizes[seq]
+            self.evicted += 1
+            if self.__read_seq <= seq:
+                self.__read_seq, self.__read_offset = self.__segments[0], 0
+                self.__cursor_dirty = True
+            if self.verbose:
+                print 'DBG: Spool size limit reached, dropped segment {}'.format(seq)
+
+    def append(self, msgs):
+        with self.__lock:
+            for msg in msgs:
+                line = json.dumps(msg, separators=(',', ':')) + '\n'
+
+                if self.__sizes[self.__segments[-1]] + len(line) > self.segment_size \
+                        and self.__sizes[self.__segments[-1]] > 0:
+                    self.__sync()
+                    self.__writer.close()
+                    seq = self.__segments[-1] + 1
+                    self.__segments.append(seq)
+                    self.__sizes[seq] = 0
+                    self.__writer = open(self.__path(seq), 'ab')
+
+                self.__writer.write(line)
+                self.__sizes[self.__segments[-1]] += len(line)
+                self.__unsynced += 1
+
+            self.__writer.flush()
+            self.__evict()
+
+            if self.__unsynced >= self.sync_count \
+                    or time.time() - self.__last_sync >= self.sync_interval:
+                self.__sync()
+
+    def has_backlog(self):
+        with self.__lock:
+            return self.__read_seq < self.__segments[-1] \
+                or self.__read_offset < self.__sizes[self.__segments[-1]]
+
+    def read(self, count):
+        """ Returns up to count (message, position) tuples from the read
+            position, position being the read position after the message.
+            The messages stay in the spool until a position is passed to commit().
+        """
+        with self.__lock:
+            records = []
+            seq, offset = self.__read_seq, self.__read_offset
+
+            while len(records) < count:
+                if seq not in self.__sizes:
+                    break
+                if offset >= self.__sizes[seq]:
+                    if seq == self.__segments[-1]:
+                        break
+                    seq, offset = self.__segments[self.__segments.index(seq) + 1], 0
+                    continue
+
+                with open(self.__path(seq), 'rb') as f:
+                    f.seek(offset)
+                    while len(records) < count and offset < self.__sizes[seq]:
+                        line = f.readline()
+                        if not line.endswith('\n'):
+                            # cut off record, skip the rest of the segment
+                            offset = self.__sizes[seq]
+                            break
+                        offset += len(line)
+                        try:
+                            records.append((json.loads(line), (seq, offset)))
+                        except ValueError:
+                            pass
+
+            if not records and (seq, offset) != (self.__read_seq, self.__read_offset):
+                # only unreadable records have been skipped
+                self.commit((seq, offset))
+
+            return records
+
+    def commit(self, position):
+        with self.__lock:
+            seq, offset = position
+            if seq not in self.__sizes:
+                # the segment has been evicted in the meantime
+                return
+
+            # delete all fully consumed segments
+            while self.__segments[0] < seq:
+                old_seq = self.__segments.pop(0)
+                os.remove(self.__path(old_seq))
+                del self.__sizes[old_seq]
+
+            self.__read_seq, self.__read_offset = seq, offset
+            self.__cursor_dirty = True
+            self.__unsynced += 1
+
+            if self.__unsynced >= self.sync_count \
+                    or time.time() - self.__last_sync >= self.sync_interval:
+                self.__sync()
+
+    def close(self):
+        with self.__lock:
+            if self.__writer is not None:
+                self.__sync()
+                self.__writer.close()
+                self.__writer = None
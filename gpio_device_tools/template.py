@@ -0,0 +1,71 @@
+import os
+import threading
+from string import Template
+
+import config
+
+_base_dir = os.path.dirname(__file__)
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+class CompiledTemplate():
+    """ A string.Template split into its literal parts and placeholders.
+
+        render() behaves like Template.safe_substitute() but only has to join
+        the precompiled parts with the values of the placeholders.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.__parts = []
+        self.__fields = []
+
+        literal = []
+        pos = 0
+        for m in Template.pattern.finditer(source):
+            literal.append(source[pos:m.start()])
+            pos = m.end()
+
+            name = m.group('named') or m.group('braced')
+            if m.group('escaped') is not None:
+                literal.append(Template.delimiter)
+            elif name is not None:
+                self.__parts.append(''.join(literal))
+                literal = []
+                self.__fields.append((len(self.__parts), name, m.group()))
+                self.__parts.append(m.group())
+            else:
+                # invalid placeholder, kept as it is
+                literal.append(m.group())
+
+        literal.append(source[pos:])
+        self.__parts.append(''.join(literal))
+
+    def render(self, mapping):
+        parts = list(self.__parts)
+        for index, name, placeholder in self.__fields:
+            value = mapping.get(name)
+            if value is not None:
+                parts[index] = value if isinstance(value, basestring) else '%s' % (value,)
+        return ''.join(parts)
+
+
+def get_template(template_type, tpl_file_suffix):
+    """ Returns the compiled template of a template type and output format.
+        Every template file is read and compiled only once per process.
+    """
+    key = (template_type, tpl_file_suffix)
+    tpl = _templates.get(key)
+    if tpl is None:
+        with _templates_lock:
+            tpl = _templates.get(key)
+            if tpl is None:
+                fn = os.path.join(
+                    _base_dir,
+                    config.tpl_file_path_name.format(template_type, tpl_file_suffix))
+                with open(fn) as f:
+                    tpl = CompiledTemplate(f.read())
+                _templates[key] = tpl
+    return tpl
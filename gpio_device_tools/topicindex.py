@@ -0,0 +1,107 @@
+""" Dispatch of MQTT topics to bindings.
+
+    Bindings to plain topics are found by a single dict lookup. Bindings to
+    topic filters with the MQTT wildcards '+' (one level) and '#' (all
+    remaining levels) are kept in a trie of topic levels, so a message only
+    visits the levels of its own topic.
+"""
+
+SEPARATOR = '/'
+SINGLE_LEVEL = '+'
+MULTI_LEVEL = '#'
+
+
+def is_wildcard(topic):
+    return SINGLE_LEVEL in topic or MULTI_LEVEL in topic
+
+
+class _Node():
+
+    def __init__(self):
+        self.children = {}
+        self.bindings = []
+        # bindings of the filter '<levels of this node>/#'
+        self.multi_level_bindings = []
+
+
+class TopicIndex():
+    """ Bindings by topic filter, see match() """
+
+    def __init__(self, bindings=None):
+        self.__topics = {}
+        self.__root = _Node()
+        self.__wildcards = 0
+
+        for binding in bindings or []:
+            self.add(binding)
+
+    def __len__(self):
+        return sum(len(b) for b in self.__topics.values()) + self.__wildcards
+
+    def add(self, binding):
+        topic = binding.topic
+
+        if not is_wildcard(topic):
+            self.__topics.setdefault(topic, []).append(binding)
+            return
+
+        node = self.__root
+        levels = topic.split(SEPARATOR)
+        for i, level in enumerate(levels):
+            if level == MULTI_LEVEL and i == len(levels) - 1:
+                node.multi_level_bindings.append(binding)
+                break
+            if MULTI_LEVEL in level or (SINGLE_LEVEL in level and level != SINGLE_LEVEL):
+                raise ValueError('Invalid topic filter: {}'.format(topic))
+            node = node.children.setdefault(level, _Node())
+        else:
+            node.bindings.append(binding)
+
+        self.__wildcards += 1
+
+    def topics(self):
+        """ Returns the distinct topic filters of all bindings """
+        topics = self.__topics.keys()
+        self.__collect(self.__root, [], topics)
+        return topics
+
+    def __collect(self, node, levels, topics):
+        if node.bindings:
+            topics.append(SEPARATOR.join(levels))
+        if node.multi_level_bindings:
+            topics.append(SEPARATOR.join(levels + [MULTI_LEVEL]))
+        for level, child in node.children.items():
+            self.__collect(child, levels + [level], topics)
+
+    def match(self, topic):
+        """ Returns a list of (binding, segments) of all bindings matching
+            topic. segments are the topic levels matched by the wildcards of
+            the binding in order, '#' matches the remaining levels joined by
+            '/'.
+        """
+        result = [(binding, ()) for binding in self.__topics.get(topic, [])]
+
+        if self.__wildcards:
+            levels = topic.split(SEPARATOR)
+            # wildcards at the first level don't match topics like $SYS/...
+            self.__match(self.__root, levels, 0, [], result, topic.startswith('$'))
+
+        return result
+
+    def __match(self, node, levels, i, segments, result, system):
+        if not system:
+            for binding in node.multi_level_bindings:
+                result.append((binding, tuple(segments + [SEPARATOR.join(levels[i:])])))
+
+        if i == len(levels):
+            for binding in node.bindings:
+                result.append((binding, tuple(segments)))
+            return
+
+        child = node.children.get(levels[i])
+        if child is not None:
+            self.__match(child, levels, i + 1, segments, result, False)
+
+        child = node.children.get(SINGLE_LEVEL)
+        if child is not None and not system:
+            self.__match(child, levels, i + 1, segments + [levels[i]], result, False)
@@ -1,25 +1,38 @@
 #!/usr/bin/python
+import atexit
 import sys
+import threading
+from collections import OrderedDict
 from optparse import OptionParser
 
 import config
 
+# Adafruit_GPIO.GPIO.OUT, used by backends without an OUT constant
+OUT = 0
+
+_pin_manager = None
+_pin_manager_lock = threading.Lock()
+
 
 def main(argv):
     options = parse_options(argv)
-    gpio_write(pin=options.pin[0], value=options.pin[1],
-               verbose=options.verbose)
+    gpio_write(options.values, verbose=options.verbose)
 
 
 def parse_options(argv):
     usage = '\n' \
             '  gpiowrite --pin <ID> <value> [--verbose]\n' \
+            '  gpiowrite --pins <ID>=<value>,... [--verbose]\n' \
             '  gpiowrite -h | --help'
 
     parser = OptionParser(usage=usage)
     parser.add_option('-p', '--pin',
                       dest='pin', nargs=2, metavar='<ID> <value>',
                       help='ID of the GPIO pin and value to be written to the pin: HIGH/LOW or true/false or 1/0')
+    parser.add_option('-P', '--pins',
+                      dest='pins', metavar='<ID>=<value>,...',
+                      help='comma separated IDs of GPIO pins and values, e.g. XIO-P4=1,XIO-P5=0. '
+                           'The pins are written one after another, not atomically.')
     parser.add_option('-v', '--verbose',
                       action='store_true', dest='verbose', default=False,
                       help='enables verbose mode')
@@ -28,39 +41,163 @@ def parse_options(argv):
     if len(args) > 0:
         parser.error('Unsupported arguments: ' + ', '.join(args))
 
-    if options.pin is None:
+    if options.pin is None and options.pins is None:
         parser.error('The option --pin with the arguments ID and value is not defined')
 
+    options.values = OrderedDict()
+    if options.pins is not None:
+        try:
+            options.values.update(parse_pins(options.pins))
+        except ValueError as e:
+            parser.error(str(e))
+    if options.pin is not None:
+        options.values[options.pin[0]] = options.pin[1]
+
     if options.verbose:
         print 'DBG: Options= ', options
 
     return options
 
 
-def gpio_write(pin, value, verbose=False):
+def parse_pins(text):
+    """ Returns the pins and values of 'ID=value,...' in order """
+    values = OrderedDict()
+
+    for item in text.split(','):
+        pin, sep, value = item.partition('=')
+        pin, value = pin.strip(), value.strip()
+        if not sep or not pin or not config.is_boolean_value(value):
+            raise ValueError('Invalid pin and value: \'{}\''.format(item))
+        values[pin] = value
+
+    return values
+
+
+def gpio_write(pin, value=None, verbose=False):
+    """ Writes value to pin or, if pin is a mapping of pins to values, all
+        of them one after another.
+    """
+    if isinstance(pin, dict):
+        get_pin_manager(verbose).write_all(pin)
+    else:
+        get_pin_manager(verbose).write(pin, value)
+
+
+def get_pin_manager(verbose=False):
+    """ Returns the pin manager shared by all writers of this process """
+    global _pin_manager
+
+    with _pin_manager_lock:
+        if _pin_manager is None:
+            _pin_manager = GPIOPinManager(verbose=verbose)
+            atexit.register(_pin_manager.cleanup)
+
+    return _pin_manager
+
+
+def set_pin_manager(pin_manager):
+    """ Replaces the pin manager of this process, e.g. for tests """
+    global _pin_manager
+
+    with _pin_manager_lock:
+        _pin_manager = pin_manager
+
+
+def open_gpio(verbose=False):
+    """ Returns the GPIO backend of the platform, CHIP_IO.GPIO on a CHIP
+        and the platform GPIO of Adafruit_GPIO otherwise.
+    """
     if config.chip_platform:
         if verbose:
             print "DBG: CHIP platform detected"
-        v = str_2_one_zero(value)
 
         import CHIP_IO.GPIO as GPIO
-        GPIO.setup(pin, GPIO.OUT)
-        GPIO.output(pin, v)
-        GPIO.cleanup()
-
-        if verbose:
-            print "DBG: {} written to PIN {}".format(v, pin)
+        return GPIO
     else:
-        v = config.get_boolean_value(value)
-
         import Adafruit_GPIO.GPIO as GPIO
-        GPIO.setup(pin, GPIO.OUT)
-        GPIO.output(pin, v)
-        GPIO.cleanup()
+        return GPIO.get_platform_gpio()
 
-        if verbose:
+
+class GPIOPinManager():
+    """ Output pins which are configured once and kept until cleanup().
+
+        The level of every pin written is remembered, writes which don't
+        change the level of a pin are skipped. Changes of the pin by other
+        processes are not noticed.
+    """
+
+    def __init__(self, gpio=None, verbose=False):
+        self.verbose = verbose
+        self.writes = 0
+        self.skipped = 0
+
+        self.__gpio = gpio
+        self.__levels = {}
+        self.__lock = threading.RLock()
+
+    def __backend(self):
+        if self.__gpio is None:
+            self.__gpio = open_gpio(self.verbose)
+        return self.__gpio
+
+    def level(self, pin):
+        with self.__lock:
+            return self.__levels.get(pin)
+
+    def write(self, pin, value):
+        v = str_2_one_zero(value)
+
+        with self.__lock:
+            if pin not in self.__levels:
+                gpio = self.__backend()
+                gpio.setup(pin, getattr(gpio, 'OUT', OUT))
+            elif self.__levels[pin] == v:
+                self.skipped += 1
+                if self.verbose:
+                    print "DBG: PIN {} is already {}".format(pin, v)
+                return
+
+            self.__backend().output(pin, v)
+            self.__levels[pin] = v
+            self.writes += 1
+
+        if self.verbose:
             print "DBG: {} written to PIN {}".format(v, pin)
 
+    def write_all(self, values):
+        """ Writes a mapping of pins to values. All values are checked before
+            the first pin is written. The pins are written one after another
+            while holding the lock, so no other write of this process comes in
+            between, but the writes are not atomic for other processes.
+        """
+        levels = OrderedDict((pin, str_2_one_zero(value)) for pin, value in values.items())
+        changed = []
+
+        with self.__lock:
+            gpio = self.__backend()
+
+            for pin, v in levels.items():
+                if pin not in self.__levels:
+                    gpio.setup(pin, getattr(gpio, 'OUT', OUT))
+                elif self.__levels[pin] == v:
+                    self.skipped += 1
+                    continue
+
+                gpio.output(pin, v)
+                self.__levels[pin] = v
+                self.writes += 1
+                changed.append((pin, v))
+
+        if self.verbose:
+            for pin, v in changed:
+                print "DBG: {} written to PIN {}".format(v, pin)
+
+    def cleanup(self):
+        with self.__lock:
+            if self.__levels:
+                self.__backend().cleanup()
+                self.__levels.clear()
+
 
 def str_2_one_zero(value):
     if config.get_boolean_value(value):
@@ -46,20 +46,15 @@ setup(
 
     scripts = ['scripts/gpioread',
                'scripts/gpiowrite',
-               'scripts/mqttgpiobind'],
+               'scripts/mqttgpiobind',
+               'scripts/gpiomqttpublish'],
 
-    data_files=[('gpio_device_tools/templates/temp', ['gpio_device_tools/templates/temp/template.txt',
-                                                      'gpio_device_tools/templates/temp/template.json',
-                                                      'gpio_device_tools/templates/temp/template.xml']),
-                ('gpio_device_tools/templates/temp_hum', ['gpio_device_tools/templates/temp_hum/template.txt',
-                                                          'gpio_device_tools/templates/temp_hum/template.json',
-                                                          'gpio_device_tools/templates/temp_hum/template.xml']),
-                ('gpio_device_tools/templates/temp_pres_alt', ['gpio_device_tools/templates/temp_pres_alt/template.txt',
-                                                               'gpio_device_tools/templates/temp_pres_alt/template.json',
-                                                               'gpio_device_tools/templates/temp_pres_alt/template.xml'])],
+    data_files=[('gpio_device_tools/templates/temp', ['gpio_device_tools/templates/temp/template.txt']),
+                ('gpio_device_tools/templates/temp_hum', ['gpio_device_tools/templates/temp_hum/template.txt']),
+                ('gpio_device_tools/templates/temp_pres_alt', ['gpio_device_tools/templates/temp_pres_alt/template.txt'])],
 
     install_requires=[
-        'paho-mqtt>=1.2',
+        'paho-mqtt>=1.4',
         'Adafruit-GPIO>=1.0.1',
         'CHIP_IO>=0.2'
     ],
@@ -0,0 +1,151 @@
+""" Simulated hardware for the tests and benchmarks """
+import errno
+import fcntl
+import os
+import select
+import shutil
+import tempfile
+import threading
+
+from gpio_device_tools.gpioinput import SysfsGPIO, EDGE_BOTH, EDGE_RISING
+
+
+class FakeI2CDevice():
+    """ Simulated I2C device.
+
+        The first byte written selects a register, further bytes are written
+        to the following registers. Reads start at the selected register.
+        A single byte found in responses is treated as a command, the next
+        read returns its response. on_write(device, register, data) is called
+        after registers were written, e.g. to simulate a conversion.
+    """
+
+    def __init__(self, registers=None, responses=None, on_write=None):
+        self.registers = dict(registers or {})
+        self.responses = dict(responses or {})
+        self.on_write = on_write
+        self.__register = 0
+        self.__response = None
+
+    def write(self, data):
+        data = bytearray(data)
+        if not data:
+            return
+
+        if len(data) == 1 and data[0] in self.responses:
+            self.__response = bytearray(self.responses[data[0]])
+            return
+
+        self.__response = None
+        self.__register = data[0]
+        for i, value in enumerate(data[1:]):
+            self.registers[data[0] + i] = value
+
+        if self.on_write is not None and len(data) > 1:
+            self.on_write(self, data[0], data[1:])
+
+    def read(self, length):
+        if self.__response is not None:
+            return str(self.__response[:length])
+        return str(bytearray(self.registers.get(self.__register + i, 0) for i in range(length)))
+
+
+class FakeI2CBus():
+    """ I2C bus with simulated devices by address, see FakeI2CDevice """
+
+    def __init__(self, devices=None):
+        self.devices = dict(devices or {})
+        self.lock = threading.RLock()
+        self.transactions = 0
+
+    def __device(self, address):
+        device = self.devices.get(address)
+        if device is None:
+            raise IOError(errno.EREMOTEIO, 'No device at address 0x{:02x}'.format(address))
+        return device
+
+    def write(self, address, data):
+        with self.lock:
+            self.__device(address).write(data)
+            self.transactions += 1
+
+    def read(self, address, length):
+        with self.lock:
+            self.transactions += 1
+            return self.__device(address).read(length)
+
+    def write_read(self, address, data, length):
+        with self.lock:
+            device = self.__device(address)
+            device.write(data)
+            self.transactions += 1
+            return device.read(length)
+
+    def close(self):
+        pass
+
+
+class FakeSysfsGPIO(SysfsGPIO):
+    """ A sysfs GPIO tree in a temporary directory.
+
+        Exporting a pin creates its directory like the kernel does.
+        set_value() changes the value of a pin and signals the edge through
+        a pipe, as poll() on regular files always returns at once. Like the
+        kernel only the edges selected in the edge file are signalled.
+    """
+
+    poll_events = select.POLLIN
+
+    def __init__(self):
+        SysfsGPIO.__init__(self, tempfile.mkdtemp(prefix='gpio-'))
+        open(os.path.join(self.root, 'export'), 'w').close()
+        open(os.path.join(self.root, 'unexport'), 'w').close()
+        # read end -> (write end, pin)
+        self.__pipes = {}
+
+    def export(self, pin):
+        if not os.path.isdir(self.pin_dir(pin)):
+            os.mkdir(self.pin_dir(pin))
+            for name, value in (('direction', 'in'), ('edge', 'none'), ('value', '0')):
+                with open(os.path.join(self.pin_dir(pin), name), 'w') as f:
+                    f.write(value)
+
+    def attribute(self, pin, name):
+        with open(os.path.join(self.pin_dir(pin), name)) as f:
+            return f.read()
+
+    def set_value(self, pin, value):
+        old = int(self.attribute(pin, 'value').strip() or 0)
+        with open(os.path.join(self.pin_dir(pin), 'value'), 'w') as f:
+            f.write('{}\n'.format(value))
+
+        edge = self.attribute(pin, 'edge').strip()
+        if value == old or edge == 'none' or (edge != EDGE_BOTH and (edge == EDGE_RISING) != bool(value)):
+            return
+
+        for w, p in self.__pipes.values():
+            if p == pin:
+                os.write(w, 'x')
+
+    def open(self, pin):
+        r, w = os.pipe()
+        fcntl.fcntl(r, fcntl.F_SETFL, fcntl.fcntl(r, fcntl.F_GETFL) | os.O_NONBLOCK)
+        self.__pipes[r] = (w, pin)
+        return r
+
+    def read(self, fd):
+        try:
+            os.read(fd, 1024)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+        with open(os.path.join(self.pin_dir(self.__pipes[fd][1]), 'value')) as f:
+            return int(f.read().strip() or 0)
+
+    def close(self, fd):
+        w, pin = self.__pipes.pop(fd)
+        os.close(fd)
+        os.close(w)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
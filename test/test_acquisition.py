@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from gpio_device_tools import acquisition
+from gpio_device_tools import config
+
+
+def sensor_cfg(sensor_type, param=None):
+    cfg = config.ConfigItem()
+    cfg.sensor_type = sensor_type
+    cfg.sensor_param = param
+    return cfg
+
+
+class TestAcquisition(unittest.TestCase):
+
+    def test_group_by_resource(self):
+        cfgs = [sensor_cfg('ds1820', '10-00080234149b'),
+                sensor_cfg('htu21', '1'),
+                sensor_cfg('dht22', '4'),
+                sensor_cfg('ds1820', '10-00080234149c'),
+                sensor_cfg('bmp085', '1'),
+                sensor_cfg('bmp085', '2'),
+                sensor_cfg('dummy'),
+                sensor_cfg('dummy')]
+
+        groups = acquisition.group_by_resource(cfgs).values()
+
+        self.assertEqual(6, len(groups))
+        self.assertEqual([cfgs[0], cfgs[3]], groups[0])
+        self.assertEqual([cfgs[1], cfgs[4]], groups[1])
+        self.assertEqual([cfgs[2]], groups[2])
+        self.assertEqual([cfgs[5]], groups[3])
+        self.assertEqual([cfgs[6]], groups[4])
+        self.assertEqual([cfgs[7]], groups[5])
+
+    def test_read_groups(self):
+        cfgs = [sensor_cfg('htu21', '1'),
+                sensor_cfg('htu21', '2'),
+                sensor_cfg('htu21', '1')]
+        lock = threading.Lock()
+        read = []
+
+        def read_fn(cfg):
+            time.sleep(0.1)
+            with lock:
+                read.append(cfg)
+
+        start = time.time()
+        acquisition.read_groups(acquisition.group_by_resource(cfgs), read_fn)
+        duration = time.time() - start
+
+        self.assertEqual(3, len(read))
+        self.assertTrue(read.index(cfgs[0]) < read.index(cfgs[2]))
+        self.assertTrue(duration < 0.29)
+
+    def test_prepare_in_worker(self):
+        cfgs = [sensor_cfg('ds1820', '10-00080234149b'),
+                sensor_cfg('ds1820', '10-00080234149c'),
+                sensor_cfg('htu21', '1')]
+        lock = threading.Lock()
+        prepared = []
+        read = []
+
+        def prepare_fn(group):
+            time.sleep(0.1)
+            with lock:
+                prepared.append((group, threading.current_thread()))
+
+        def read_fn(cfg):
+            time.sleep(0.1)
+            with lock:
+                read.append((cfg, threading.current_thread()))
+
+        start = time.time()
+        acquisition.read_groups(acquisition.group_by_resource(cfgs), read_fn, prepare_fn)
+        duration = time.time() - start
+
+        self.assertEqual(2, len(prepared))
+        group, thread = [item for item in prepared if item[0][0] is cfgs[0]][0]
+        self.assertEqual([cfgs[0], cfgs[1]], group)
+        # the group is prepared by the worker which reads its sensors
+        self.assertEqual([thread, thread], [t for cfg, t in read if cfg in group])
+        # the preparation of the w1 group overlaps the I2C group
+        self.assertTrue(duration < 0.39)
+
+
+if __name__ == '__main__':
+    unittest.main()
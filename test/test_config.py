@@ -19,6 +19,16 @@ class TestSensorConfig(unittest.TestCase):
         self.assertEqual('Temp-1', self.cfg.sensors[0].id)
         self.assertEqual('Temperature 1', self.cfg.sensors[0].label)
         self.assertEqual('/test/abc', self.cfg.sensors[0].topic)
+        self.assertEqual(30, self.cfg.sensors[0].interval)
+        self.assertEqual(5, self.cfg.sensors[0].jitter)
+        self.assertEqual(0.5, self.cfg.sensors[0].deadbands[None].value)
+        self.assertEqual(False, self.cfg.sensors[0].deadbands[None].percent)
+        self.assertEqual(2, self.cfg.sensors[0].deadbands['humidity'].value)
+        self.assertEqual(True, self.cfg.sensors[0].deadbands['humidity'].percent)
+        self.assertEqual(600, self.cfg.sensors[0].heartbeat)
+        self.assertEqual(None, self.cfg.sensors[0].mode)
+        self.assertEqual(None, self.cfg.sensors[0].resolution)
+        self.assertEqual(4, self.cfg.sensors[0].samples)
 
         self.assertEqual(2, self.cfg.sensors[1].out_channel)
         self.assertEqual('path/test.json', self.cfg.sensors[1].out_file)
@@ -29,6 +39,12 @@ class TestSensorConfig(unittest.TestCase):
         self.assertEqual('ID', self.cfg.sensors[1].id)
         self.assertEqual('Label', self.cfg.sensors[1].label)
         self.assertEqual(None, self.cfg.sensors[1].topic)
+        self.assertEqual(120, self.cfg.sensors[1].interval)
+        self.assertEqual(0, self.cfg.sensors[1].jitter)
+        self.assertEqual({}, self.cfg.sensors[1].deadbands)
+        self.assertEqual(None, self.cfg.sensors[1].heartbeat)
+        self.assertEqual(1, self.cfg.sensors[1].samples)
+        self.assertEqual(2, self.cfg.sensors[1].retries)
 
     def test_sensors2(self):
         self.cfg = config.SensorConfigReader("test/sensors2.cfg")
@@ -83,10 +99,19 @@ class TestMqttBindingConfig(unittest.TestCase):
         self.assertEqual('test/value', self.cfg.bindings[0].topic)
         self.assertEqual('XIO-P4', self.cfg.bindings[0].pin)
         self.assertEqual(True, self.cfg.bindings[0].invert)
+        self.assertEqual(None, self.cfg.bindings[0].min_interval)
 
         self.assertEqual('test/value2', self.cfg.bindings[1].topic)
         self.assertEqual('XIO-P5', self.cfg.bindings[1].pin)
         self.assertEqual(False, self.cfg.bindings[1].invert)
+        self.assertEqual(0.5, self.cfg.bindings[1].min_interval)
+        self.assertEqual(None, self.cfg.bindings[1].qos)
+
+        self.assertEqual(1, len(self.cfg.input_bindings))
+        self.assertEqual('test/button', self.cfg.input_bindings[0].topic)
+        self.assertEqual('1013', self.cfg.input_bindings[0].pin)
+        self.assertEqual('rising', self.cfg.input_bindings[0].edge)
+        self.assertEqual(0.05, self.cfg.input_bindings[0].debounce)
 
     def test_mqttd_invalid(self):
         with self.assertRaises(Exception) as context:
@@ -107,8 +132,12 @@ class TestMqttServerConfig(unittest.TestCase):
         self.assertEqual('3333', self.cfg.port)
         self.assertEqual('gpio-device-tools', self.cfg.client_id)
         self.assertEqual(1, self.cfg.qos)
+        self.assertEqual(100, self.cfg.subscribe_batch_size)
         self.assertEqual(True, self.cfg.retain)
         self.assertEqual(42, self.cfg.keepalive)
+        self.assertEqual(1000, self.cfg.queue_size)
+        self.assertEqual(1, self.cfg.reconnect_min_delay)
+        self.assertEqual(120, self.cfg.reconnect_max_delay)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,39 @@
+import unittest
+from gpio_device_tools import crc
+
+
+def bitwise_crc8(data, poly, reflected):
+    crc8 = 0
+    for b in bytearray(data):
+        crc8 ^= b
+        for i in range(8):
+            if reflected:
+                crc8 = (crc8 >> 1) ^ poly if crc8 & 0x01 else crc8 >> 1
+            else:
+                crc8 = ((crc8 << 1) ^ poly) & 0xFF if crc8 & 0x80 else (crc8 << 1) & 0xFF
+    return crc8
+
+
+class TestCrc(unittest.TestCase):
+
+    def test_sensirion(self):
+        # HTU21D datasheet example
+        self.assertEqual(0x79, crc.crc8_sensirion('\xDC'))
+        self.assertEqual(0x7C, crc.crc8_sensirion([0x68, 0x3A]))
+        self.assertTrue(crc.check_sensirion('\x4E\x85\x6B'))
+        self.assertFalse(crc.check_sensirion('\x4E\x85\x6A'))
+
+    def test_maxim(self):
+        scratchpad = '37004b46ffff07101e'.decode('hex')
+        self.assertEqual(0x1E, crc.crc8_maxim(scratchpad[:8]))
+        self.assertTrue(crc.check_maxim(scratchpad))
+        self.assertFalse(crc.check_maxim(scratchpad[:8] + '\x1F'))
+
+    def test_tables(self):
+        data = ''.join(chr(i) for i in range(256))
+        self.assertEqual(bitwise_crc8(data, 0x31, False), crc.crc8_sensirion(data))
+        self.assertEqual(bitwise_crc8(data, 0x8C, True), crc.crc8_maxim(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date
+from gpio_device_tools import csvwriter
+
+
+class TestCsvWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'data', 'sensors.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, fn=None):
+        with open(fn or self.fn) as f:
+            return f.read()
+
+    def test_buffering(self):
+        writer = csvwriter.CsvWriter(self.fn, flush_size=30, flush_interval=0)
+        writer.write('Header\n', 'line 1\n')
+        self.assertEqual('', self.read())
+
+        writer.write('Header\n', 'line 2\n')
+        writer.write('Header\n', 'line 3\n')
+        writer.write('Header\n', 'line 4\n')
+        self.assertEqual('Header\nline 1\nline 2\nline 3\nline 4\n', self.read())
+
+        writer.write('Header\n', 'line 5\n')
+        writer.close()
+        self.assertEqual('Header\nline 1\nline 2\nline 3\nline 4\nline 5\n', self.read())
+
+    def test_append_without_header(self):
+        writer = csvwriter.CsvWriter(self.fn)
+        writer.write('Header\n', 'line 1\n')
+        writer.close()
+
+        writer = csvwriter.CsvWriter(self.fn)
+        writer.write('Header\n', 'line 2\n')
+        writer.close()
+        self.assertEqual('Header\nline 1\nline 2\n', self.read())
+
+    def test_size_rotation(self):
+        writer = csvwriter.CsvWriter(self.fn, flush_size=0, rotate='size',
+                                     max_size=21, compress=True)
+        for i in range(5):
+            writer.write('Header\n', 'line {}\n'.format(i))
+        writer.close()
+
+        rotated = sorted(fn for fn in os.listdir(os.path.dirname(self.fn))
+                         if fn != 'sensors.csv')
+        self.assertEqual(2, len(rotated))
+        for fn in rotated:
+            self.assertTrue(fn.endswith('.csv.gz'))
+
+        contents = []
+        for fn in rotated:
+            with gzip.open(os.path.join(os.path.dirname(self.fn), fn)) as f:
+                contents.append(f.read())
+        self.assertEqual(['Header\nline 0\nline 1\n', 'Header\nline 2\nline 3\n'],
+                         sorted(contents))
+        self.assertEqual('Header\nline 4\n', self.read())
+
+    def rotated(self):
+        return sorted(fn for fn in os.listdir(os.path.dirname(self.fn))
+                      if fn != 'sensors.csv')
+
+    def test_size_rotation_of_existing_file(self):
+        # a new writer for every line like a gpioread run by cron
+        for i in range(5):
+            writer = csvwriter.CsvWriter(self.fn, flush_interval=0, rotate='size', max_size=21)
+            writer.write('Header\n', 'line {}\n'.format(i))
+            writer.close()
+
+        self.assertEqual(2, len(self.rotated()))
+        self.assertEqual('Header\nline 4\n', self.read())
+
+    def test_daily_rotation_of_existing_file(self):
+        writer = csvwriter.CsvWriter(self.fn, flush_interval=0, rotate='daily')
+        writer.write('Header\n', 'line 1\n')
+        writer.close()
+        two_days_ago = time.time() - 2 * 24 * 3600
+        os.utime(self.fn, (two_days_ago, two_days_ago))
+
+        writer = csvwriter.CsvWriter(self.fn, flush_interval=0, rotate='daily')
+        writer.write('Header\n', 'line 2\n')
+        writer.close()
+
+        self.assertEqual(['sensors-{}.csv'.format(date.fromtimestamp(two_days_ago).strftime('%Y-%m-%d'))],
+                         self.rotated())
+        self.assertEqual('Header\nline 2\n', self.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from gpio_device_tools import deadband, sensor
+
+
+class TestDeadbandFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.s = sensor.DummySensor()
+
+    def test_absolute(self):
+        f = deadband.DeadbandFilter({None: deadband.Deadband(0.5)})
+
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+        self.s.temperature = 20.5
+        self.assertEqual([], f.changed_data_types(self.s))
+        self.s.temperature = 20.7
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+        self.s.temperature = 20.3
+        self.assertEqual([], f.changed_data_types(self.s))
+        self.assertEqual(2, f.suppressed)
+
+    def test_percent(self):
+        f = deadband.DeadbandFilter({'temperature': deadband.Deadband(10, percent=True)})
+
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+        self.s.temperature = 22.0
+        self.assertEqual([], f.changed_data_types(self.s))
+        self.s.temperature = 22.5
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+
+    def test_heartbeat(self):
+        f = deadband.DeadbandFilter({None: deadband.Deadband(100)}, heartbeat=0)
+
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+
+    def test_without_deadband(self):
+        f = deadband.DeadbandFilter(heartbeat=3600)
+
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+        self.assertEqual([], f.changed_data_types(self.s))
+        self.s.temperature = 20.13
+        self.assertEqual(['temperature'], f.changed_data_types(self.s))
+
+
+class TestDeadbandChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.outputs = []
+        self.channel = deadband.DeadbandChannel(
+            self, deadband.DeadbandFilter({None: deadband.Deadband(0.5)}))
+        self.s1 = sensor.DummySensor(id='s1')
+        self.s2 = sensor.DummySensor(id='s2')
+
+    def output_data_types(self, sens, data_types):
+        self.outputs.append(('single', sens.id))
+
+    def output_batch(self, sensors):
+        self.outputs.append(('batch', [sens.id for sens in sensors]))
+
+    def test_output(self):
+        self.channel.output(self.s1)
+        self.channel.output(self.s1)
+
+        self.assertEqual([('single', 's1')], self.outputs)
+
+    def test_output_batch(self):
+        self.channel.output_batch([self.s1, self.s2])
+        self.s2.temperature = 21.0
+        self.channel.output_batch([self.s1, self.s2])
+        self.channel.output_batch([self.s1, self.s2])
+
+        self.assertEqual([('batch', ['s1', 's2']), ('batch', ['s2'])], self.outputs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import time
+import unittest
+from gpio_device_tools import dht
+
+
+class TestDHTWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.results = []
+        self.calls = 0
+        self.delay = 0
+
+    def read_once(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.results:
+            return self.results.pop(0)
+        return 45.0, 21.5
+
+    def test_read(self):
+        worker = dht.DHTWorker(self.read_once, min_interval=0.05)
+
+        humidity, temperature, timestamp = worker.read(1.0)
+        self.assertEqual((45.0, 21.5), (humidity, temperature))
+
+        # no new value within the minimum interval
+        self.assertEqual(timestamp, worker.read(1.0)[2])
+        self.assertEqual(1, self.calls)
+
+        time.sleep(0.06)
+        self.assertTrue(worker.read(1.0)[2] > timestamp)
+        self.assertEqual(2, self.calls)
+
+    def test_retry(self):
+        self.results = [(None, None), (None, None), (50.0, 20.0)]
+        worker = dht.DHTWorker(self.read_once, min_interval=0.01)
+
+        self.assertEqual((50.0, 20.0), worker.read(1.0)[:2])
+        self.assertEqual(3, self.calls)
+        # one of three attempts succeeded
+        self.assertEqual(8, worker.attempts())
+
+    def test_deadline(self):
+        worker = dht.DHTWorker(self.read_once, min_interval=0.01)
+        timestamp = worker.read(1.0)[2]
+
+        self.delay = 0.3
+        start = time.time()
+        humidity, temperature, last = worker.read(0.05)
+        self.assertTrue(time.time() - start < 0.2)
+        self.assertEqual(timestamp, last)
+
+    def test_no_value(self):
+        self.results = [(None, None)] * dht.MAX_ATTEMPTS
+        worker = dht.DHTWorker(self.read_once, min_interval=0.001)
+
+        self.assertEqual(None, worker.read(0.01))
+        self.assertEqual(dht.MAX_ATTEMPTS, worker.attempts())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,5 +62,19 @@ class TestDummySensor(unittest.TestCase):
                          self.s.json_format())
 
 
+class TestRunningMean(unittest.TestCase):
+
+    def test_mean(self):
+        mean = sensor.RunningMean(3)
+
+        self.assertEqual((1.0, 10.0), mean.add((1, 10)))
+        self.assertEqual((2.0, 10.0), mean.add((3, None)))
+        self.assertFalse(mean.is_filled())
+        self.assertEqual((3.0, 15.0), mean.add((5, 20)))
+        self.assertTrue(mean.is_filled())
+        self.assertEqual((5.0, 20.0), mean.add((7, None)))
+        self.assertEqual((None,), sensor.RunningMean(2).add((None,)))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
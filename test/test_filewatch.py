@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from gpio_device_tools import filewatch
+
+
+class TestFileWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'binding.cfg')
+        self.write('')
+        self.changed = threading.Event()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, text):
+        with open(self.fn, 'w') as f:
+            f.write(text)
+
+    def replace(self, text):
+        tmp_fn = self.fn + '.tmp'
+        with open(tmp_fn, 'w') as f:
+            f.write(text)
+        os.rename(tmp_fn, self.fn)
+
+    def watch(self, change, timeout=3, **kwargs):
+        watcher = filewatch.FileWatcher(self.fn, self.changed.set, **kwargs)
+        watcher.start()
+        try:
+            time.sleep(0.1)
+            change()
+            return self.changed.wait(timeout)
+        finally:
+            watcher.stop()
+
+    def test_inotify(self):
+        # polling would take longer than the timeout
+        self.assertTrue(self.watch(lambda: self.write('changed'), timeout=1, poll_interval=10))
+
+    def test_inotify_rename(self):
+        self.assertTrue(self.watch(lambda: self.replace('changed'), timeout=1, poll_interval=10))
+
+    def test_poll(self):
+        self.assertTrue(self.watch(lambda: self.write('changed'), poll_interval=0.1, use_inotify=False))
+
+    def test_unchanged(self):
+        self.assertFalse(self.watch(lambda: os.utime(self.dir, None), timeout=0.5))
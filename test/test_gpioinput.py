@@ -0,0 +1,130 @@
+import Queue
+import select
+import unittest
+from gpio_device_tools import config, gpioinput
+from gpio_device_tools.mqttinput import GpioMqttPublishService
+from test.fakes import FakeSysfsGPIO
+
+
+class FakePublisher():
+
+    def __init__(self):
+        self.msgs = Queue.Queue()
+
+    def publish(self, msgs):
+        for msg in msgs:
+            self.msgs.put(msg)
+
+
+class TestSysfsGPIO(unittest.TestCase):
+
+    def setUp(self):
+        self.gpio = FakeSysfsGPIO()
+
+    def tearDown(self):
+        self.gpio.cleanup()
+
+    def test_setup_input(self):
+        self.gpio.setup_input(7)
+
+        self.assertEqual('in', self.gpio.attribute(7, 'direction'))
+        self.assertEqual('both', self.gpio.attribute(7, 'edge'))
+
+    def test_read(self):
+        self.gpio.setup_input(7)
+        fd = self.gpio.open(7)
+        self.gpio.set_value(7, 1)
+
+        self.assertEqual(1, self.gpio.read(fd))
+        self.gpio.close(fd)
+
+    def test_fake_edge(self):
+        self.gpio.setup_input(7)
+        with open(self.gpio.pin_dir(7) + '/edge', 'w') as f:
+            f.write('rising')
+        fd = self.gpio.open(7)
+        poller = select.poll()
+        poller.register(fd, self.gpio.poll_events)
+
+        self.gpio.set_value(7, 1)
+        self.assertEqual(1, len(poller.poll(0)))
+        self.gpio.read(fd)
+        # the kernel doesn't signal edges which weren't selected
+        self.gpio.set_value(7, 0)
+        self.assertEqual([], poller.poll(0))
+        self.gpio.close(fd)
+
+
+class TestEdgeMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.gpio = FakeSysfsGPIO()
+        self.changes = Queue.Queue()
+        self.monitor = gpioinput.EdgeMonitor(self.gpio, lambda *change: self.changes.put(change))
+
+    def tearDown(self):
+        self.monitor.stop()
+        self.gpio.cleanup()
+
+    def next_change(self):
+        pin, level, edge_time = self.changes.get(timeout=2)
+        return pin, level
+
+    def test_changes(self):
+        for pin in range(1, 25):
+            self.monitor.add(pin, debounce=0)
+        self.monitor.start()
+        self.assertEqual(set((pin, 0) for pin in range(1, 25)),
+                         set(self.next_change() for pin in range(1, 25)))
+
+        self.gpio.set_value(12, 1)
+        self.assertEqual((12, 1), self.next_change())
+        self.gpio.set_value(24, 1)
+        self.assertEqual((24, 1), self.next_change())
+
+    def test_debounce(self):
+        self.monitor.add(5, debounce=0.1)
+        self.monitor.start()
+        self.assertEqual((5, 0), self.next_change())
+
+        # a glitch shorter than the debounce time
+        self.gpio.set_value(5, 1)
+        self.gpio.set_value(5, 0)
+        self.gpio.set_value(5, 1)
+        self.assertEqual((5, 1), self.next_change())
+        self.assertTrue(self.changes.empty())
+        self.gpio.set_value(5, 0)
+        self.gpio.set_value(5, 1)
+        self.assertRaises(Queue.Empty, self.changes.get, timeout=0.3)
+
+    def test_rising(self):
+        self.monitor.add(5, debounce=0, edge=gpioinput.EDGE_RISING)
+        self.monitor.start()
+        self.next_change()
+
+        for press in range(3):
+            self.gpio.set_value(5, 1)
+            self.assertEqual((5, 1), self.next_change())
+            self.gpio.set_value(5, 0)
+            # the release is noticed, but not reported
+            self.assertRaises(Queue.Empty, self.changes.get, timeout=0.1)
+
+        self.assertEqual(6, self.monitor.edges)
+
+
+class TestGpioMqttPublishService(unittest.TestCase):
+
+    def test_publish(self):
+        gpio = FakeSysfsGPIO()
+        publisher = FakePublisher()
+        binding = config.create_input_binding_cfg('test/button', '7', True, debounce=0)
+        service = GpioMqttPublishService(option_binding=binding, mqtt_cfg_file='test/mqtt.cfg',
+                                         gpio=gpio, publisher=publisher)
+        service.start()
+        try:
+            self.assertEqual({'topic': 'test/button', 'payload': '1', 'qos': 1, 'retain': True},
+                             publisher.msgs.get(timeout=2))
+            gpio.set_value('7', 1)
+            self.assertEqual('0', publisher.msgs.get(timeout=2)['payload'])
+        finally:
+            service.stop()
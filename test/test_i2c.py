@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import struct
+import time
+import unittest
+from gpio_device_tools import bmp085, crc, htu21d, i2c
+from test.fakes import FakeI2CBus, FakeI2CDevice
+
+# datasheet calibration of the BMP085
+BMP085_CALIBRATION = struct.pack('>hhhHHHhhhhh', 408, -72, -14383, 32741, 32757, 23153,
+                                 6190, 4, -32767, -8711, 2868)
+
+
+def fake_htu21d():
+    # datasheet examples: 0x683A = 24.69 °C, 0x4E85 = 32.34 %
+    def write_user_register(device, register, data):
+        if register == 0xE6:
+            device.registers[0xE7] = data[0]
+
+    return FakeI2CDevice(
+        registers={0xE7: 0x02},
+        responses={
+            0xFE: '',
+            0xE3: '\x68\x3A\x7C',
+            0xE5: '\x4E\x85\x6B',
+            0xF3: '\x68\x3A\x7C',
+            0xF5: '\x4E\x85\x6B'},
+        on_write=write_user_register)
+
+
+def fake_bmp085(ut=27898, up=23843, mode=1):
+    def convert(device, register, data):
+        if register == 0xF4 and data[0] == 0x2E:
+            value = struct.pack('>H', ut)
+        elif register == 0xF4:
+            value = struct.pack('>L', up << (8 - mode))[1:]
+        else:
+            return
+        for i, b in enumerate(bytearray(value)):
+            device.registers[0xF6 + i] = b
+
+    registers = dict((0xAA + i, b) for i, b in enumerate(bytearray(BMP085_CALIBRATION)))
+    registers[0xD0] = 0x55
+    return FakeI2CDevice(registers=registers, on_write=convert)
+
+
+class TestI2CDevice(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FakeI2CBus({0x20: FakeI2CDevice({0x10: 0x12, 0x11: 0xF4})})
+        self.dev = i2c.I2CDevice(0x20, self.bus)
+
+    def test_read(self):
+        self.assertEqual(0x12, self.dev.readU8(0x10))
+        self.assertEqual(-12, self.dev.readS8(0x11))
+        self.assertEqual(0x12F4, self.dev.readU16BE(0x10))
+        self.assertEqual(-0x0BEE, self.dev.readS16LE(0x10))
+        self.assertEqual(bytearray([0x12, 0xF4, 0]), self.dev.readList(0x10, 3))
+        self.assertEqual(5, self.bus.transactions)
+
+    def test_write(self):
+        self.dev.write16(0x30, 0x1234)
+        self.assertEqual(0x1234, self.dev.readU16LE(0x30))
+        self.dev.write8(0x30, 0x56)
+        self.assertEqual(0x56, self.dev.readRaw8())
+
+    def test_missing_device(self):
+        self.assertRaises(IOError, i2c.I2CDevice(0x21, self.bus).readU8, 0x10)
+
+
+class TestI2CSensors(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = FakeI2CBus({0x40: fake_htu21d(), 0x77: fake_bmp085()})
+        i2c.set_bus(7, self.bus)
+        bmp085.clear_calibrations()
+
+    def tearDown(self):
+        i2c.close_buses()
+
+    def test_htu21d(self):
+        s = htu21d.HTU21Sensor(param='7')
+
+        self.assertEqual('24.69', s.dictionary()['temperature'])
+        self.assertEqual('32.29', s.dictionary()['humidity'])
+
+    def test_htu21d_timed(self):
+        s = htu21d.HTU21Sensor(param='7')
+
+        start = time.time()
+        s.read()
+        self.assertTrue(time.time() - start < 0.1)
+        self.assertEqual('24.69', s.dictionary()['temperature'])
+
+    def test_htu21d_hold(self):
+        s = htu21d.HTU21Sensor(param='7', mode='hold')
+
+        start = self.bus.transactions
+        s.read()
+        self.assertEqual(2, self.bus.transactions - start)
+        self.assertEqual('32.29', s.dictionary()['humidity'])
+
+    def test_htu21d_poll(self):
+        device = self.bus.devices[0x40]
+        reads = []
+
+        def read(length):
+            # not acknowledged during the first polls
+            reads.append(length)
+            if len(reads) % 3 != 0:
+                raise IOError(121, 'Remote I/O error')
+            return FakeI2CDevice.read(device, length)
+
+        device.read = read
+        s = htu21d.HTU21Sensor(param='7', mode='poll')
+
+        self.assertEqual(6, len(reads))
+        self.assertEqual('24.69', s.dictionary()['temperature'])
+        self.assertRaises(ValueError, htu21d.HTU21Sensor, param='7', mode='fast')
+
+    def test_htu21d_checksum(self):
+        device = self.bus.devices[0x40]
+        device.responses[0xF5] = '\x4E\x85\x6A'
+        self.assertRaises(crc.ChecksumError, htu21d.HTU21Sensor, param='7')
+
+        s = htu21d.HTU21Sensor(param='7', retries=0, mode='hold')
+        responses = ['\x4E\x85\x6A', '\x4E\x85\x6B']
+        device.responses[0xE5] = responses[0]
+        self.assertRaises(crc.ChecksumError, s.read)
+
+        s.retries = 1
+        original = device.write
+
+        def write(data):
+            # the second attempt gets a valid checksum
+            if data == '\xE5':
+                device.responses[0xE5] = responses.pop(0)
+            original(data)
+
+        device.write = write
+        s.read()
+        self.assertEqual('32.29', s.dictionary()['humidity'])
+
+    def test_htu21d_resolution(self):
+        s = htu21d.HTU21Sensor(param='7', resolution=12, samples=3)
+
+        self.assertEqual(0x03, self.bus.devices[0x40].registers[0xE7])
+        self.assertEqual('24.69', s.dictionary()['temperature'])
+        self.assertRaises(ValueError, htu21d.HTU21Sensor, param='7', resolution=10)
+
+    def test_bmp085(self):
+        s = bmp085.BMP085Sensor(param='7')
+
+        self.assertEqual(15.0, s.temperature)
+        self.assertTrue(s.bmp._device.bus is self.bus)
+
+    def test_bmp085_read_all(self):
+        s = bmp085.BMP085Sensor(param='7')
+
+        start = self.bus.transactions
+        s.read()
+        # one temperature and one pressure conversion, each a write and a read
+        self.assertEqual(4, self.bus.transactions - start)
+
+        self.assertEqual(s.bmp.read_temperature(), s.temperature)
+        self.assertEqual(s.bmp.read_pressure(), s.pressure)
+        self.assertEqual(s.bmp.read_altitude(), s.altitude)
+
+    def test_bmp085_mode(self):
+        self.bus.devices[0x77] = fake_bmp085(mode=3)
+        s = bmp085.BMP085Sensor(param='7', mode='ultrahighres')
+
+        self.assertEqual(3, s.bmp._mode)
+        self.assertEqual(s.bmp.read_pressure(), s.pressure)
+        self.assertRaises(ValueError, bmp085.parse_mode, 'fast')
+
+    def test_bmp085_calibration(self):
+        bmp = bmp085.BMP085(busnum=7, i2c=i2c, load_calibration=False)
+
+        # one block read
+        start = self.bus.transactions
+        bmp085.load_calibration(bmp, 7)
+        self.assertEqual(1, self.bus.transactions - start)
+        self.assertEqual(408, bmp.cal_AC1)
+        self.assertEqual(2868, bmp.cal_MD)
+        self.assertEqual(-8711, bmp.cal_MC)
+
+        # kept in memory
+        start = self.bus.transactions
+        bmp085.load_calibration(bmp, 7)
+        self.assertEqual(0, self.bus.transactions - start)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gpio_device_tools.mqttbind import MqttGpioBindingService
+
+
+class FakeClient():
+
+    def __init__(self):
+        self.calls = []
+        self.mid = 0
+
+    def subscribe(self, topics):
+        self.calls.append(('subscribe', topics))
+        self.mid += 1
+        return 0, self.mid
+
+    def unsubscribe(self, topics):
+        self.calls.append(('unsubscribe', topics))
+        self.mid += 1
+        return 0, self.mid
+
+
+BINDINGS = """
+[binding1]
+topic = test/value
+pin = XIO-P4
+qos = 2
+
+[binding2]
+topic = test/{}
+pin = XIO-P5
+
+[mqtt]
+host = localhost
+qos = 1
+subscribe_batch_size = {}
+"""
+
+
+class BindingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'binding.cfg')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, topic, batch_size=100):
+        with open(self.fn, 'w') as f:
+            f.write(BINDINGS.format(topic, batch_size))
+
+    def connect(self):
+        self.service = MqttGpioBindingService(cfg_file=self.fn)
+        self.client = FakeClient()
+        self.service._MqttGpioBindingService__client = self.client
+        self.service.on_connect(self.client, None, None, 0)
+
+
+class TestSubscribe(BindingTestCase):
+
+    def test_single_packet(self):
+        self.write('value2')
+        self.connect()
+
+        self.assertEqual([('subscribe', [('test/value', 2), ('test/value2', 1)])], self.client.calls)
+
+    def test_batches(self):
+        self.write('value2', batch_size=1)
+        self.connect()
+
+        self.assertEqual([('subscribe', [('test/value', 2)]),
+                          ('subscribe', [('test/value2', 1)])], self.client.calls)
+
+    def test_ready(self):
+        self.write('value2', batch_size=1)
+        self.connect()
+        self.service._MqttGpioBindingService__connect_time = 0
+
+        self.service.on_subscribe(self.client, None, 1, (2,))
+        self.assertEqual(0, self.service._MqttGpioBindingService__connect_time)
+        self.service.on_subscribe(self.client, None, 2, (1,))
+        self.assertEqual(None, self.service._MqttGpioBindingService__connect_time)
+
+
+class TestBindingReload(BindingTestCase):
+
+    def setUp(self):
+        BindingTestCase.setUp(self)
+        self.write('value2')
+        self.connect()
+        self.client.calls = []
+
+    def test_resubscribe_changed_topics(self):
+        self.write('value3')
+        self.service.on_config_changed()
+
+        self.assertEqual([('unsubscribe', ['test/value2']), ('subscribe', [('test/value3', 1)])],
+                         self.client.calls)
+        self.assertEqual([('XIO-P5', False, None)], self.service.get_actions('test/value3'))
+        self.assertEqual([], self.service.get_actions('test/value2'))
+
+    def test_unchanged(self):
+        self.service.on_config_changed()
+        self.assertEqual([], self.client.calls)
+
+    def test_invalid_config(self):
+        with open(self.fn, 'w') as f:
+            f.write('[binding1]\npin = XIO-P4\n[mqtt]\n')
+        self.service.on_config_changed()
+
+        self.assertEqual([], self.client.calls)
+        self.assertEqual([('XIO-P5', False, None)], self.service.get_actions('test/value2'))
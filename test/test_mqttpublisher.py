@@ -0,0 +1,61 @@
+import unittest
+import paho.mqtt.client as mqtt
+from gpio_device_tools import config
+from gpio_device_tools.mqttpublisher import MqttPublisher
+
+
+class FakeInfo():
+
+    def __init__(self, mid):
+        self.rc = mqtt.MQTT_ERR_SUCCESS
+        self.mid = mid
+        self.published = False
+
+    def is_published(self):
+        return self.published
+
+
+class FakeClient():
+
+    def __init__(self):
+        self.infos = []
+
+    def publish(self, topic, payload, qos, retain):
+        info = FakeInfo(len(self.infos) + 1)
+        self.infos.append(info)
+        return info
+
+    def disconnect(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+
+class TestInFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.publisher = MqttPublisher(config.MqttServerConfigReader('test/mqtt.cfg'))
+        self.publisher._MqttPublisher__client.loop_stop()
+        self.client = FakeClient()
+        self.publisher._MqttPublisher__client = self.client
+
+    def tearDown(self):
+        self.publisher.close(0)
+
+    def publish(self, qos):
+        msg = {'topic': 'test/value', 'payload': '1', 'qos': qos, 'retain': False}
+        return self.publisher._MqttPublisher__publish(msg)
+
+    def test_bounded(self):
+        for i in range(1000):
+            self.publish(1)
+            # the broker acknowledges all but the last 3 messages
+            if i >= 3:
+                self.client.infos[i - 3].published = True
+
+        self.assertEqual(4, self.publisher.in_flight())
+
+    def test_qos0(self):
+        self.publish(0)
+        self.assertEqual(0, self.publisher.in_flight())
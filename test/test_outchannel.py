@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gpio_device_tools import outchannel, sensor
+
+
+class TestFileChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, 'out', 'sensor.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_output(self):
+        s = sensor.DummySensor(label='Test')
+        channel = outchannel.FileChannel(out_format='json', fn=self.fn)
+        channel.output(s)
+
+        with open(self.fn) as f:
+            self.assertEqual(s.json_format(), f.read())
+        self.assertEqual(['sensor.json'], os.listdir(os.path.dirname(self.fn)))
+
+    def test_skip_unchanged(self):
+        s = sensor.DummySensor(label='Test')
+        channel = outchannel.FileChannel(out_format='json', fn=self.fn, skip_unchanged=True)
+        channel.output(s)
+        inode = os.stat(self.fn).st_ino
+
+        # a new channel writing to the same file shares the last hash
+        channel = outchannel.FileChannel(out_format='json', fn=self.fn, skip_unchanged=True)
+        s.time = '2016-08-02T22:28:49'
+        channel.output(s)
+        self.assertEqual(inode, os.stat(self.fn).st_ino)
+
+        s.temperature = 21.0
+        channel.output(s)
+        self.assertNotEqual(inode, os.stat(self.fn).st_ino)
+        with open(self.fn) as f:
+            self.assertEqual(s.json_format(), f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+from gpio_device_tools import pinwriter
+
+
+class TestPinWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.written = []
+        self.gate = threading.Event()
+        self.writer = pinwriter.PinWriter(self.write)
+
+    def tearDown(self):
+        self.gate.set()
+        self.writer.stop()
+
+    def write(self, pin, value):
+        self.gate.wait(5)
+        self.written.append((pin, value))
+
+    def test_latest_value_wins(self):
+        self.writer.put('XIO-P4', '1')
+        time.sleep(0.05)
+        # the writer is blocked writing the first value
+        self.writer.put('XIO-P4', '0')
+        self.writer.put('XIO-P5', '1')
+        self.writer.put('XIO-P4', '1')
+        self.assertEqual(2, self.writer.depth())
+
+        self.gate.set()
+        self.writer.stop()
+
+        self.assertEqual([('XIO-P4', '1'), ('XIO-P5', '1'), ('XIO-P4', '1')], self.written)
+        self.assertEqual(1, self.writer.superseded)
+        self.assertEqual(3, self.writer.written)
+        self.assertEqual(2, self.writer.stats()['max_depth'])
+
+    def test_min_interval(self):
+        self.gate.set()
+        start = time.time()
+        for value in ['1', '0', '1', '0']:
+            self.writer.put('XIO-P4', value, min_interval=0.2)
+            time.sleep(0.01)
+        self.writer.stop()
+
+        self.assertEqual([('XIO-P4', '1'), ('XIO-P4', '0')], self.written)
+        self.assertEqual(2, self.writer.superseded)
+        self.assertTrue(time.time() - start >= 0.2)
+
+    def test_failed(self):
+        writer = pinwriter.PinWriter(lambda pin, value: 1 / 0)
+        writer.put('XIO-P4', '1')
+        writer.stop()
+
+        self.assertEqual(1, writer.failed)
+        self.assertEqual(0, writer.depth())
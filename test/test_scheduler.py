@@ -0,0 +1,181 @@
+import random
+import threading
+import unittest
+from copy import copy
+from gpio_device_tools import config, scheduler
+
+
+class FakeClockScheduler(scheduler.SensorScheduler):
+    """ Scheduler whose waits advance a fake clock instead of sleeping """
+
+    def __init__(self, *args, **kwargs):
+        scheduler.SensorScheduler.__init__(self, *args, **kwargs)
+        self.time = 1000.0
+
+    def now(self):
+        return self.time
+
+    def wait(self, delay):
+        self.time += delay
+        return False
+
+
+class FakeClock():
+    time = 0.0
+
+
+class NullChannel():
+
+    def output(self, sens):
+        pass
+
+
+class FakeSensor():
+
+    def __init__(self, sensor_cfg, clock):
+        self.sensor_cfg = sensor_cfg
+        self.clock = clock
+        self.read()
+
+    def read(self):
+        # seconds the next reading takes
+        self.clock.time += self.sensor_cfg.durations.pop(0) if self.sensor_cfg.durations else 0
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.samples = []
+        self.failures = []
+
+    def sensor_cfg(self, interval=10.0, jitter=0.0, durations=None, failures=0):
+        cfg = config.ConfigItem()
+        cfg.sensor_type = 'dummy'
+        cfg.sensor_param = str(len(self.failures))
+        cfg.interval = interval
+        cfg.jitter = jitter
+        cfg.durations = durations or []
+        self.failures.append(failures)
+        return cfg
+
+    def run_scheduler(self, sensor_cfgs, samples, **kwargs):
+        sched = FakeClockScheduler(sensor_cfgs, self.create_sensor, self.create_channel, **kwargs)
+        self.sched = sched
+        self.stop_after = samples
+        sched.run()
+        return sched
+
+    def create_sensor(self, sensor_cfg):
+        index = int(sensor_cfg.sensor_param)
+        if self.failures[index] > 0:
+            self.failures[index] -= 1
+            raise IOError('no sensor')
+        return FakeSensor(sensor_cfg, self.sched)
+
+    def create_channel(self, sensor_cfg):
+        test = self
+
+        class Channel():
+            def output(self, sens):
+                test.samples.append((sens.sensor_cfg.sensor_param, test.sched.time - 1000.0))
+                if len(test.samples) >= test.stop_after:
+                    test.sched.stop()
+
+        return Channel()
+
+
+class TestSensorScheduler(SchedulerTestCase):
+
+    def test_interval(self):
+        self.run_scheduler([self.sensor_cfg()], 3)
+
+        self.assertEqual([('0', 0.0), ('0', 10.0), ('0', 20.0)], self.samples)
+
+    def test_phase(self):
+        self.run_scheduler([self.sensor_cfg(jitter=5.0), self.sensor_cfg(jitter=5.0)], 4)
+
+        phases = dict(self.samples[:2])
+        self.assertEqual(set(['0', '1']), set(phases))
+        for sens, phase in phases.items():
+            self.assertTrue(0.0 <= phase <= 5.0)
+            self.assertAlmostEqual(phase + 10.0, dict(self.samples[2:])[sens])
+
+    def test_overrun(self):
+        sched = self.run_scheduler([self.sensor_cfg(durations=[0, 25])], 3)
+
+        # the second reading took until 35, the samples of 20 and 30 are missed
+        self.assertEqual([('0', 0.0), ('0', 35.0), ('0', 40.0)], self.samples)
+        self.assertEqual(2, sched.tasks[0].missed)
+        self.assertEqual(3, sched.tasks[0].samples)
+
+    def test_failed_sensor_retried(self):
+        sched = self.run_scheduler([self.sensor_cfg(failures=3)], 2)
+
+        # tried at 0, 10, 30 and 70, then sampled on its interval again
+        self.assertEqual([('0', 70.0), ('0', 80.0)], self.samples)
+        self.assertEqual(0, sched.tasks[0].failures)
+
+    def test_unsupported_sensor_retried(self):
+        created = []
+
+        def create_sensor(sensor_cfg):
+            created.append(self.sched.time - 1000.0)
+            if len(created) == 1:
+                return None
+            return FakeSensor(sensor_cfg, self.sched)
+
+        self.create_sensor = create_sensor
+        self.run_scheduler([self.sensor_cfg()], 1)
+
+        self.assertEqual([0.0, 10.0], created)
+        self.assertEqual([('0', 10.0)], self.samples)
+
+    def test_expand(self):
+        scans = [['a', 'b'], ['b', 'c']]
+
+        def expand(sensor_cfg):
+            # sensor a is removed and c attached before the second scan
+            attached = scans.pop(0) if len(scans) > 1 else scans[0]
+            items = []
+            for sens_id in attached:
+                item = copy(sensor_cfg)
+                item.sensor_param = sens_id
+                items.append(item)
+            return items
+
+        self.create_sensor = lambda sensor_cfg: FakeSensor(sensor_cfg, self.sched)
+        cfg = self.sensor_cfg()
+        cfg.sensor_param = '*'
+        self.run_scheduler([cfg], 9, expand=expand, expand_interval=25.0)
+
+        self.assertEqual([('a', 0.0), ('b', 0.0), ('a', 10.0), ('b', 10.0), ('a', 20.0), ('b', 20.0),
+                          ('c', 25.0), ('b', 30.0), ('c', 35.0)], self.samples)
+        self.assertEqual(['b', 'c'], [task.sensor_cfg.sensor_param for task in self.sched.tasks])
+
+    def test_backoff_limit(self):
+        task = scheduler.SensorTask(self.sensor_cfg(interval=60.0), None, None)
+
+        task.failures = 1
+        self.assertEqual(60.0, task.backoff())
+        task.failures = 4
+        self.assertEqual(480.0, task.backoff())
+        task.failures = 100
+        self.assertEqual(scheduler.MAX_BACKOFF, task.backoff())
+
+    def test_stop(self):
+        sched = scheduler.SensorScheduler(
+            [self.sensor_cfg(interval=3600.0)],
+            lambda sensor_cfg: FakeSensor(sensor_cfg, FakeClock()),
+            lambda sensor_cfg: NullChannel())
+        thread = threading.Thread(target=sched.run)
+        thread.start()
+
+        sched.stop()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(sched.tasks[0].samples <= 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
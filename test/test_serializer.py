@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from xml.dom import minidom
+from gpio_device_tools import config, serializer, sensor
+
+
+class HumiditySensor(sensor.DummySensor):
+
+    def __init__(self, label):
+        sensor.DummySensor.__init__(self, id='hum', label=label)
+
+    def type(self):
+        return 'dht22'
+
+    def template_type(self):
+        return None
+
+    def sensor_data_types(self):
+        return ['temperature', 'humidity']
+
+    def dictionary(self):
+        dictionary = sensor.DummySensor.dictionary(self)
+        dictionary.update(humidity='55.00', humidityUnit='%')
+        return dictionary
+
+
+class AgedSensor(HumiditySensor):
+
+    def dictionary(self):
+        dictionary = HumiditySensor.dictionary(self)
+        dictionary.update(age='3.5')
+        return dictionary
+
+
+class TestSerializer(unittest.TestCase):
+
+    def setUp(self):
+        self.s1 = sensor.DummySensor(label='Test')
+        self.s2 = HumiditySensor(label='<"Cellar" & Garage>')
+
+    def test_json(self):
+        doc = json.loads(self.s2.json_format())
+
+        self.assertEqual('dht22', doc['type'])
+        self.assertEqual('<"Cellar" & Garage>', doc['label'])
+        self.assertEqual({'value': '55.00', 'unit': '%'}, doc['data']['humidity'])
+
+    def test_json_batch(self):
+        docs = json.loads(serializer.get_serializer('json').dumps_batch([self.s1, self.s2]))
+
+        self.assertEqual(2, len(docs))
+        self.assertEqual('20.12', docs[0]['temperature']['value'])
+        self.assertEqual('20.12', docs[1]['data']['temperature']['value'])
+        self.assertEqual([], json.loads(serializer.get_serializer('json').dumps_batch([])))
+
+    def test_xml(self):
+        doc = minidom.parseString(self.s2.xml_format())
+
+        self.assertEqual('<"Cellar" & Garage>',
+                         doc.getElementsByTagName('label')[0].firstChild.data)
+        humidity = doc.getElementsByTagName('humidity')[0]
+        self.assertEqual('%', humidity.getAttribute('unit'))
+        self.assertEqual('55.00', humidity.firstChild.data)
+
+    def test_xml_batch(self):
+        doc = minidom.parseString(serializer.get_serializer('xml').dumps_batch([self.s1, self.s2]))
+
+        self.assertEqual(2, len(doc.getElementsByTagName('sensor')))
+
+    def test_text(self):
+        self.assertEqual('Label: <"Cellar" & Garage>\n'
+                         'Type : dht22\n'
+                         'Time : 2016-08-02T22:27:49\n'
+                         'Temperature: 20.12 C\n'
+                         'Humidity: 55.00 %',
+                         self.s2.text_format())
+
+    def test_age(self):
+        s = AgedSensor(label='Cellar')
+
+        self.assertEqual('3.5', json.loads(s.json_format())['age'])
+        self.assertFalse('age' in json.loads(self.s2.json_format()))
+        doc = minidom.parseString(s.xml_format())
+        self.assertEqual('3.5', doc.getElementsByTagName('age')[0].firstChild.data)
+        self.assertIn('Time : 2016-08-02T22:27:49\nAge  : 3.5 s\n', s.text_format())
+
+    def test_text_batch(self):
+        text = serializer.get_serializer(config.TEXT_FORMAT).dumps_batch([self.s1, self.s2])
+
+        self.assertEqual(self.s1.text_format() + '\n\n' + self.s2.text_format(), text)
+        self.assertIn('Temperature: 20.12 °C', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
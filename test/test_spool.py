@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gpio_device_tools import spool
+
+
+def message(i):
+    return {'topic': 'sensor/test/temperature/{}'.format(i),
+            'payload': '{:.2f}'.format(i),
+            'qos': 1,
+            'retain': True}
+
+
+class TestMessageSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def segments(self):
+        return sorted(fn for fn in os.listdir(self.dir) if fn.startswith('segment-'))
+
+    def test_replay_in_order(self):
+        s = spool.MessageSpool(self.dir)
+        self.assertFalse(s.has_backlog())
+
+        s.append([message(i) for i in range(5)])
+        s.append([message(5)])
+        self.assertTrue(s.has_backlog())
+
+        records = s.read(4)
+        self.assertEqual([message(i)['topic'] for i in range(4)],
+                         [msg['topic'] for msg, position in records])
+
+        s.commit(records[1][1])
+        records = s.read(10)
+        self.assertEqual([message(i)['topic'] for i in range(2, 6)],
+                         [msg['topic'] for msg, position in records])
+
+        s.commit(records[-1][1])
+        self.assertFalse(s.has_backlog())
+        s.close()
+
+    def test_reopen(self):
+        s = spool.MessageSpool(self.dir)
+        s.append([message(i) for i in range(3)])
+        s.commit(s.read(1)[0][1])
+        s.close()
+
+        s = spool.MessageSpool(self.dir)
+        records = s.read(10)
+        self.assertEqual(2, len(records))
+        self.assertEqual(message(1)['topic'], records[0][0]['topic'])
+        s.close()
+
+    def test_truncated_record(self):
+        s = spool.MessageSpool(self.dir)
+        s.append([message(0)])
+        s.close()
+
+        with open(os.path.join(self.dir, self.segments()[-1]), 'ab') as f:
+            f.write('{"topic":"cut')
+
+        s = spool.MessageSpool(self.dir)
+        s.append([message(1)])
+        self.assertEqual(2, len(self.segments()))
+        self.assertEqual([message(0)['topic'], message(1)['topic']],
+                         [msg['topic'] for msg, position in s.read(10)])
+        s.close()
+
+    def test_size_limit(self):
+        s = spool.MessageSpool(self.dir, max_size=8 * 1024, segment_size=1024)
+        for i in range(500):
+            s.append([message(i)])
+
+        size = sum(os.path.getsize(os.path.join(self.dir, fn)) for fn in self.segments())
+        self.assertTrue(size <= 8 * 1024)
+        self.assertTrue(s.evicted > 0)
+
+        records = s.read(1000)
+        self.assertEqual(message(499)['topic'], records[-1][0]['topic'])
+        self.assertTrue(len(records) < 500)
+        s.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
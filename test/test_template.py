@@ -0,0 +1,30 @@
+import unittest
+from string import Template
+from gpio_device_tools import template
+
+
+class TestCompiledTemplate(unittest.TestCase):
+
+    def assertRenders(self, source, mapping):
+        self.assertEqual(Template(source).safe_substitute(mapping),
+                         template.CompiledTemplate(source).render(mapping))
+
+    def test_placeholders(self):
+        self.assertRenders('$a and ${b}!', {'a': 'x', 'b': 'y'})
+        self.assertRenders('$a$b', {'a': 1, 'b': 2.5})
+        self.assertRenders('${a}b', {'a': 'x'})
+
+    def test_safe_substitute(self):
+        self.assertRenders('$a and $missing', {'a': 'x'})
+        self.assertRenders('costs $$5 $', {})
+        self.assertRenders('$ {a} $1', {'a': 'x'})
+        self.assertRenders('', {})
+
+    def test_registry(self):
+        tpl = template.get_template('temp', 'txt')
+        self.assertIs(tpl, template.get_template('temp', 'txt'))
+        self.assertIsNot(tpl, template.get_template('temp_hum', 'txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from gpio_device_tools import config, topicindex
+from gpio_device_tools.mqttbind import MqttGpioBindingService
+
+
+def binding(topic, pin, invert=False):
+    return config.create_binding_cfg(topic, pin, invert)
+
+
+class TestTopicIndex(unittest.TestCase):
+
+    def test_exact(self):
+        b1 = binding('relay/1', 'XIO-P1')
+        b2 = binding('relay/1', 'XIO-P2')
+        index = topicindex.TopicIndex([b1, b2, binding('relay/2', 'XIO-P3')])
+
+        self.assertEqual([(b1, ()), (b2, ())], index.match('relay/1'))
+        self.assertEqual([], index.match('relay/3'))
+        self.assertEqual(3, len(index))
+
+    def test_single_level(self):
+        b = binding('house/+/relay/+', 'XIO-P{1}')
+        index = topicindex.TopicIndex([b])
+
+        self.assertEqual([(b, ('kitchen', '4'))], index.match('house/kitchen/relay/4'))
+        self.assertEqual([], index.match('house/kitchen/relay'))
+        self.assertEqual([], index.match('house/kitchen/relay/4/state'))
+
+    def test_multi_level(self):
+        b = binding('relay/#', 'XIO-P{0}')
+        index = topicindex.TopicIndex([b, binding('#', 'XIO-P7')])
+
+        self.assertIn((b, ('a/b',)), index.match('relay/a/b'))
+        self.assertIn((b, ('',)), index.match('relay'))
+        self.assertEqual(2, len(index.match('relay/5')))
+        self.assertEqual([], index.match('$SYS/broker'))
+
+    def test_topics(self):
+        index = topicindex.TopicIndex([
+            binding('relay/1', 'XIO-P1'),
+            binding('relay/+', 'XIO-P{0}'),
+            binding('relay/+', 'XIO-P{0}', True),
+            binding('sensor/#', 'XIO-P7')])
+
+        self.assertEqual(['relay/+', 'relay/1', 'sensor/#'], sorted(index.topics()))
+
+    def test_invalid(self):
+        index = topicindex.TopicIndex()
+        self.assertRaises(ValueError, index.add, binding('relay/#/1', 'XIO-P1'))
+        self.assertRaises(ValueError, index.add, binding('relay/a+', 'XIO-P1'))
+
+
+class TestBindingActions(unittest.TestCase):
+
+    def test_actions(self):
+        service = MqttGpioBindingService(cfg_file='test/mqttd.cfg')
+
+        self.assertEqual([('XIO-P4', True, None)], service.get_actions('test/value'))
+        self.assertEqual([], service.get_actions('test/other'))
+
+    def test_pin_from_topic(self):
+        service = MqttGpioBindingService(
+            option_binding=binding('relay/+', 'XIO-P{0}'),
+            mqtt_cfg_file='test/mqtt.cfg')
+
+        self.assertEqual([('XIO-P3', False, None)], service.get_actions('relay/3'))
+
+    def test_unsafe_segments(self):
+        service = MqttGpioBindingService(
+            option_binding=binding('relay/#', 'XIO-P{0}'),
+            mqtt_cfg_file='test/mqtt.cfg')
+
+        self.assertEqual([('XIO-P_4-a', False, None)], service.get_actions('relay/_4-a'))
+        self.assertEqual([], service.get_actions('relay/a/b'))
+        self.assertEqual([], service.get_actions('relay/../4'))
+        self.assertEqual([], service.get_actions('relay/4 5'))
+        self.assertEqual([], service.get_actions('relay/4\n'))
@@ -0,0 +1,222 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gpio_device_tools import config, crc, ds1820, scheduler
+
+SENSORS = ['28-000001', '28-000002']
+
+W1_SLAVE = '37 00 4b 46 ff ff 07 10 1e : crc=1e YES\n' \
+           '37 00 4b 46 ff ff 07 10 1e t={}\n'
+
+
+class W1TestCase(unittest.TestCase):
+    """ Builds a sysfs like 1-wire devices directory with two DS18B20 """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.master = os.path.join(self.dir, 'w1_bus_master1')
+        os.mkdir(self.master)
+        self.write(self.master, 'w1_master_slaves', '28-000001\n28-000002\n01-000003\n')
+
+        for sens_id, temp in [('28-000001', 21500), ('28-000002', -1250)]:
+            os.mkdir(os.path.join(self.dir, sens_id))
+            self.write(os.path.join(self.dir, sens_id), 'w1_slave', W1_SLAVE.format(temp))
+            self.write(os.path.join(self.dir, sens_id), 'temperature', '{}\n'.format(temp + 1000))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    @staticmethod
+    def write(dir_name, fn, data):
+        with open(os.path.join(dir_name, fn), 'w') as f:
+            f.write(data)
+
+    def read(self, fn):
+        with open(os.path.join(self.master, fn)) as f:
+            return f.read()
+
+
+class TestW1BusReader(W1TestCase):
+
+    def test_bulk_read(self):
+        self.write(self.master, 'therm_bulk_read', '0\n')
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertEqual({'28-000001': 22.5, '28-000002': -0.25}, reader.read_all(SENSORS))
+        self.assertEqual('trigger\n', self.read('therm_bulk_read'))
+
+    def test_single_reads(self):
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertEqual({'28-000001': 21.5, '28-000002': -1.25}, reader.read_all(SENSORS))
+        self.assertFalse(os.path.exists(os.path.join(self.master, 'therm_bulk_read')))
+
+    def test_unlisted_sensor(self):
+        os.remove(os.path.join(self.master, 'w1_master_slaves'))
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertEqual({'28-000001': 21.5}, reader.read_all(['28-000001']))
+
+    def test_only_requested_sensors(self):
+        self.write(self.master, 'therm_bulk_read', '0\n')
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertEqual({'28-000001': 22.5}, reader.read_all(['28-000001']))
+        os.remove(os.path.join(self.master, 'therm_bulk_read'))
+        self.assertEqual({'28-000002': -1.25}, reader.read_all(['28-000002']))
+
+    def test_bulk_value_checked(self):
+        self.write(self.master, 'therm_bulk_read', '0\n')
+        # the power-on value of the scratchpad
+        self.write(os.path.join(self.dir, '28-000001'), 'temperature', '85000\n')
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertEqual(21.5, reader.read_all(['28-000001'])['28-000001'])
+
+        self.write(os.path.join(self.dir, '28-000001'), 'w1_slave',
+                   W1_SLAVE.format(85000).replace('1e :', '1f :'))
+        self.assertTrue(isinstance(reader.read_all(['28-000001'])['28-000001'], crc.ChecksumError))
+
+    def test_read_cycle(self):
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave', max_age=60)
+        reader.read_cycle(SENSORS)
+
+        self.write(os.path.join(self.dir, '28-000002'), 'w1_slave', W1_SLAVE.format(30000))
+        self.assertEqual(-1.25, reader.temperature('28-000002'))
+
+    def test_cached_values(self):
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave', max_age=60)
+        self.assertEqual(-1.25, reader.temperature('28-000002'))
+
+        self.write(os.path.join(self.dir, '28-000002'), 'w1_slave', W1_SLAVE.format(30000))
+        self.assertEqual(-1.25, reader.temperature('28-000002'))
+        # only the requested sensor was read
+        self.assertEqual(30.0, ds1820.W1BusReader(self.dir, 'w1_slave').temperature('28-000002'))
+
+        reader.max_age = 0
+        self.assertEqual(30.0, reader.temperature('28-000002'))
+
+    def test_detached_sensor(self):
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertTrue(isinstance(reader.read_all(['28-000009'])['28-000009'], IOError))
+        self.assertRaises(IOError, ds1820.DS1820Sensor,
+                          sens_dir=self.dir, sens_file='w1_slave', sens_id='28-000009')
+
+    def test_removed_sensor(self):
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+        shutil.rmtree(os.path.join(self.dir, '28-000002'))
+
+        self.assertRaises(IOError, reader.temperature, '28-000002')
+
+    def test_checksum_error(self):
+        self.write(os.path.join(self.dir, '28-000002'), 'w1_slave',
+                   W1_SLAVE.format(30000).replace('1e :', '1f :'))
+        reader = ds1820.W1BusReader(self.dir, 'w1_slave')
+
+        self.assertTrue(isinstance(reader.read_all(SENSORS)['28-000002'], crc.ChecksumError))
+        self.assertRaises(crc.ChecksumError, ds1820.DS1820Sensor,
+                          sens_dir=self.dir, sens_file='w1_slave', sens_id='28-000002')
+
+        self.write(os.path.join(self.dir, '28-000002'), 'w1_slave',
+                   '00 00 00 00 00 00 00 00 00 : crc=00 YES\n00 00 00 00 00 00 00 00 00 t=0\n')
+        self.assertTrue(isinstance(reader.read_slave('28-000002'), crc.ChecksumError))
+
+
+class TestDaemonCycle(W1TestCase):
+
+    def setUp(self):
+        W1TestCase.setUp(self)
+        self.write(self.master, 'therm_bulk_read', '0\n')
+        self.reader = ds1820.get_bus_reader(self.dir, 'w1_slave')
+        self.conversions = 0
+        self.outputs = 0
+
+        bulk_trigger = self.reader.bulk_trigger
+
+        def count_trigger(master):
+            self.conversions += 1
+            return bulk_trigger(master)
+
+        self.reader.bulk_trigger = count_trigger
+
+    def sensor_cfg(self, sens_id):
+        cfg = config.ConfigItem()
+        cfg.sensor_type = 'ds1820'
+        cfg.sensor_param = sens_id
+        cfg.interval = 3600.0
+        cfg.jitter = 0.0
+        cfg.verbose = False
+        return cfg
+
+    def create_sensor(self, sensor_cfg):
+        return ds1820.DS1820Sensor(sens_dir=self.dir, sens_file='w1_slave',
+                                   sens_id=sensor_cfg.sensor_param)
+
+    def create_channel(self, sensor_cfg):
+        return self
+
+    def output(self, sens):
+        self.outputs += 1
+        if self.outputs == len(SENSORS):
+            self.sched.stop()
+
+    def run_scheduler(self, prepare_cycle):
+        self.sched = scheduler.SensorScheduler(
+            [self.sensor_cfg(sens_id) for sens_id in SENSORS],
+            self.create_sensor, self.create_channel,
+            prepare_cycle=prepare_cycle, window=ds1820.CONVERSION_TIME)
+        self.sched.run()
+
+    def test_one_conversion(self):
+        self.run_scheduler(lambda sensor_cfgs: ds1820.read_cycle(sensor_cfgs, self.dir, 'w1_slave'))
+
+        self.assertEqual(1, self.conversions)
+        self.assertEqual([22.5, -0.25], [task.sensor.temperature for task in self.sched.tasks])
+
+    def test_conversion_per_sensor(self):
+        self.run_scheduler(None)
+
+        self.assertEqual(len(SENSORS), self.conversions)
+
+
+class TestW1DeviceIndex(W1TestCase):
+
+    def test_devices(self):
+        index = ds1820.W1DeviceIndex(self.dir)
+
+        self.assertEqual(['28-000001', '28-000002', '01-000003'], index.devices())
+        self.assertEqual(['01-000003'], index.devices({'01'}))
+        self.assertEqual(os.path.join(self.dir, '28-000002'), index.path('28-000002'))
+        self.assertEqual(None, index.path('28-000009'))
+
+    def test_refresh(self):
+        index = ds1820.W1DeviceIndex(self.dir, min_rescan=60)
+        self.assertEqual(None, index.path('28-000009'))
+
+        self.write(self.master, 'w1_master_slaves', '28-000009\n')
+        self.assertEqual(None, index.path('28-000009'))
+
+        index.refresh()
+        self.assertEqual(['28-000009'], index.devices())
+
+    def test_expand_wildcard(self):
+        cfg = config.ConfigItem()
+        cfg.sensor_type = 'ds1820'
+        cfg.sensor_param = '*'
+        cfg.id = 'ID'
+        cfg.label = 'Probe'
+        cfg.verbose = False
+
+        cfgs = ds1820.expand_wildcard(cfg, self.dir)
+        self.assertEqual(['28-000001', '28-000002'], [c.sensor_param for c in cfgs])
+        self.assertEqual([None, None], [c.id for c in cfgs])
+        self.assertEqual('Probe', cfgs[1].label)
+
+        cfg.sensor_param = '28-000001'
+        self.assertEqual([cfg], ds1820.expand_wildcard(cfg, self.dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from gpio_device_tools import write
+
+
+class FakeGPIO():
+    """ GPIO backend recording the calls """
+
+    def __init__(self):
+        self.calls = []
+
+    def setup(self, pin, mode):
+        self.calls.append(('setup', pin, mode))
+
+    def output(self, pin, value):
+        self.calls.append(('output', pin, value))
+
+    def cleanup(self, pin=None):
+        self.calls.append(('cleanup',))
+
+
+class TestGPIOPinManager(unittest.TestCase):
+
+    def setUp(self):
+        self.gpio = FakeGPIO()
+        self.pins = write.GPIOPinManager(self.gpio)
+
+    def test_setup_once(self):
+        self.pins.write('XIO-P4', 'on')
+        self.pins.write('XIO-P4', 'off')
+        self.pins.write('XIO-P4', 'true')
+
+        self.assertEqual([('setup', 'XIO-P4', write.OUT),
+                          ('output', 'XIO-P4', 1),
+                          ('output', 'XIO-P4', 0),
+                          ('output', 'XIO-P4', 1)], self.gpio.calls)
+
+    def test_skip_unchanged(self):
+        self.pins.write('XIO-P4', '1')
+        self.pins.write('XIO-P4', '1')
+        self.pins.write('XIO-P5', '1')
+
+        self.assertEqual(2, self.pins.writes)
+        self.assertEqual(1, self.pins.skipped)
+        self.assertEqual(1, self.pins.level('XIO-P4'))
+
+    def test_cleanup(self):
+        self.pins.cleanup()
+        self.assertEqual([], self.gpio.calls)
+
+        self.pins.write('XIO-P4', '0')
+        self.pins.cleanup()
+        self.assertEqual(('cleanup',), self.gpio.calls[-1])
+        self.assertEqual(None, self.pins.level('XIO-P4'))
+
+
+class TestBatchWrite(unittest.TestCase):
+
+    def test_loop(self):
+        gpio = FakeGPIO()
+        pins = write.GPIOPinManager(gpio)
+        pins.write('XIO-P4', '1')
+        pins.write_all({'XIO-P4': '1', 'XIO-P5': 'off'})
+
+        self.assertEqual([('setup', 'XIO-P4', write.OUT),
+                          ('output', 'XIO-P4', 1),
+                          ('setup', 'XIO-P5', write.OUT),
+                          ('output', 'XIO-P5', 0)], gpio.calls)
+        self.assertEqual(1, pins.skipped)
+
+    def test_only_changed(self):
+        gpio = FakeGPIO()
+        pins = write.GPIOPinManager(gpio)
+        pins.write_all({'P1': '1', 'P2': '0'})
+        del gpio.calls[:]
+        pins.write_all({'P1': '0', 'P2': '0'})
+
+        self.assertEqual([('output', 'P1', 0)], gpio.calls)
+        self.assertEqual(3, pins.writes)
+        self.assertEqual(1, pins.skipped)
+
+    def test_invalid_value(self):
+        gpio = FakeGPIO()
+        pins = write.GPIOPinManager(gpio)
+
+        self.assertRaises(ValueError, pins.write_all, {'P1': '1', 'P2': 'half'})
+        self.assertEqual([], gpio.calls)
+
+    def test_parse_pins(self):
+        self.assertEqual([('P1', '1'), ('XIO-P5', 'off')],
+                         write.parse_pins('P1=1, XIO-P5=off').items())
+        self.assertRaises(ValueError, write.parse_pins, 'P1=1,P2')
+        self.assertRaises(ValueError, write.parse_pins, 'P1=2')